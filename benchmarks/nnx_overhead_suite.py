@@ -0,0 +1,316 @@
+# Copyright 2024 The Flax Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark suite for the Python overhead of NNX graph operations and transforms.
+
+Every benchmark is run for each combination of ``--depths`` and ``--widths``
+and reports the median time per call in microseconds. Results are written
+as JSON with ``--output`` and can be compared against a previous run with
+``--baseline``, in which case the script exits with a non-zero status if
+any benchmark is slower than the baseline by more than ``--tolerance``.
+
+Example usage:
+
+  # store a baseline
+  python benchmarks/nnx_overhead_suite.py --output=/tmp/baseline.json
+  # compare against it
+  python benchmarks/nnx_overhead_suite.py --baseline=/tmp/baseline.json
+"""
+
+import json
+import platform
+import sys
+import timeit
+import typing as tp
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+import flax
+from flax import linen as nn
+from flax import nnx
+
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+flags.DEFINE_list('depths', ['4', '16'], 'Depths of the models')
+flags.DEFINE_list('widths', ['1', '4'], 'Variables per layer')
+flags.DEFINE_list(
+  'benchmarks', [], 'Benchmarks to run, defaults to all of them'
+)
+flags.DEFINE_integer('repeats', 7, 'Number of timed repetitions')
+flags.DEFINE_float(
+  'min_time', 0.05, 'Minimum time in seconds of each timed repetition'
+)
+flags.DEFINE_string('output', None, 'Path of the JSON file with the results')
+flags.DEFINE_string('baseline', None, 'Path of a JSON file to compare against')
+flags.DEFINE_float(
+  'tolerance',
+  0.25,
+  'Maximum allowed slowdown relative to the baseline, e.g. 0.25 is 25%',
+)
+flags.DEFINE_multi_string(
+  'benchmark_tolerance',
+  [],
+  'Per benchmark tolerance as <benchmark>=<tolerance>, overrides --tolerance',
+)
+
+
+class Layer(nnx.Module):
+  def __init__(self, width: int, *, rngs: nnx.Rngs):
+    for i in range(width):
+      setattr(self, f'w{i}', nnx.Param(jax.random.normal(rngs.params(), (4,))))
+    self.count = nnx.BatchStat(jnp.array(0))
+
+  def __call__(self, x):
+    for name, value in sorted(vars(self).items()):
+      if isinstance(value, nnx.Param):
+        x = x * value
+    return x
+
+
+class Model(nnx.Module):
+  def __init__(self, depth: int, width: int, *, rngs: nnx.Rngs):
+    self.layers = [Layer(width, rngs=rngs) for _ in range(depth)]
+
+  def __call__(self, x):
+    for layer in self.layers:
+      x = layer(x)
+    return x
+
+
+class LinenLayer(nn.Module):
+  width: int
+
+  @nn.compact
+  def __call__(self, x):
+    for i in range(self.width):
+      x = x * self.param(f'w{i}', nn.initializers.normal(), (4,))
+    return x
+
+
+class LinenModel(nn.Module):
+  depth: int
+  width: int
+
+  @nn.compact
+  def __call__(self, x):
+    for _ in range(self.depth):
+      x = LinenLayer(self.width)(x)
+    return x
+
+
+Benchmark = tp.Callable[[int, int], tp.Callable[[], tp.Any]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(f: Benchmark) -> Benchmark:
+  """Registers a benchmark, ``f(depth, width)`` returns the function to time."""
+  BENCHMARKS[f.__name__] = f
+  return f
+
+
+@benchmark
+def split(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  return lambda: nnx.split(model)
+
+
+@benchmark
+def merge(depth, width):
+  graphdef, state = nnx.split(Model(depth, width, rngs=nnx.Rngs(0)))
+  return lambda: nnx.merge(graphdef, state)
+
+
+@benchmark
+def state(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  return lambda: nnx.state(model, nnx.Param)
+
+
+@benchmark
+def update(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  state = nnx.state(model)
+  return lambda: nnx.update(model, state)
+
+
+@benchmark
+def jit_dispatch(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  x = jnp.ones((4,))
+
+  @nnx.jit
+  def f(model, x):
+    return model(x)
+
+  return lambda: f(model, x)
+
+
+@benchmark
+def jit_cache_graph_nodes(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  x = jnp.ones((4,))
+
+  @nnx.jit(cache_graph_nodes=True)
+  def f(model, x):
+    return model(x)
+
+  return lambda: f(model, x)
+
+
+@benchmark
+def cached_partial(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  x = jnp.ones((4,))
+
+  @nnx.jit
+  def f(model, x):
+    return model(x)
+
+  cached_f = nnx.cached_partial(f, model)
+  return lambda: cached_f(x)
+
+
+@benchmark
+def vmap_trace(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  x = jnp.ones((2, 4))
+
+  @nnx.vmap(in_axes=(None, 0), out_axes=0)
+  def f(model, x):
+    return model(x)
+
+  graphdef, state = nnx.split(model)
+  trace = jax.make_jaxpr(lambda state, x: f(nnx.merge(graphdef, state), x))
+  return lambda: trace(state, x)
+
+
+@benchmark
+def scan_trace(depth, width):
+  model = Model(depth, width, rngs=nnx.Rngs(0))
+  xs = jnp.ones((2, 4))
+
+  @nnx.scan(in_axes=(None, nnx.Carry, 0), out_axes=nnx.Carry)
+  def f(model, carry, x):
+    return model(carry + x)
+
+  graphdef, state = nnx.split(model)
+  trace = jax.make_jaxpr(
+    lambda state, xs: f(nnx.merge(graphdef, state), jnp.zeros((4,)), xs)
+  )
+  return lambda: trace(state, xs)
+
+
+@benchmark
+def linen_apply(depth, width):
+  module = LinenModel(depth, width)
+  x = jnp.ones((4,))
+  variables = module.init(jax.random.key(0), x)
+  return lambda: module.apply(variables, x)
+
+
+def time_call(f: tp.Callable[[], tp.Any], repeats: int, min_time: float):
+  """Returns the median time per call in microseconds."""
+  jax.block_until_ready(f())  # warmup, triggers compilation
+  timer = timeit.Timer(f)
+  number, total_time = timer.autorange()
+  number = max(1, round(number * min_time / total_time))
+  times = timer.repeat(repeat=repeats, number=number)
+  return float(np.median(times)) / number * 1e6
+
+
+def parse_tolerances(values: list[str]) -> dict[str, float]:
+  tolerances = {}
+  for value in values:
+    name, sep, tolerance = value.partition('=')
+    if not sep or name not in BENCHMARKS:
+      raise app.UsageError(f'Invalid --benchmark_tolerance: {value!r}')
+    tolerances[name] = float(tolerance)
+  return tolerances
+
+
+def compare(
+  results: dict[str, float],
+  baseline: dict[str, float],
+  tolerance: float,
+  tolerances: dict[str, float],
+) -> list[str]:
+  """Returns the keys of the results that regressed w.r.t. the baseline."""
+  regressions = []
+  for key, time_us in results.items():
+    if key not in baseline:
+      continue
+    name = key.split('/')[0]
+    max_time_us = baseline[key] * (1 + tolerances.get(name, tolerance))
+    status = 'ok'
+    if time_us > max_time_us:
+      regressions.append(key)
+      status = 'REGRESSION'
+    print(
+      f'{key:<40} {baseline[key]:>12.2f} µs {time_us:>12.2f} µs'
+      f' {time_us / baseline[key]:>6.2f}x  {status}'
+    )
+  return regressions
+
+
+def main(argv):
+  del argv
+  names = FLAGS.benchmarks or list(BENCHMARKS)
+  for name in names:
+    if name not in BENCHMARKS:
+      raise app.UsageError(
+        f'Unknown benchmark {name!r}, expected one of {list(BENCHMARKS)}'
+      )
+  tolerances = parse_tolerances(FLAGS.benchmark_tolerance)
+
+  results: dict[str, float] = {}
+  for name in names:
+    for depth in map(int, FLAGS.depths):
+      for width in map(int, FLAGS.widths):
+        key = f'{name}/depth={depth}/width={width}'
+        f = BENCHMARKS[name](depth, width)
+        results[key] = time_call(f, FLAGS.repeats, FLAGS.min_time)
+        print(f'{key:<40} {results[key]:>12.2f} µs')
+
+  if FLAGS.output:
+    report = {
+      'metadata': {
+        'flax': flax.__version__,
+        'jax': jax.__version__,
+        'python': platform.python_version(),
+        'backend': jax.default_backend(),
+        'repeats': FLAGS.repeats,
+      },
+      'results_us': results,
+    }
+    with open(FLAGS.output, 'w') as f:
+      json.dump(report, f, indent=2, sort_keys=True)
+
+  if FLAGS.baseline:
+    with open(FLAGS.baseline) as f:
+      baseline = json.load(f)['results_us']
+    print()
+    print(f'{"benchmark":<40} {"baseline":>15} {"current":>15}')
+    regressions = compare(results, baseline, FLAGS.tolerance, tolerances)
+    if regressions:
+      print(f'\n{len(regressions)} benchmark(s) regressed: {regressions}')
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  jax.config.update('jax_platforms', 'cpu')
+  app.run(main)
@@ -26,6 +26,7 @@ class Config:
   flax_mutable_array: bool
   flax_pytree_module: bool
   flax_max_repr_depth: int | None
+  flax_graph_flatten_cache: bool
   # See https://google.github.io/pytype/faq.html.
   _HAS_DYNAMIC_ATTRIBUTES = True
 
@@ -283,4 +284,13 @@ flax_max_repr_depth = int_flag(
   name='flax_max_repr_depth',
   default=None,
   help='Maximum depth of reprs for nested flax objects. Default is None (no limit).',
-)
\ No newline at end of file
+)
+
+flax_graph_flatten_cache = bool_flag(
+  name='flax_graph_flatten_cache',
+  default=False,
+  help=(
+    'Whether to cache the flatten plan of graph nodes and reuse it while '
+    'their structure does not change.'
+  ),
+)
@@ -15,6 +15,7 @@
 """Utilities we could consider upstreaming to Jax."""
 
 import collections
+import functools
 import itertools
 import warnings
 from collections.abc import Iterable  # pylint: disable=g-importing-member
@@ -96,6 +97,54 @@ def partial_eval_by_shape(fn, input_spec, *args, **kwargs):
   return jax.tree_util.tree_unflatten(out_tree(), out_flat)
 
 
+@functools.lru_cache
+def _key_data_shape(impl: str) -> tuple[int, ...]:
+  return jax.eval_shape(
+    lambda: jax.random.key_data(jax.random.key(0, impl=impl))
+  ).shape
+
+
+def convert_key_impl(key, impl: str):
+  """Converts PRNG keys to the given PRNG implementation.
+
+  Each key is used to draw the key data of a new key of implementation
+  ``impl``, so the conversion is deterministic and keys that were distinct
+  before the conversion stay distinct with overwhelming probability. Keys that
+  already use ``impl`` are returned unchanged, and raw ``uint32`` keys are
+  interpreted as the default implementation.
+
+  Example::
+
+    >>> import jax
+    >>> from flax import jax_utils
+    ...
+    >>> key = jax_utils.convert_key_impl(jax.random.key(0), 'rbg')
+    >>> print(jax.random.key_impl(key))
+    rbg
+    >>> jax_utils.convert_key_impl(key, 'rbg') is key
+    True
+
+  Args:
+    key: a typed PRNG key array or a raw ``uint32`` key array.
+    impl: the name of the target PRNG implementation, e.g. ``'threefry2x32'``,
+      ``'rbg'`` or ``'unsafe_rbg'``.
+  Returns:
+    A typed PRNG key array with the same shape as ``key`` and implementation
+    ``impl``.
+  """
+  if not jnp.issubdtype(key.dtype, jax.dtypes.prng_key):
+    key = jax.random.wrap_key_data(key)
+  if str(jax.random.key_impl(key)) == impl:
+    return key
+  data_shape = _key_data_shape(impl)
+  data = jax.vmap(lambda k: jax.random.bits(k, data_shape, jnp.uint32))(
+    key.reshape(-1)
+  )
+  return jax.random.wrap_key_data(
+    data.reshape(*key.shape, *data_shape), impl=impl
+  )
+
+
 def _parse_spec(spec):
   """Parse an input spec of the form (shape, dtype) or shape into a jax.ShapeDtypeStruct."""
   spec = tuple(spec)
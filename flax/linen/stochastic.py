@@ -19,6 +19,7 @@ from collections.abc import Sequence
 import jax.numpy as jnp
 from jax import lax, random
 
+from flax import jax_utils
 from flax.linen.module import Module, compact, merge_param
 from flax.typing import PRNGKey
 
@@ -58,12 +59,17 @@ class Dropout(Module):
       masked, whereas if true, no mask is applied and the inputs are returned as
       is.
     rng_collection: the rng collection name to use when requesting an rng key.
+    rng_impl: an optional PRNG implementation used to generate the dropout
+      mask, e.g. ``'rbg'`` which is considerably cheaper than the default
+      ``'threefry2x32'``. Keys of a different implementation are converted
+      with :func:`flax.jax_utils.convert_key_impl`.
   """
 
   rate: float
   broadcast_dims: Sequence[int] = ()
   deterministic: bool | None = None
   rng_collection: str = 'dropout'
+  rng_impl: str | None = None
 
   @compact
   def __call__(
@@ -99,6 +105,8 @@ class Dropout(Module):
     keep_prob = 1.0 - self.rate
     if rng is None:
       rng = self.make_rng(self.rng_collection)
+    if self.rng_impl is not None:
+      rng = jax_utils.convert_key_impl(rng, self.rng_impl)
     broadcast_shape = list(inputs.shape)
     for dim in self.broadcast_dims:
       broadcast_shape[dim] = 1
@@ -50,12 +50,15 @@ from .graph import pop as pop
 from .graph import state as state
 from .graph import graphdef as graphdef
 from .graph import iter_graph as iter_graph
+from .graph import iter_variables as iter_variables
 from .graph import call as call
 from .graph import SplitContext as SplitContext
 from .graph import split_context as split_context
 from .graph import MergeContext as MergeContext
 from .graph import merge_context as merge_context
 from .graph import variables as variables
+from .graph import variables_size_bytes as variables_size_bytes
+from .graph import variables_dtypes as variables_dtypes
 from .graph import freeze as freeze
 from .graph import mutable as mutable
 from .graph import pure as pure
@@ -150,13 +153,20 @@ from .training.optimizer import OptState as OptState
 from .transforms.autodiff import DiffState as DiffState
 from .transforms.autodiff import grad as grad
 from .transforms.autodiff import value_and_grad as value_and_grad
+from .transforms.autodiff import accumulate_value_and_grad as accumulate_value_and_grad
 from .transforms.autodiff import custom_vjp as custom_vjp
 from .transforms.autodiff import remat as remat
 from .transforms.compilation import jit as jit
 from .transforms.compilation import shard_map as shard_map
 from .transforms.compilation import StateSharding as StateSharding
+from .transforms.compilation import jit_stats as jit_stats
+from .transforms.compilation import JitStats as JitStats
+from .transforms.compilation import JitFunctionStats as JitFunctionStats
+from .transforms.compilation import precompile as precompile
+from .transforms.compilation import Precompiled as Precompiled
 from .transforms.iteration import Carry as Carry
 from .transforms.iteration import scan as scan
+from .transforms.iteration import multi_step as multi_step
 from .transforms.iteration import vmap as vmap
 from .transforms.iteration import pmap as pmap
 from .transforms.transforms import eval_shape as eval_shape
@@ -68,6 +68,31 @@ def filters_to_predicates(
   return tuple(map(to_predicate, filters))
 
 
+def is_type_predicate(predicate: Predicate) -> bool:
+  """Returns ``True`` if the result of ``predicate`` only depends on the type
+  of the value, such predicates only need to be evaluated once per type."""
+  if isinstance(predicate, (OfType, Everything, Nothing)):
+    return True
+  elif isinstance(predicate, (Any, All)):
+    return all(map(is_type_predicate, predicate.predicates))
+  elif isinstance(predicate, Not):
+    return is_type_predicate(predicate.predicate)
+  return False
+
+
+def is_static_predicate(predicate: Predicate) -> bool:
+  """Returns ``True`` if the result of ``predicate`` only depends on the path,
+  the type and the tag of the value, which for Variables are fixed by the
+  structure of the graph."""
+  if isinstance(predicate, (WithTag, PathContains, PathIn)):
+    return True
+  elif isinstance(predicate, (Any, All)):
+    return all(map(is_static_predicate, predicate.predicates))
+  elif isinstance(predicate, Not):
+    return is_static_predicate(predicate.predicate)
+  return is_type_predicate(predicate)
+
+
 class HasTag(tp.Protocol):
   tag: str
 
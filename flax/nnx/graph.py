@@ -16,9 +16,12 @@ from __future__ import annotations
 
 import contextlib
 import dataclasses
+import enum
 import functools
+import hashlib
 import threading
 import typing as tp
+import weakref
 
 from flax import config
 from flax.nnx import filterlib, reprlib, traversals, variablelib
@@ -30,7 +33,14 @@ from flax.nnx.proxy_caller import (
 )
 from flax.nnx.statelib import FlatState, State
 from flax.nnx.variablelib import Variable, is_mutable_array
-from flax.typing import Key, PathParts, is_key_like
+from flax.typing import (
+  MISSING,
+  Key,
+  PathParts,
+  SizeBytes,
+  has_shape_dtype,
+  is_key_like,
+)
 import jax
 import numpy as np
 import treescope  # type: ignore[import-not-found,import-untyped]
@@ -189,6 +199,8 @@ class GraphNodeImpl(NodeImplBase[Node, Leaf, AuxData]):
   create_empty: tp.Callable[[AuxData], Node]
   clear: tp.Callable[[Node], None]
   init: tp.Callable[[Node, tp.Iterable[tuple[Key, Leaf]]], None]
+  # optional, stores children that will be materialized on access
+  init_lazy: tp.Callable[[Node, dict[Key, LazySubgraph]], None] | None = None
 
 
 @dataclasses.dataclass(frozen=True, slots=True)
@@ -213,6 +225,7 @@ def register_graph_node_type(
   create_empty: tp.Callable[[AuxData], Node],
   clear: tp.Callable[[Node], None],
   init: tp.Callable[[Node, tp.Iterable[tuple[Key, Leaf]]], None],
+  init_lazy: tp.Callable[[Node, dict[Key, LazySubgraph]], None] | None = None,
 ):
   if type in GRAPH_REGISTRY:
     raise ValueError(f'Node type {type} is already registered.')
@@ -225,6 +238,7 @@ def register_graph_node_type(
     create_empty=create_empty,
     clear=clear,
     init=init,
+    init_lazy=init_lazy,
   )
 
 
@@ -535,34 +549,119 @@ AttrType = tp.Union[
 
 # GraphDef = tp.Union[NodeDef[Node], NodeRef[Node], VariableDef[Node]]
 @jax.tree_util.register_static
-@dataclasses.dataclass(frozen=True, slots=True)
+@dataclasses.dataclass(frozen=True, slots=True, weakref_slot=True)
 class GraphDef(tp.Generic[Node]):
   nodes: list[NodeDefType[tp.Any]]
   attributes: list[tuple[Key, AttrType]]
   num_leaves: int
+  # GraphDefs are immutable, the structural hash and the outer index
+  # conversions are computed lazily and stored on the instance
+  _hash: int | None = dataclasses.field(
+    default=None, init=False, repr=False, compare=False
+  )
+  _no_outer_index: GraphDef[Node] | None = dataclasses.field(
+    default=None, init=False, repr=False, compare=False
+  )
+  _same_outer_index: GraphDef[Node] | None = dataclasses.field(
+    default=None, init=False, repr=False, compare=False
+  )
 
   def __hash__(self) -> int:
-    return hash((tuple(self.nodes), tuple(self.attributes)))
+    if self._hash is None:
+      object.__setattr__(
+        self, '_hash', hash((tuple(self.nodes), tuple(self.attributes)))
+      )
+    return self._hash  # type: ignore[return-value]
 
-  def with_no_outer_index(self) -> GraphDef[Node]:
-    return GraphDef(
-      nodes=[
-        node.with_no_outer_index() if not isinstance(node, NodeRef) else node
-        for node in self.nodes
-      ],
-      attributes=self.attributes,
-      num_leaves=self.num_leaves,
+  def __eq__(self, other: tp.Any) -> bool:
+    if self is other:
+      return True
+    if not isinstance(other, GraphDef):
+      return NotImplemented
+    return (
+      hash(self) == hash(other)
+      and self.num_leaves == other.num_leaves
+      and self.nodes == other.nodes
+      and self.attributes == other.attributes
     )
 
+  def with_no_outer_index(self) -> GraphDef[Node]:
+    if self._no_outer_index is None:
+      object.__setattr__(
+        self,
+        '_no_outer_index',
+        GraphDef(
+          nodes=[
+            node.with_no_outer_index()
+            if not isinstance(node, NodeRef)
+            else node
+            for node in self.nodes
+          ],
+          attributes=self.attributes,
+          num_leaves=self.num_leaves,
+        ),
+      )
+    return self._no_outer_index  # type: ignore[return-value]
+
   def with_same_outer_index(self) -> GraphDef[Node]:
-    return GraphDef(
-      nodes=[
-        node.with_same_outer_index() if not isinstance(node, NodeRef) else node
-        for node in self.nodes
-      ],
-      attributes=self.attributes,
-      num_leaves=self.num_leaves,
-    )
+    if self._same_outer_index is None:
+      object.__setattr__(
+        self,
+        '_same_outer_index',
+        GraphDef(
+          nodes=[
+            node.with_same_outer_index()
+            if not isinstance(node, NodeRef)
+            else node
+            for node in self.nodes
+          ],
+          attributes=self.attributes,
+          num_leaves=self.num_leaves,
+        ),
+      )
+    return self._same_outer_index  # type: ignore[return-value]
+
+  # the cached hash depends on the process, only pickle the structure
+  def __getstate__(self):
+    return self.nodes, self.attributes, self.num_leaves
+
+  def __setstate__(self, state):
+    nodes, attributes, num_leaves = state
+    object.__setattr__(self, 'nodes', nodes)
+    object.__setattr__(self, 'attributes', attributes)
+    object.__setattr__(self, 'num_leaves', num_leaves)
+    object.__setattr__(self, '_hash', None)
+    object.__setattr__(self, '_no_outer_index', None)
+    object.__setattr__(self, '_same_outer_index', None)
+
+  def canonical_bytes(self) -> bytes:
+    """Returns a serialization of the structure that is stable across processes.
+
+    Types and functions are encoded by their qualified name and metadata is
+    canonicalized (e.g. mappings are sorted by key), unlike ``hash(graphdef)``
+    which depends on the identity of the Python objects in the current
+    process. Raises a ``ValueError`` if the GraphDef contains values that
+    cannot be canonicalized, e.g. objects whose ``repr`` contains their
+    memory address.
+    """
+    return repr(_canonicalize(self, set())).encode('utf-8')
+
+  def digest(self) -> str:
+    """Returns the hex SHA-256 digest of :meth:`canonical_bytes`.
+
+    Example::
+
+      >>> from flax import nnx
+      ...
+      >>> graphdef1 = nnx.graphdef(nnx.Linear(2, 3, rngs=nnx.Rngs(0)))
+      >>> graphdef2 = nnx.graphdef(nnx.Linear(2, 3, rngs=nnx.Rngs(1)))
+      >>> graphdef3 = nnx.graphdef(nnx.Linear(2, 4, rngs=nnx.Rngs(0)))
+      >>> graphdef1.digest() == graphdef2.digest()
+      True
+      >>> graphdef1.digest() == graphdef3.digest()
+      False
+    """
+    return hashlib.sha256(self.canonical_bytes()).hexdigest()
 
   # TODO(cgarciae): remove this method
   def apply(
@@ -583,6 +682,134 @@ class GraphDef(tp.Generic[Node]):
     return CallableProxy(_apply, accessor)  # type: ignore
 
 
+# structural hash -> canonical GraphDef
+_INTERNED_GRAPHDEFS: weakref.WeakValueDictionary[int, GraphDef[tp.Any]] = (
+  weakref.WeakValueDictionary()
+)
+
+
+def _intern_graphdef(graphdef: GraphDef[Node]) -> GraphDef[Node]:
+  """Returns the canonical instance of ``graphdef``.
+
+  Structurally equal GraphDefs that are interned share a single instance, so
+  comparing them (e.g. when JAX looks up a jit cache entry) resolves by
+  identity. Canonical instances are only weakly referenced.
+  """
+  key = hash(graphdef)
+  canonical = _INTERNED_GRAPHDEFS.get(key)
+  if canonical is None:
+    _INTERNED_GRAPHDEFS[key] = graphdef
+    return graphdef
+  elif canonical == graphdef:
+    return canonical
+  # hash collision, keep the given instance
+  return graphdef
+
+
+def _qualname(x: tp.Any) -> str:
+  module = getattr(x, '__module__', None)
+  qualname = getattr(x, '__qualname__', None) or getattr(x, '__name__', None)
+  if qualname is None:
+    raise ValueError(f'Cannot canonicalize {x!r}, it has no qualified name')
+  return f'{module}.{qualname}'
+
+
+def _canonicalize(x: tp.Any, seen: set[int]) -> tp.Any:
+  """Converts ``x`` into nested tuples of primitives that only depend on its
+  value, used by :meth:`GraphDef.canonical_bytes`."""
+  if x is None or isinstance(x, (bool, int, float, complex, str, bytes)):
+    return x
+  if isinstance(x, type):
+    return ('type', _qualname(x))
+  if isinstance(x, enum.Enum):
+    return ('enum', _qualname(type(x)), x.name)
+  if isinstance(x, (np.dtype, jax.numpy.dtype)) or (
+    isinstance(x, type) and issubclass(x, np.generic)
+  ):
+    return ('dtype', str(np.dtype(x)))
+
+  if id(x) in seen:
+    raise ValueError(f'Cannot canonicalize {x!r}, it contains a cycle')
+  seen.add(id(x))
+  try:
+    if isinstance(x, jax.tree_util.PyTreeDef):
+      return (
+        'treedef',
+        str(x.num_leaves),
+        _canonicalize(x.node_data(), seen),
+        tuple(_canonicalize(child, seen) for child in x.children()),
+      )
+    if isinstance(x, tp.Mapping):
+      return (
+        'mapping',
+        _qualname(type(x)),
+        tuple(
+          sorted(
+            ((_canonicalize(k, seen), _canonicalize(v, seen))
+             for k, v in x.items()),
+            key=repr,
+          )
+        ),
+      )
+    if isinstance(x, (set, frozenset)):
+      return (
+        _qualname(type(x)),
+        tuple(sorted((_canonicalize(v, seen) for v in x), key=repr)),
+      )
+    if isinstance(x, (tuple, list)):
+      return (
+        _qualname(type(x)),
+        tuple(_canonicalize(v, seen) for v in x),
+      )
+    if dataclasses.is_dataclass(x):
+      return (
+        _qualname(type(x)),
+        tuple(
+          (field.name, _canonicalize(getattr(x, field.name), seen))
+          for field in dataclasses.fields(x)
+          if field.compare
+        ),
+      )
+    if isinstance(x, functools.partial):
+      return (
+        'partial',
+        _canonicalize(x.func, seen),
+        _canonicalize(x.args, seen),
+        _canonicalize(x.keywords, seen),
+      )
+    if isinstance(x, (np.ndarray, np.generic, jax.Array)):
+      array = np.asarray(x)
+      return (
+        'array',
+        array.shape,
+        str(array.dtype),
+        hashlib.sha256(array.tobytes()).hexdigest(),
+      )
+    if callable(x) and hasattr(x, '__code__'):
+      # functions are identified by name, closures and defaults can
+      # parametrize them so they are included as well
+      closure = tuple(
+        _canonicalize(cell.cell_contents, seen) for cell in x.__closure__ or ()
+      )
+      return (
+        'function',
+        _qualname(x),
+        closure,
+        _canonicalize(x.__defaults__, seen),
+        _canonicalize(x.__kwdefaults__, seen),
+      )
+    if callable(x) and hasattr(x, '__qualname__'):
+      return ('callable', _qualname(x))
+    x_repr = repr(x)
+    if ' at 0x' in x_repr:
+      raise ValueError(
+        f'Cannot canonicalize {x_repr}, its repr depends on the process'
+      )
+    return ('repr', _qualname(type(x)), x_repr)
+  finally:
+    seen.discard(id(x))
+
+
 PureState = tuple[GraphDef[Node], GraphState]
 
 
@@ -654,6 +881,19 @@ def flatten(  # type: ignore[invalid-annotation]
   if ref_index is None:
     ref_index = RefMap()
 
+  if ref_outer_index is None and _use_flatten_plan(node, ref_index):
+    _, _, graphdef, flat_state = _flatten_cached(node, with_paths, ref_index)
+    return graphdef, flat_state
+
+  return _flatten(node, with_paths, ref_index, ref_outer_index)
+
+
+def _flatten(
+  node: Node,
+  with_paths: bool,
+  ref_index: RefMap,
+  ref_outer_index: RefMap | None,
+) -> tuple[GraphDef[Node], FlatState[tp.Any] | list[tp.Any]]:
   leaves: list[tp.Any] = []
   path: list[Key] | None = [] if with_paths else None
   paths: list[PathParts] | None = [] if with_paths else None
@@ -942,10 +1182,16 @@ def check_fingerprint(
   if node_impl is None:
     raise RuntimeError(f'Unsupported type: {type(node)}, this is a bug.')
   ctx = FingerprintContext(len(ref_index) + len(new_ref_index))
-  fp_matches = _check_graph_fingerprint(
-    ctx, iter(fp), node, node_impl, ref_index, new_ref_index
-  )
-  return fp_matches
+  fp_iterator = iter(fp)
+  try:
+    fp_matches = _check_graph_fingerprint(
+      ctx, fp_iterator, node, node_impl, ref_index, new_ref_index
+    )
+  except StopIteration:
+    # the graph has more elements than the fingerprint
+    return False
+  # the graph must not have fewer elements either
+  return fp_matches and next(fp_iterator, MISSING) is MISSING
 
 
 def _check_graph_fingerprint(
@@ -1062,6 +1308,7 @@ def unflatten(  # type: ignore[invalid-annotation]
   index_ref: IndexMap | None = None,
   outer_index_outer_ref: IndexMap | None = None,
   copy_variables: bool = True,
+  lazy: bool = False,
 ) -> Node:
   """Unflattens a graphdef into a node with the given state.
 
@@ -1079,6 +1326,9 @@ def unflatten(  # type: ignore[invalid-annotation]
       specified by the graphdef.
     copy_variables: If True (default), variables in the state will be copied onto
       the new new structure, else variables will be shared.
+    lazy: If True, the submodules of graph nodes that support it (e.g. :class:`Object`)
+      are only created when they are first accessed, see :func:`merge`. Cannot be
+      used together with ``index_ref`` or ``outer_index_outer_ref``.
   """
   if isinstance(state, (State, dict)):
     leaves = _get_sorted_leaves(state)
@@ -1088,7 +1338,15 @@ def unflatten(  # type: ignore[invalid-annotation]
     leaves = state
   else:
     raise ValueError(f'Unsupported state type: {type(state)}')
-  if index_ref is None:
+  lazy_unflatten: LazyUnflatten | None = None
+  if lazy:
+    if index_ref is not None or outer_index_outer_ref is not None:
+      raise ValueError(
+        'lazy=True cannot be used with index_ref or outer_index_outer_ref'
+      )
+    lazy_unflatten = LazyUnflatten(graphdef, leaves, copy_variables)
+    index_ref = lazy_unflatten.index_ref
+  elif index_ref is None:
     index_ref = IndexMap()
 
   if len(leaves) != graphdef.num_leaves:
@@ -1102,9 +1360,17 @@ def unflatten(  # type: ignore[invalid-annotation]
   elif isinstance(nodedef := graphdef.nodes[0], NodeRef):
     node = index_ref[nodedef.index]
   else:
-    node_iter = iter(graphdef.nodes)
-    attribute_iter = iter(graphdef.attributes)
-    leaves_iter = iter(leaves)
+    node_iter: tp.Iterator[NodeDefType[tp.Any]]
+    attribute_iter: tp.Iterator[tuple[Key, AttrType]]
+    leaves_iter: tp.Iterator[tp.Any]
+    if lazy_unflatten is not None:
+      node_iter = _SequenceIterator(graphdef.nodes, 0)
+      attribute_iter = _SequenceIterator(graphdef.attributes, 0)
+      leaves_iter = _SequenceIterator(leaves, 0)
+    else:
+      node_iter = iter(graphdef.nodes)
+      attribute_iter = iter(graphdef.attributes)
+      leaves_iter = iter(leaves)
     nodedef = next(node_iter)
     assert not isinstance(nodedef, NodeRef)
     if isinstance(nodedef, MutableArrayDef):
@@ -1120,6 +1386,7 @@ def unflatten(  # type: ignore[invalid-annotation]
       index_ref,
       outer_index_outer_ref,
       copy_variables,
+      lazy_unflatten,
     )
 
     try:
@@ -1141,6 +1408,7 @@ def _graph_unflatten(
   index_ref: IndexMap,
   outer_index_outer_ref: IndexMap | None,
   copy_variables: bool,
+  lazy: LazyUnflatten | None = None,
 ) -> Node:
   """Recursive helper for graph_unflatten.
 
@@ -1233,11 +1501,19 @@ def _graph_unflatten(
         raise ValueError(f'Expected a Variable type but got {type(variable)}.')
       elif isinstance(value, Variable):
         variable.update_from_state(value)
+      elif type(value) is NoUpdate:
+        # the variable was not modified inside the transform
+        pass
       else:
         variable.raw_value = value
     else:  # variabledef.index not in index_ref_cache
       # variable reference does not exist outside, create a new one
-      if isinstance(value, Variable):
+      if type(value) is NoUpdate:
+        raise ValueError(
+          f'Expected a value for Variable at index {variabledef.index} '
+          'but got NO_UPDATE, the Variable does not exist outside.'
+        )
+      elif isinstance(value, Variable):
         variable = value
       else:
         variable = variabledef.type.from_metadata(
@@ -1257,7 +1533,9 @@ def _graph_unflatten(
   if nodedef.index is not None and nodedef.index in index_ref:
     raise RuntimeError(f'GraphDef index {nodedef.index} already used.')
 
-  def _get_children() -> list[tuple[Key, tp.Any]]:
+  def _get_children(
+    lazy_children: dict[Key, LazySubgraph] | None = None,
+  ) -> list[tuple[Key, tp.Any]]:
     children: list[tuple[Key, LeafType | Node]] = []  # type: ignore[invalid-annotation]
 
     assert type(nodedef) is NodeDef
@@ -1286,6 +1564,12 @@ def _graph_unflatten(
       elif type(value) is NodeAttr:
         # if the key is a subgraph we create an empty node
         subgraphdef = next(node_iter)
+        if lazy_children is not None and type(subgraphdef) is NodeDef:
+          assert lazy is not None
+          subgraph = lazy.skip(node_iter, attribute_iter, leaves_iter)  # type: ignore[arg-type]
+          if subgraph is not None:
+            lazy_children[key] = subgraph
+            continue
         if type(subgraphdef) is NodeDef:
           value_node_impl = get_node_impl_for_type(subgraphdef.type)  # type: ignore[attribute-error]
         else:
@@ -1299,6 +1583,7 @@ def _graph_unflatten(
           index_ref,
           outer_index_outer_ref,
           copy_variables,
+          lazy,
         )
         children.append((key, subnode))
       else:
@@ -1326,7 +1611,13 @@ def _graph_unflatten(
       node = node_impl.create_empty(nodedef.metadata)
     assert nodedef.index is not None
     index_ref[nodedef.index] = node
-    node_impl.init(node, _get_children())
+    if lazy is not None and node_impl.init_lazy is not None:
+      lazy_children: dict[Key, LazySubgraph] = {}
+      node_impl.init(node, _get_children(lazy_children))
+      if lazy_children:
+        node_impl.init_lazy(node, lazy_children)
+    else:
+      node_impl.init(node, _get_children())
   else:
     # if the node type does not support the creation of an empty object it means
     # that it cannot reference itself, so we can create its children first
@@ -1335,6 +1626,217 @@ def _graph_unflatten(
   return node
 
 
+# --------------------------------------------------------
+# Lazy unflatten
+# --------------------------------------------------------
+
+
+class _SequenceIterator:
+  """An iterator over a sequence that exposes its position so that ranges
+  of elements can be skipped in constant time."""
+
+  __slots__ = ('sequence', 'position')
+
+  def __init__(self, sequence: tp.Sequence[tp.Any], position: int):
+    self.sequence = sequence
+    self.position = position
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    position = self.position
+    if position >= len(self.sequence):
+      raise StopIteration
+    self.position = position + 1
+    return self.sequence[position]
+
+
+class SubgraphExtent(tp.NamedTuple):
+  # end positions of the subgraph in the nodes, attributes and leaves
+  nodes_end: int
+  attributes_end: int
+  leaves_end: int
+  # range of indexes defined by the subgraph
+  first_index: int
+  last_index: int
+
+
+_SUBGRAPH_EXTENTS: weakref.WeakKeyDictionary[
+  GraphDef[tp.Any], dict[int, SubgraphExtent]
+] = weakref.WeakKeyDictionary()
+
+
+def _subgraph_extents(graphdef: GraphDef[tp.Any]) -> dict[int, SubgraphExtent]:
+  """Computes the extent of every graph node subgraph in ``graphdef``, keyed
+  by the position of its NodeDef. Subgraphs that don't define a contiguous
+  range of indexes are not included as they cannot be skipped."""
+  if graphdef in _SUBGRAPH_EXTENTS:
+    return _SUBGRAPH_EXTENTS[graphdef]
+
+  nodes, attributes = graphdef.nodes, graphdef.attributes
+  extents: dict[int, SubgraphExtent] = {}
+
+  # returns the end positions and (min index, max index, count)
+  def visit(n: int, a: int, l: int):
+    nodedef = nodes[n]
+    start = n
+    n += 1
+    indexes: list[int] = []
+    if type(nodedef) is NodeRef:
+      return n, a, l, None
+    elif type(nodedef) is VariableDef:
+      indexes.append(nodedef.index)
+      if type(nodedef.mutable_arraydef) is MutableArrayDef:
+        indexes.append(nodedef.mutable_arraydef.index)
+        l += 1
+      elif nodedef.mutable_arraydef is None:
+        l += 1
+      return n, a, l, (min(indexes), max(indexes), len(indexes))
+    elif type(nodedef) is MutableArrayDef:
+      return n, a, l + 1, (nodedef.index, nodedef.index, 1)
+
+    assert type(nodedef) is NodeDef
+    lo = hi = nodedef.index
+    count = 0 if nodedef.index is None else 1
+    for _ in range(nodedef.num_attributes):
+      _, attr = attributes[a]
+      a += 1
+      sub_range = None
+      if type(attr) is MutableArrayAttr:
+        mutable_arraydef = nodes[n]
+        n += 1
+        if type(mutable_arraydef) is MutableArrayDef:
+          l += 1
+          sub_range = (mutable_arraydef.index, mutable_arraydef.index, 1)
+      elif type(attr) is ArrayAttr:
+        l += 1
+      elif type(attr) is NodeAttr:
+        n, a, l, sub_range = visit(n, a, l)
+      if sub_range is not None:
+        sub_lo, sub_hi, sub_count = sub_range
+        lo = sub_lo if lo is None else min(lo, sub_lo)
+        hi = sub_hi if hi is None else max(hi, sub_hi)
+        count += sub_count
+
+    if count == 0:
+      return n, a, l, None
+    assert lo is not None and hi is not None
+    if nodedef.index is not None and hi - lo + 1 == count:
+      extents[start] = SubgraphExtent(n, a, l, lo, hi)
+    return n, a, l, (lo, hi, count)
+
+  if nodes:
+    visit(0, 0, 0)
+  _SUBGRAPH_EXTENTS[graphdef] = extents
+  return extents
+
+
+class _LazyIndexMap(dict):
+  """An IndexMap that materializes pending subgraphs when one of the
+  indexes they define is requested."""
+
+  def __init__(self, lazy: LazyUnflatten):
+    super().__init__()
+    self.lazy = lazy
+
+  def __missing__(self, index: Index):
+    for subgraph in self.lazy.pending:
+      if subgraph.extent.first_index <= index <= subgraph.extent.last_index:
+        subgraph.materialize()
+        return self[index]
+    raise KeyError(index)
+
+
+class LazyUnflatten:
+  """State shared by the pending subgraphs of a lazy :func:`unflatten`."""
+
+  def __init__(
+    self,
+    graphdef: GraphDef[tp.Any],
+    leaves: tp.Sequence[tp.Any],
+    copy_variables: bool,
+  ):
+    self.graphdef = graphdef
+    self.leaves = leaves
+    self.copy_variables = copy_variables
+    self.extents = _subgraph_extents(graphdef)
+    self.index_ref = _LazyIndexMap(self)
+    self.pending: list[LazySubgraph] = []
+
+  def skip(
+    self,
+    node_iter: _SequenceIterator,
+    attribute_iter: _SequenceIterator,
+    leaves_iter: _SequenceIterator,
+  ) -> LazySubgraph | None:
+    """Skips the subgraph of the NodeDef that was just consumed from
+    ``node_iter``, returns ``None`` if the subgraph cannot be skipped."""
+    position = node_iter.position - 1
+    extent = self.extents.get(position)
+    if extent is None:
+      return None
+    subgraph = LazySubgraph(
+      self, position, attribute_iter.position, leaves_iter.position, extent
+    )
+    node_iter.position = extent.nodes_end
+    attribute_iter.position = extent.attributes_end
+    leaves_iter.position = extent.leaves_end
+    self.pending.append(subgraph)
+    return subgraph
+
+
+class LazySubgraph:
+  """A subgraph skipped by a lazy :func:`unflatten`, its node is created by
+  :meth:`materialize`."""
+
+  __slots__ = (
+    'lazy',
+    'node_position',
+    'attribute_position',
+    'leaf_position',
+    'extent',
+    'node',
+    'materialized',
+  )
+
+  def __init__(
+    self,
+    lazy: LazyUnflatten,
+    node_position: int,
+    attribute_position: int,
+    leaf_position: int,
+    extent: SubgraphExtent,
+  ):
+    self.lazy = lazy
+    self.node_position = node_position
+    self.attribute_position = attribute_position
+    self.leaf_position = leaf_position
+    self.extent = extent
+    self.node: tp.Any = None
+    self.materialized = False
+
+  def materialize(self) -> tp.Any:
+    if not self.materialized:
+      lazy = self.lazy
+      lazy.pending.remove(self)
+      nodedef = lazy.graphdef.nodes[self.node_position]
+      assert type(nodedef) is NodeDef
+      self.node = _graph_unflatten(
+        nodedef,
+        get_node_impl_for_type(nodedef.type),
+        _SequenceIterator(lazy.graphdef.nodes, self.node_position + 1),
+        _SequenceIterator(lazy.graphdef.attributes, self.attribute_position),
+        _SequenceIterator(lazy.leaves, self.leaf_position),
+        lazy.index_ref,
+        None,
+        lazy.copy_variables,
+        lazy,
+      )
+      self.materialized = True
+    return self.node
+
+
 def graph_pop(
   node: tp.Any,
   filters: tuple[filterlib.Filter, ...],
@@ -1424,7 +1926,7 @@ def _graph_update_dynamic(node: tp.Any, state: tp.Mapping[KeyT, tp.Any]):
           isinstance(value, jax.Array) or is_mutable_array(value)
         ):
           node[...] = value[...]
-        else:
+        elif value is not node.raw_value:
           node.raw_value = value
 
   if isinstance(node, Variable):
@@ -1490,6 +1992,8 @@ class StaticCache(tp.NamedTuple):
   variables: list[Variable[tp.Any]]
   new_ref_index: RefMap
   new_index_ref: IndexMap
+  # fingerprint of the root node, set if the cache comes from a flatten plan
+  fingerprint: list[tp.Hashable] | None = None
 
   @staticmethod
   def create(
@@ -1499,6 +2003,7 @@ class StaticCache(tp.NamedTuple):
     new_ref_index: RefMap,
   ):
     new_index_ref = IndexMap.from_refmap(new_ref_index)
+    graphdef = _intern_graphdef(graphdef)
     final_graphdef: GraphDef[tp.Any]
     final_graphdef = graphdef.with_same_outer_index()
     return StaticCache(
@@ -1511,6 +2016,214 @@ class StaticCache(tp.NamedTuple):
     )
 
 
+# --------------------------------------------------------
+# Flatten plan cache
+# --------------------------------------------------------
+
+
+class FlattenPlan(tp.NamedTuple):
+  """A cached flatten result for a graph node.
+
+  Plans only keep a weak reference to the root node and strong references
+  to its Variables, graph nodes are never referenced so the cache does not
+  extend their lifetime.
+  """
+
+  node_ref: weakref.ref
+  fingerprint: list[tp.Hashable] | None
+  graphdef: GraphDef[tp.Any] | None
+  final_graphdef: GraphDef[tp.Any] | None
+  paths: tuple[PathParts, ...]
+  variables: list[Variable[tp.Any]]
+  # filters -> (indices, paths) of each group, see _flatten_and_split
+  partitions: dict[
+    tuple[filterlib.Filter, ...],
+    tuple[tuple[list[int], tuple[PathParts, ...]], ...],
+  ]
+
+  def to_static_cache(self, new_ref_index: RefMap) -> StaticCache:
+    assert self.graphdef is not None and self.final_graphdef is not None
+    return StaticCache(
+      graphdef=self.graphdef,
+      final_graphdef=self.final_graphdef,
+      paths=self.paths,
+      variables=self.variables,
+      new_ref_index=new_ref_index,
+      new_index_ref=IndexMap.from_refmap(new_ref_index),
+      fingerprint=self.fingerprint,
+    )
+
+
+def _is_cacheable(graphdef: GraphDef[tp.Any]) -> bool:
+  # Array attributes are not tracked by the fingerprint and MutableArrays
+  # need to be re-wrapped on every flatten, graphs containing them are
+  # always flattened from scratch.
+  for nodedef in graphdef.nodes:
+    if type(nodedef) is MutableArrayDef or (
+      type(nodedef) is VariableDef and nodedef.mutable_arraydef is not None
+    ):
+      return False
+  for _, attr in graphdef.attributes:
+    if type(attr) is ArrayAttr or type(attr) is MutableArrayAttr:
+      return False
+  return True
+
+
+def _flatten_cached(
+  node, with_paths: bool, ref_index: RefMap
+) -> tuple[
+  FlattenPlan | None,
+  RefMap,
+  GraphDef[tp.Any],
+  FlatState[tp.Any] | list[tp.Any],
+]:
+  """Flattens ``node`` reusing its cached flatten plan if the structure did not change.
+
+  Plans are keyed by the identity of the root node and validated with
+  :func:`check_fingerprint`, if validation fails the node is flattened again
+  and the plan is replaced. On a cache hit the references found in the graph
+  are added to ``ref_index`` exactly as :func:`flatten` would have and the
+  leaves are gathered directly from the cached Variables.
+
+  Returns the plan (``None`` if the graph is not cacheable), the references
+  that were added to ``ref_index``, the graphdef and the flat state.
+  """
+  plans = GRAPH_CONTEXT.flatten_plans
+  node_id = id(node)
+  plan = plans.get(node_id)
+  new_ref_index = RefMap()
+  if plan is not None and plan.node_ref() is node:
+    if plan.fingerprint is None:
+      # structure is not cacheable, flatten from scratch
+      return None, new_ref_index, *_flatten(node, with_paths, ref_index, None)
+    try:
+      fp_matches = check_fingerprint(
+        node, plan.fingerprint, ref_index=ref_index, new_ref_index=new_ref_index
+      )
+    except ValueError:
+      # array leaves were added, the structure is no longer cacheable
+      fp_matches = False
+    if fp_matches:
+      assert plan.graphdef is not None
+      ref_index.update(new_ref_index)
+      leaves: FlatState[tp.Any] | list[tp.Any]
+      if with_paths:
+        leaves = FlatState.from_sorted_keys_values(
+          plan.paths, list(plan.variables)
+        )
+      else:
+        leaves = [variable.raw_value for variable in plan.variables]
+      return plan, new_ref_index, plan.graphdef, leaves
+    new_ref_index = RefMap()
+
+  try:
+    node_ref = weakref.ref(
+      node, functools.partial(_drop_flatten_plan, plans, node_id)
+    )
+  except TypeError:
+    # node type does not support weak references
+    return None, new_ref_index, *_flatten(node, with_paths, ref_index, None)
+
+  fp = fingerprint(node, ref_index=ref_index, new_ref_index=new_ref_index)
+  graphdef, flat_state = _flatten(node, True, ref_index, None)
+  assert isinstance(flat_state, FlatState)
+  if _is_cacheable(graphdef):
+    graphdef = _intern_graphdef(graphdef)
+    plan = FlattenPlan(
+      node_ref,
+      fp,
+      graphdef,
+      graphdef.with_same_outer_index(),
+      flat_state.paths,
+      flat_state.leaves,
+      {},
+    )
+  else:
+    plan = FlattenPlan(node_ref, None, None, None, (), [], {})
+  plans[node_id] = plan
+
+  if plan.fingerprint is None:
+    plan = None
+  if with_paths:
+    return plan, new_ref_index, graphdef, flat_state
+  else:
+    # without an outer reference index Variables keep their inner value
+    return plan, new_ref_index, graphdef, [
+      leaf.raw_value if isinstance(leaf, Variable) else leaf
+      for leaf in flat_state.leaves
+    ]
+
+
+def _flatten_and_split(
+  node,
+  filters: tuple[filterlib.Filter, ...],
+  ref_index: RefMap | None = None,
+  ref_outer_index: RefMap | None = None,
+) -> tuple[GraphDef[tp.Any], tuple[FlatState[tp.Any], ...]]:
+  """Flattens ``node`` and splits its state into ``len(filters) + 1`` groups,
+  the last group contains the elements that don't match any filter.
+
+  If ``node`` has a flatten plan and all filters are static (see
+  :func:`filterlib.is_static_predicate`) the partition is memoized in the plan
+  and reused while the structure of ``node`` does not change.
+  """
+  if ref_index is None:
+    ref_index = RefMap()
+  if ref_outer_index is not None or not _use_flatten_plan(node, ref_index):
+    graphdef, flat_state = _flatten(node, True, ref_index, ref_outer_index)
+    assert isinstance(flat_state, FlatState)
+    return graphdef, statelib._split_state(flat_state, *filters)
+
+  plan, _, graphdef, flat_state = _flatten_cached(node, True, ref_index)
+  assert isinstance(flat_state, FlatState)
+  if plan is None:
+    return graphdef, statelib._split_state(flat_state, *filters)
+  try:
+    partition = plan.partitions.get(filters)
+  except TypeError:
+    # unhashable filters
+    return graphdef, statelib._split_state(flat_state, *filters)
+
+  if partition is None:
+    predicates = filterlib.filters_to_predicates(filters)
+    indices = statelib._partition(flat_state, predicates)
+    flat_states = tuple(map(flat_state._take, indices))
+    if all(map(filterlib.is_static_predicate, predicates)):
+      plan.partitions[filters] = tuple(
+        (group_indices, group.paths)
+        for group_indices, group in zip(indices, flat_states)
+      )
+    return graphdef, flat_states
+
+  leaves = flat_state.leaves
+  return graphdef, tuple(
+    FlatState.from_sorted_keys_values(paths, [leaves[i] for i in indices])
+    for indices, paths in partition
+  )
+
+
+def _use_flatten_plan(node, ref_index: RefMap) -> bool:
+  return (
+    (config.flax_graph_flatten_cache or GRAPH_CONTEXT.use_flatten_plans)
+    and type(node) in GRAPH_REGISTRY
+    and node not in ref_index
+    and not variablelib.using_mutable_arrays()
+  )
+
+
+def _drop_flatten_plan(
+  plans: dict[int, FlattenPlan], node_id: int, node_ref: weakref.ref
+):
+  plan = plans.get(node_id)
+  if plan is not None and plan.node_ref is node_ref:
+    del plans[node_id]
+
+
+def clear_flatten_plans() -> None:
+  """Clears all cached flatten plans for the current thread."""
+  GRAPH_CONTEXT.flatten_plans.clear()
+
+
 @dataclasses.dataclass
 class GraphContext(threading.local):
   update_context_stacks: dict[tp.Hashable, list[UpdateContext]] = (
@@ -1520,11 +2233,28 @@ class GraphContext(threading.local):
   index_ref_stack: list[MergeContext] = dataclasses.field(default_factory=list)
   tmp_static_cache: tp.MutableMapping[tp.Any, StaticCache] | None = None
   caching: bool = False
+  flatten_plans: dict[int, FlattenPlan] = dataclasses.field(
+    default_factory=dict
+  )
+  # use flatten plans even if flax_graph_flatten_cache is disabled
+  use_flatten_plans: bool = False
 
 
 GRAPH_CONTEXT = GraphContext()
 
 
+@contextlib.contextmanager
+def use_flatten_plans():
+  """Enables the flatten plan cache within the context regardless of the
+  ``flax_graph_flatten_cache`` flag."""
+  prev_value = GRAPH_CONTEXT.use_flatten_plans
+  GRAPH_CONTEXT.use_flatten_plans = True
+  try:
+    yield
+  finally:
+    GRAPH_CONTEXT.use_flatten_plans = prev_value
+
+
 @contextlib.contextmanager
 def static_cache(static_cache: tp.MutableMapping[tp.Any, StaticCache]):
   if GRAPH_CONTEXT.caching:
@@ -1672,10 +2402,16 @@ class SplitContext:
     inner_ref_outer_index = (
       ctx.inner_ref_outer_index if ctx and ctx.inner_ref_outer_index else None
     )
-    graphdef, flat_state = flatten(
-      node, ref_index=self.ref_index, ref_outer_index=inner_ref_outer_index
-    )
-    flat_states = _split_state(flat_state, filters)
+    if not filters:
+      graphdef, flat_state = flatten(
+        node, ref_index=self.ref_index, ref_outer_index=inner_ref_outer_index
+      )
+      flat_states = (flat_state,)
+    else:
+      graphdef, (*flat_states, rest) = _flatten_and_split(
+        node, filters, self.ref_index, inner_ref_outer_index
+      )
+      _check_no_remainder(rest)
     states = _to_nested_state(graphdef, flat_states)
 
     return graphdef, *states
@@ -1687,6 +2423,7 @@ class SplitContext:
     /,
     *,
     with_paths: tp.Literal[False],
+    skip_unchanged: bool = False,
   ) -> tuple[GraphDef[A], list[tp.Any]]: ...
 
   @tp.overload
@@ -1723,6 +2460,7 @@ class SplitContext:
     node: A,
     *filters: filterlib.Filter,
     with_paths: bool = True,
+    skip_unchanged: bool = False,
   ) -> tuple[
     GraphDef[A],
     FlatState[tp.Any] | list[tp.Any],
@@ -1730,6 +2468,8 @@ class SplitContext:
   ]:
     if not with_paths and filters:
       raise ValueError('Cannot use filters with with_paths=False')
+    if with_paths and skip_unchanged:
+      raise ValueError('Cannot use skip_unchanged with with_paths=True')
 
     ctx = (
       current_update_context(self.ctxtag) if self.ctxtag is not None else None
@@ -1742,7 +2482,19 @@ class SplitContext:
     )
     flat_state: FlatState[tp.Any] | list[tp.Any]
     leaves: list[tp.Any]
-    if node in self.ref_index:
+    if skip_unchanged and ref_outer_index is not None:
+      # Variables with an outer reference that were not modified since the
+      # inner merge are returned as NO_UPDATE so the outer merge skips them,
+      # flatten with paths to get access to the Variables
+      graphdef, flat_state = flatten(
+        node, ref_index=self.ref_index, ref_outer_index=ref_outer_index
+      )
+      leaves = [
+        _changed_inner_value(leaf, ref_outer_index)
+        for leaf in flat_state.leaves
+      ]
+      return graphdef, leaves
+    elif node in self.ref_index:
       # node is already in the ref_index, call flatten which will return a NodeRef
       graphdef, flat_state = flatten(
         node,
@@ -1772,6 +2524,23 @@ class SplitContext:
         leaves = [
           variable.raw_value for variable in node_static_cache.variables
         ]
+    elif ref_outer_index is None and _use_flatten_plan(node, self.ref_index):
+      plan, new_ref_index, graphdef, flat_state = _flatten_cached(
+        node, with_paths, self.ref_index
+      )
+      if plan is not None and ctx is not None and self.is_inner is False:
+        # register the plan so the outer merge can update Variables in-place
+        if ctx.flatten_plans is None:
+          ctx.flatten_plans = PythonRefMap()  # type: ignore
+        ctx.flatten_plans[node] = plan.to_static_cache(new_ref_index)
+      if with_paths:
+        assert isinstance(flat_state, FlatState)
+        paths = flat_state.paths
+        leaves = flat_state.leaves
+      else:
+        assert isinstance(flat_state, list)
+        paths = None
+        leaves = flat_state
     else:
       graphdef, flat_state = flatten(
         node,
@@ -1797,6 +2566,14 @@ class SplitContext:
       return graphdef, leaves
 
 
+def _changed_inner_value(leaf, ref_outer_index: RefMap):
+  if not isinstance(leaf, Variable):
+    return leaf
+  if leaf._var_version == 0 and leaf in ref_outer_index:
+    return NO_UPDATE
+  return leaf.raw_value
+
+
 @contextlib.contextmanager
 def split_context(ctxtag: tp.Hashable | None = None):
   ctx = current_update_context(ctxtag) if ctxtag is not None else None
@@ -1889,23 +2666,7 @@ class MergeContext:
               'The graph structure of a node added to cached_partial was mutated inside the transformation, '
               f'this is not allowed.\nNode: {node}\nOuput graphdef: {graphdef}\nExpected graphdef: {static_cache_node.final_graphdef}'
             )
-          if type(state) is list:
-            leaves = state
-          elif type(state) is FlatState:
-            leaves = state.leaves
-          else:
-            raise ValueError(f'Unsupported state type: {type(state)}')
-
-          if len(leaves) != len(static_cache_node.variables):
-            raise ValueError(
-              f'Incorrect number of leaves: expected {len(static_cache_node.variables)} '
-              f'leaves in the state, got {len(leaves)}'
-            )
-          for variable, leaf in zip(static_cache_node.variables, leaves):
-            if isinstance(leaf, Variable):
-              variable.update_from_state(leaf)
-            else:
-              variable.raw_value = leaf
+          _update_variables(static_cache_node, state)
           self.index_ref.update(static_cache_node.new_index_ref)
         else:
           # uncached node, create it
@@ -1926,15 +2687,53 @@ class MergeContext:
       outer_index_outer_ref = (
         ctx.outer_index_outer_ref if ctx and ctx.outer_index_outer_ref else None
       )
-      node = unflatten(
-        graphdef,
-        state,
-        index_ref=self.index_ref,
-        outer_index_outer_ref=outer_index_outer_ref,
+      flatten_plans = (
+        ctx.flatten_plans if ctx is not None and self.is_inner is False else None
       )
+      if (
+        flatten_plans
+        and outer_index_outer_ref is not None
+        and (outer_index := graphdef.nodes[0].outer_index) is not None  # type: ignore[union-attr]
+        and outer_index in outer_index_outer_ref
+        and (node := outer_index_outer_ref[outer_index]) in flatten_plans
+        and flatten_plans[node].final_graphdef == graphdef
+      ):
+        # structure did not change, update the Variables in-place
+        flatten_plan = flatten_plans[node]
+        _update_variables(flatten_plan, state)
+        self.index_ref.update(flatten_plan.new_index_ref)
+      else:
+        node = unflatten(
+          graphdef,
+          state,
+          index_ref=self.index_ref,
+          outer_index_outer_ref=outer_index_outer_ref,
+        )
     return node
 
 
+def _update_variables(
+  static_cache: StaticCache, state: FlatState[tp.Any] | list[tp.Any]
+):
+  if type(state) is list:
+    leaves = state
+  elif type(state) is FlatState:
+    leaves = state.leaves
+  else:
+    raise ValueError(f'Unsupported state type: {type(state)}')
+
+  if len(leaves) != len(static_cache.variables):
+    raise ValueError(
+      f'Incorrect number of leaves: expected {len(static_cache.variables)} '
+      f'leaves in the state, got {len(leaves)}'
+    )
+  for variable, leaf in zip(static_cache.variables, leaves):
+    if isinstance(leaf, Variable):
+      variable.update_from_state(leaf)
+    elif type(leaf) is not NoUpdate:
+      variable.raw_value = leaf
+
+
 @tp.overload
 @contextlib.contextmanager
 def merge_context() -> tp.Generator[MergeContext, None, None]: ...  # type: ignore[bad-return-type]
@@ -1973,6 +2772,7 @@ class UpdateContext:
   outer_index_outer_ref: IndexMap | None
   inner_ref_outer_index: RefMap | None
   static_cache: tp.MutableMapping[tp.Any, StaticCache] | None
+  flatten_plans: tp.MutableMapping[tp.Any, StaticCache] | None = None
 
   # define hash and eq to make this an opaque object
   def __hash__(self):
@@ -2038,6 +2838,7 @@ class UpdateContextManager:
     del ctx.outer_index_inner_ref
     del ctx.outer_index_outer_ref
     del ctx.inner_ref_outer_index
+    del ctx.flatten_plans
 
     if not stack:
       del GRAPH_CONTEXT.update_context_stacks[self.tag]
@@ -2268,12 +3069,25 @@ def split(  # type: ignore[invalid-annotation]
     ``GraphDef`` and one or more ``States`` equal to the number of filters passed. If no
     filters are passed, a single ``State`` is returned.
   """
-  graphdef, flat_state = flatten(node)
-  flat_states = _split_state(flat_state, filters)
+  if not filters:
+    graphdef, flat_state = flatten(node)
+    states = _to_nested_state(graphdef, (flat_state,))
+    return graphdef, *states  # type: ignore[return-value]
+
+  graphdef, (*flat_states, rest) = _flatten_and_split(node, filters)
+  _check_no_remainder(rest)
   states = _to_nested_state(graphdef, flat_states)
   return graphdef, *states  # type: ignore[return-value]
 
 
+def _check_no_remainder(rest: FlatState[tp.Any]) -> None:
+  if rest:
+    raise ValueError(
+      'Non-exhaustive filters, got a non-empty remainder: '
+      f'{rest}.\nUse `...` to match all remaining elements.'
+    )
+
+
 def _to_nested_state(
   graphdef: GraphDef[A], flat_states: tp.Iterable[tp.Any]
 ) -> tuple[tp.Any, ...]:
@@ -2312,6 +3126,7 @@ def merge(  # type: ignore[invalid-annotation]
   state: tp.Any,
   /,
   *states: tp.Any,
+  lazy: bool = False,
 ) -> A:
   """The inverse of :func:`flax.nnx.split`.
 
@@ -2349,10 +3164,22 @@ def merge(  # type: ignore[invalid-annotation]
   `Functional API <https://flax.readthedocs.io/en/latest/nnx_basics.html#the-flax-functional-api>`__
   for more information.
 
+  If ``lazy=True``, submodules are only created when they are first accessed,
+  which avoids rebuilding the whole graph when only part of it is used::
+
+    >>> new_node = nnx.merge(graphdef, params, batch_stats, lazy=True)
+    >>> assert 'linear' not in vars(new_node)
+    >>> assert isinstance(new_node.linear, nnx.Linear)
+
+  The remaining submodules are materialized when the node is split, updated,
+  flattened as a pytree, copied or printed, so the result behaves as if it
+  was merged eagerly.
+
   Args:
     graphdef: A :class:`flax.nnx.GraphDef` object.
     state: A :class:`flax.nnx.State` object.
     *states: Additional :class:`flax.nnx.State` objects.
+    lazy: If True, submodules are created on first access. Defaults to False.
   Returns:
     The merged :class:`flax.nnx.Module`.
   """
@@ -2362,7 +3189,7 @@ def merge(  # type: ignore[invalid-annotation]
     _state = state
   else:
     _state = _merge_to_flat_state((state, *states))
-  node = unflatten(graphdef, _state)
+  node = unflatten(graphdef, _state, lazy=lazy)
   return node
 
 
@@ -2416,6 +3243,105 @@ def _variables_generator(node) -> tp.Iterable[tuple[PathParts, Variable]]:
       yield path, value
 
 
+def iter_variables(
+  node: tp.Any, filter: filterlib.Filter = ..., /
+) -> tp.Iterator[tuple[PathParts, Variable]]:
+  """Iterates over the :class:`Variable`'s of a graph node that match a filter.
+
+  Unlike :func:`state`, ``iter_variables`` does not build a :class:`State`,
+  the Variables are yielded as the graph is traversed which makes it
+  suitable for inspecting large models. Each Variable is yielded once, with
+  the first path it is found at.
+
+  Example::
+
+    >>> from flax import nnx
+    ...
+    >>> model = nnx.Sequential(
+    ...   nnx.Linear(2, 3, rngs=nnx.Rngs(0)),
+    ...   nnx.BatchNorm(3, rngs=nnx.Rngs(0)),
+    ... )
+    >>> for path, variable in nnx.iter_variables(model, nnx.BatchStat):
+    ...   print(path, variable.value.shape)
+    ('layers', 1, 'mean') (3,)
+    ('layers', 1, 'var') (3,)
+
+  Args:
+    node: A graph node object.
+    filter: A :class:`Variable` filter, defaults to all Variables.
+  Returns:
+    An iterator of ``(path, variable)`` pairs.
+  """
+  predicate = filterlib.to_predicate(filter)
+  seen: set[int] = set()
+  for path, variable in _variables_generator(node):
+    if id(variable) in seen:
+      continue
+    seen.add(id(variable))
+    if predicate(path, variable):
+      yield path, variable
+
+
+def variables_size_bytes(
+  node: tp.Any, filter: filterlib.Filter = ..., /
+) -> SizeBytes:
+  """Returns the total number of elements and bytes of the arrays in the
+  :class:`Variable`'s of a graph node that match a filter.
+
+  Example::
+
+    >>> from flax import nnx
+    ...
+    >>> model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    >>> size_bytes = nnx.variables_size_bytes(model, nnx.Param)
+    >>> size_bytes.size, size_bytes.bytes
+    (9, 36)
+
+  Args:
+    node: A graph node object.
+    filter: A :class:`Variable` filter, defaults to all Variables.
+  """
+  size_bytes = SizeBytes(0, 0)
+  for _, variable in iter_variables(node, filter):
+    size_bytes += SizeBytes.from_any(variable.raw_value)
+  return size_bytes
+
+
+def variables_dtypes(
+  node: tp.Any, filter: filterlib.Filter = ..., /
+) -> dict[np.dtype, SizeBytes]:
+  """Returns the number of elements and bytes of the arrays in the
+  :class:`Variable`'s of a graph node that match a filter, grouped by dtype.
+
+  Example::
+
+    >>> from flax import nnx
+    >>> import jax.numpy as jnp
+    ...
+    >>> model = nnx.Linear(2, 3, param_dtype=jnp.bfloat16, rngs=nnx.Rngs(0))
+    >>> model.count = nnx.BatchStat(jnp.array(0, jnp.int32))
+    >>> for dtype, size_bytes in nnx.variables_dtypes(model).items():
+    ...   print(dtype, size_bytes.size, size_bytes.bytes)
+    bfloat16 9 18
+    int32 1 4
+
+  Args:
+    node: A graph node object.
+    filter: A :class:`Variable` filter, defaults to all Variables.
+  """
+  histogram: dict[np.dtype, SizeBytes] = {}
+  for _, variable in iter_variables(node, filter):
+    for leaf in jax.tree.leaves(variable.raw_value):
+      if has_shape_dtype(leaf):
+        dtype = np.dtype(leaf.dtype)
+        size_bytes = SizeBytes.from_array(leaf)
+        if dtype in histogram:
+          histogram[dtype] += size_bytes
+        else:
+          histogram[dtype] = size_bytes
+  return histogram
+
+
 @tp.overload
 def state(node, /) -> GraphState: ...
 @tp.overload
@@ -2461,17 +3387,14 @@ def state(
   Returns:
     One or more :class:`State` mappings.
   """
-  _, flat_state = flatten(node)
-  state = flat_state.to_nested_state()
-
-  states: GraphState | tuple[GraphState, ...]
   if len(filters) == 0:
-    states = state  # type: ignore[assignment]
-  elif len(filters) == 1:
-    states = statelib.filter_state(state, filters[0])
-  else:
-    states = statelib.filter_state(state, filters[0], filters[1], *filters[2:])
+    _, flat_state = flatten(node)
+    return flat_state.to_nested_state()
 
+  graphdef, (*flat_states, _rest) = _flatten_and_split(node, filters)
+  states = _to_nested_state(graphdef, flat_states)
+  if len(filters) == 1:
+    return states[0]
   return states
 
 
@@ -19,6 +19,7 @@ import jax
 import jax.numpy as jnp
 from jax import lax, random
 
+from flax import jax_utils
 from flax.nnx import rnglib
 from flax.nnx.module import Module, first_from
 
@@ -64,6 +65,11 @@ class Dropout(Module):
       masked, whereas if true, no mask is applied and the inputs are returned
       as is.
     rng_collection: the rng collection name to use when requesting an rng key.
+    rng_impl: an optional PRNG implementation used to generate the dropout
+      mask, e.g. ``'rbg'`` which is considerably cheaper than the default
+      ``'threefry2x32'``. The stream forked from ``rngs`` uses this
+      implementation and keys of a different implementation passed to
+      ``__call__`` are converted to it.
     rngs: rng key.
   """
 
@@ -74,17 +80,19 @@ class Dropout(Module):
     broadcast_dims: Sequence[int] = (),
     deterministic: bool = False,
     rng_collection: str = 'dropout',
+    rng_impl: str | None = None,
     rngs: rnglib.Rngs | rnglib.RngStream | None = None,
   ):
     self.rate = rate
     self.broadcast_dims = broadcast_dims
     self.deterministic = deterministic
     self.rng_collection = rng_collection
+    self.rng_impl = rng_impl
 
     if isinstance(rngs, rnglib.Rngs):
-      self.rngs = rngs[self.rng_collection].fork()
+      self.rngs = rngs[self.rng_collection].fork(impl=rng_impl)
     elif isinstance(rngs, rnglib.RngStream):
-      self.rngs = rngs.fork()
+      self.rngs = rngs.fork(impl=rng_impl)
     elif rngs is None:
       self.rngs = None
     else:
@@ -144,6 +152,8 @@ class Dropout(Module):
       raise TypeError(
         f'rngs must be a Rngs, RngStream or jax.Array, but got {type(rngs)}.'
       )
+    if self.rng_impl is not None:
+      key = jax_utils.convert_key_impl(key, self.rng_impl)
 
     keep_prob = 1.0 - self.rate
     broadcast_shape = list(inputs.shape)
@@ -361,6 +361,9 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
       create_empty=cls._graph_node_create_empty,
       clear=cls._graph_node_clear,
       init=cls._graph_node_init,  # type: ignore
+      init_lazy=cls._graph_node_init_lazy  # type: ignore
+      if _supports_lazy_attributes(cls)
+      else None,
     )
 
     cls._object__is_pytree = pytree
@@ -393,10 +396,49 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
     def __setattr__(self, name: str, value: Any) -> None:
       self._setattr(name, value)
 
+    def __delattr__(self, name: str) -> None:
+      if not self._object__drop_lazy(name):
+        object.__delattr__(self, name)
+
+    def __getattr__(self, name: str) -> Any:
+      # only called when the regular lookup fails
+      lazy_attributes = vars(self).get('_object__lazy')
+      if lazy_attributes is None or name not in lazy_attributes:
+        # repeat the lookup to raise the original error, e.g. one raised
+        # inside a property
+        return object.__getattribute__(self, name)
+      subgraph = lazy_attributes.pop(name)
+      if not lazy_attributes:
+        self._object__clear_lazy()
+      value = subgraph.materialize()
+      vars(self)[name] = value
+      return value
+
+  def _object__drop_lazy(self, name: str) -> bool:
+    lazy_attributes = vars(self).get('_object__lazy')
+    if lazy_attributes is None or name not in lazy_attributes:
+      return False
+    del lazy_attributes[name]
+    if not lazy_attributes:
+      self._object__clear_lazy()
+    return True
+
+  def _object__clear_lazy(self) -> dict[str, graph.LazySubgraph]:
+    """Removes and returns the pending submodules."""
+    return vars(self).pop('_object__lazy', {})
+
+  def _object__materialize(self) -> None:
+    """Creates all submodules left pending by a lazy `nnx.merge`."""
+    if '_object__lazy' in vars(self):
+      lazy_attributes = self._object__clear_lazy()
+      for name, subgraph in lazy_attributes.items():
+        vars(self)[name] = subgraph.materialize()
+
   def _setattr(self, name: str, value: tp.Any) -> None:
     self._check_valid_context(
       lambda: f"Cannot mutate '{type(self).__name__}' from different trace level"
     )
+    self._object__drop_lazy(name)
     if type(value) is DataAttr:
       value = value.value
       if name not in self._object__nodes:
@@ -459,6 +501,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
       yield reprlib.Object(type=type(self), comment=stats_repr)
       OBJECT_CONTEXT.seen_modules_repr.add(id(self))
 
+      self._object__materialize()
       for name, value in vars(self).items():
         if name.startswith('_'):
           continue
@@ -514,6 +557,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
       else:
         first_line_annotation = None
       children = {}
+      self._object__materialize()
       for name, value in vars(self).items():
         if name.startswith('_'):
           continue
@@ -539,6 +583,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
 
   # pickle support
   def __getstate__(self):
+    self._object__materialize()
     return vars(self).copy()
 
   def __setstate__(self, state):
@@ -548,6 +593,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
   # Pytree Definition
   # -------------------------
   def _object__flatten_with_paths(self):
+    self._object__materialize()
     obj_vars = vars(self)
     type_nodes = self._object__nodes
     node_names: list[str] = []
@@ -563,6 +609,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
     return node_attrs, (tuple(node_names), tuple(static_attrs))
 
   def _object__flatten(self):
+    self._object__materialize()
     obj_vars = vars(self)
     type_nodes = self._object__nodes
     node_names: list[str] = []
@@ -594,6 +641,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
   # Graph Definition
   # -------------------------
   def _graph_node_flatten(self):
+    self._object__materialize()
     nodes = vars(self).copy()
     nodes = sorted(nodes.items())
     return nodes, type(self)
@@ -613,6 +661,7 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
   def _graph_node_pop_key(self, key: str):
     if not isinstance(key, str):
       raise KeyError(f'Invalid key: {key!r}')
+    self._object__materialize()
     return vars(self).pop(key)
 
   @staticmethod
@@ -621,7 +670,34 @@ class Object(reprlib.Representable, metaclass=ObjectMeta):
     return node
 
   def _graph_node_clear(self):
+    self._object__clear_lazy()
     vars(self).clear()
 
   def _graph_node_init(self, attributes: tp.Iterable[tuple[str, tp.Any]]):
     vars(self).update(attributes)
+
+  def _graph_node_init_lazy(
+    self, lazy_attributes: dict[str, graph.LazySubgraph]
+  ):
+    vars(self)['_object__lazy'] = lazy_attributes
+
+
+# methods that access the attributes through `vars`, if a subclass overrides
+# any of them its submodules are always created eagerly
+_LAZY_ATTRIBUTE_HOOKS = (
+  '__getattr__',
+  '__getattribute__',
+  '__getstate__',
+  '_object__flatten',
+  '_object__flatten_with_paths',
+  '_graph_node_flatten',
+  '_graph_node_pop_key',
+  '_graph_node_init',
+)
+
+
+def _supports_lazy_attributes(cls: type[Object]) -> bool:
+  return all(
+    getattr(cls, name, None) is getattr(Object, name, None)
+    for name in _LAZY_ATTRIBUTE_HOOKS
+  )
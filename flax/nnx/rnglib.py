@@ -18,8 +18,9 @@ import typing as tp
 
 import jax
 import jax.numpy as jnp
+import numpy as np
 
-from flax import errors, struct
+from flax import errors, jax_utils, struct
 from flax.nnx import graph
 from flax.nnx import statelib
 from flax.nnx import variablelib
@@ -49,6 +50,17 @@ class RngKey(RngState): ...
 NotKey = filterlib.All(RngState, filterlib.Not(RngKey))
 
 
+@jax.jit
+def _fold_in(key: jax.Array, count: jax.Array) -> jax.Array:
+  return jax.random.fold_in(key, count)
+
+
+@functools.partial(jax.jit, static_argnums=2)
+def _fold_in_range(key: jax.Array, start: jax.Array, n: int) -> jax.Array:
+  counts = start + jnp.arange(n, dtype=jnp.uint32)
+  return jax.vmap(jax.random.fold_in, in_axes=(None, 0))(key, counts)
+
+
 class RngStream(Object):
 
   def __init__(
@@ -56,35 +68,117 @@ class RngStream(Object):
     key: jax.Array | int,
     *,
     tag: str,
+    host_counter: bool = False,
+    impl: str | None = None,
   ):
     if isinstance(key, int):
-      key = jax.random.key(key)
+      key = jax.random.key(key, impl=impl)
     elif isinstance(key, jax.Array) and key.dtype == jnp.uint32:
       key = jax.random.wrap_key_data(key)
 
     if not isinstance(key, jax.Array) or not jnp.issubdtype(key.dtype, jax.dtypes.prng_key):
       raise ValueError(f'Invalid rng value: {key}, expected a '
                        f'jax.Array of jax.dtypes.prng_key sub-dtype')
+    if impl is not None:
+      key = jax_utils.convert_key_impl(key, impl)
 
-    count = jnp.zeros(key.shape, dtype=jnp.uint32)
+    count: jax.Array | np.ndarray
+    if host_counter:
+      count = np.zeros(key.shape, dtype=np.uint32)
+    else:
+      count = jnp.zeros(key.shape, dtype=jnp.uint32)
     self.tag = tag
+    self.host_counter = host_counter
     self.key = RngKey(key, tag=tag)
     self.count = RngCount(count, tag=tag)
 
+  def _host_count(self) -> np.ndarray | None:
+    """Returns the counter as a numpy array if it can be updated on the host,
+    i.e. ``host_counter=True`` and the stream is not being traced."""
+    if not self.host_counter:
+      return None
+    count = self.count.raw_value
+    if isinstance(count, np.ndarray):
+      return count
+    if isinstance(count, jax.Array) and not isinstance(count, jax.core.Tracer):
+      # the counter was updated by a transform, move it back to the host
+      return np.asarray(count)
+    return None
+
   def __call__(self) -> jax.Array:
     if not self.count.mutable and not self.count._trace_state.is_valid():
       raise errors.TraceContextError(
         f'Cannot mutate {type(self).__name__} from a different trace level'
       )
+    count = self._host_count()
+    if count is not None and not isinstance(
+      self.key.raw_value, jax.core.Tracer
+    ):
+      key = _fold_in(self.key[...], count)
+      self.count.raw_value = np.asarray(count + 1, dtype=np.uint32)
+      return key
     key = jax.random.fold_in(self.key[...], self.count[...])
     self.count[...] += 1
     return key
 
-  def fork(self, *, split: int | tuple[int, ...] | None = None):
+  def take(self, n: int, /) -> jax.Array:
+    """Returns the next ``n`` keys of the stream stacked along a new leading
+    axis, computed with a single vectorized ``fold_in``.
+
+    The keys are the same as the ones returned by calling the stream ``n``
+    times::
+
+      >>> from flax import nnx
+      ...
+      >>> keys = nnx.Rngs(0).params.take(3)
+      >>> rngs = nnx.Rngs(0)
+      >>> all(keys[i] == rngs.params() for i in range(3))
+      True
+    """
+    if not self.count.mutable and not self.count._trace_state.is_valid():
+      raise errors.TraceContextError(
+        f'Cannot mutate {type(self).__name__} from a different trace level'
+      )
+    count = self._host_count()
+    if count is not None:
+      keys = _fold_in_range(self.key[...], count, n)
+      self.count.raw_value = np.asarray(count + n, dtype=np.uint32)
+      return keys
+    keys = _fold_in_range(self.key[...], self.count[...], n)
+    self.count[...] += n
+    return keys
+
+  @property
+  def impl(self) -> str:
+    """The name of the PRNG implementation of the stream's key."""
+    key = self.key.value
+    if isinstance(key, jax.ShapeDtypeStruct):
+      # jax.random.key_impl does not accept abstract keys (e.g. from
+      # nnx.eval_shape), read the implementation of a traced key instead
+      impls: list[tp.Any] = []
+      jax.eval_shape(lambda key: impls.append(jax.random.key_impl(key)), key)
+      return str(impls[0])
+    return str(jax.random.key_impl(key))
+
+  def fork(
+    self,
+    *,
+    split: int | tuple[int, ...] | None = None,
+    impl: str | None = None,
+  ):
+    """Returns a new ``RngStream`` seeded with the next key of this stream.
+
+    Args:
+      split: optional shape the new key is split into.
+      impl: optional PRNG implementation of the new stream, by default it uses
+        the same implementation as this stream.
+    """
     key = self()
     if split is not None:
       key = jax.random.split(key, split)
-    return type(self)(key, tag=self.tag)
+    return type(self)(
+      key, tag=self.tag, host_counter=self.host_counter, impl=impl
+    )
 
 
 RngValue = tp.Union[int, jax.Array]
@@ -136,6 +230,29 @@ class Rngs(Object):
     >>> key3 = rngs.params()        # uses 'params'
     >>> key4 = rngs.dropout()       # uses 'default'
     >>> key5 = rngs.unkown_stream() # uses 'default'
+
+  By default the counters are stored as JAX arrays, so each key requested
+  outside of a transform dispatches a ``fold_in`` and an increment. With
+  ``host_counter=True`` the counters are numpy arrays that are incremented on
+  the host, which makes eager code that requests many keys (e.g. initializing
+  a large model) considerably faster. Inside transforms both modes behave the
+  same way. Keys for several calls can be requested at once with ``take``::
+
+    >>> rngs = nnx.Rngs(0, host_counter=True)
+    >>> keys = rngs.take(4)
+    >>> keys.shape
+    (4,)
+
+  Each stream can use a different PRNG implementation via ``impl``, e.g. the
+  cheaper ``'rbg'`` generator for dropout masks while keeping the default
+  ``'threefry2x32'`` for reproducible initialization. The implementation is
+  preserved by ``fork``, :func:`split_rngs` and :func:`reseed`::
+
+    >>> rngs = nnx.Rngs(params=0, dropout=1, impl={'dropout': 'rbg'})
+    >>> rngs.params.impl, rngs.dropout.impl
+    ('threefry2x32', 'rbg')
+    >>> rngs.fork().dropout.impl
+    'rbg'
   """
 
   def __init__(
@@ -144,13 +261,28 @@ class Rngs(Object):
     | RngStream
     | tp.Mapping[str, RngValue | RngStream]
     | None = None,
+    *,
+    host_counter: bool = False,
+    impl: str | tp.Mapping[str, str] | None = None,
     **rngs: RngValue | RngStream,
   ):
     """
     Args:
       default: the starting seed for the ``default`` stream, defaults to None.
+      host_counter: if True, the counters of the streams are numpy arrays
+        updated on the host when keys are requested outside of transforms.
+        Streams passed as ``RngStream`` keep their own mode if it was
+        ``host_counter=True``. Defaults to False.
+      impl: the PRNG implementation used for all streams, or a mapping from
+        stream names to implementations, e.g. ``{'dropout': 'rbg'}``. Integer
+        seeds are turned into keys of the given implementation and keys of a
+        different implementation are converted with
+        :func:`flax.jax_utils.convert_key_impl`. Streams not listed keep the
+        implementation of their key, or JAX's default for integer seeds.
       **rngs: keyword arguments specifying the starting seed for each stream.
-        The key can be an integer or a ``jax.random.key``.
+        The key can be an integer or a ``jax.random.key``. ``host_counter``
+        and ``impl`` are reserved, streams with these names can be passed in
+        a ``default`` mapping, e.g. ``nnx.Rngs({'impl': 0})``.
     """
     if default is not None:
       if isinstance(default, tp.Mapping):
@@ -158,12 +290,27 @@ class Rngs(Object):
       else:
         rngs['default'] = default
 
+    if isinstance(impl, tp.Mapping) and not impl.keys() <= rngs.keys():
+      raise ValueError(
+        f'impl names streams that do not exist: '
+        f'{sorted(impl.keys() - rngs.keys())}, the streams are '
+        f'{sorted(rngs)}'
+      )
+
     for tag, key in rngs.items():
+      stream_host_counter = host_counter
       if isinstance(key, RngStream):
+        stream_host_counter = host_counter or key.host_counter
         key = key.key.value
+      if isinstance(impl, tp.Mapping):
+        stream_impl = impl.get(tag)
+      else:
+        stream_impl = impl
       stream = RngStream(
         key=key,
         tag=tag,
+        host_counter=stream_host_counter,
+        impl=stream_impl,
       )
       setattr(self, tag, stream)
 
@@ -187,6 +334,11 @@ class Rngs(Object):
   def __call__(self):
     return self.default()
 
+  def take(self, n: int, /) -> jax.Array:
+    """Returns the next ``n`` keys of the ``default`` stream, see
+    :meth:`RngStream.take`."""
+    return self.default.take(n)
+
   def __iter__(self) -> tp.Iterator[str]:
     for name, stream in vars(self).items():
       if isinstance(stream, RngStream):
@@ -538,7 +690,9 @@ def reseed(
       of the form ``(path, scalar_key, target_shape) -> new_key`` can be passed to
       define a custom reseeding policy.
     **stream_keys: a mapping of stream names to new keys. The keys can be
-      either integers or ``jax.random.key``.
+      either integers or ``jax.random.key``. Each stream keeps its PRNG
+      implementation, integer seeds are turned into keys of that
+      implementation and keys of a different one are converted.
 
   Example::
 
@@ -573,11 +727,14 @@ def reseed(
       f'policy must be "scalars_only", "match_shape" or a callable, '
       f'got {policy!r}'
     )
-  rngs = Rngs(**stream_keys)
+  rngs_by_impl: dict[str, Rngs] = {}
   for path, stream in graph.iter_graph(node):
     if isinstance(stream, RngStream):
       if stream.key.tag in stream_keys:
-        key = rngs[stream.key.tag]()
+        impl = stream.impl
+        if impl not in rngs_by_impl:
+          rngs_by_impl[impl] = Rngs(impl=impl, **stream_keys)
+        key = rngs_by_impl[impl][stream.key.tag]()
         key = policy(path, key, stream.key.shape)
         stream.key[...] = key
         stream.count[...] = jnp.zeros(key.shape, dtype=jnp.uint32)
@@ -57,10 +57,16 @@ class NestedStateRepr(reprlib.Representable):
     return subtree_renderer(children, path=path)
 
 class FlatState(tp.Sequence[tuple[PathParts, V]], reprlib.Representable):
-  __slots__ = ('_keys', '_values')
+  __slots__ = ('_keys', '_values', '_table', '_indices')
 
-  _keys: tuple[PathParts, ...]
+  # FlatStates created by ``_take`` (e.g. the groups of ``split``) are index
+  # views: instead of their own paths they hold the paths of the parent as a
+  # shared ``_table`` and the positions of their elements in ``_indices``,
+  # ``_keys`` is only built if the paths are requested.
+  _keys: tuple[PathParts, ...] | None
   _values: list[V]
+  _table: tuple[PathParts, ...] | None
+  _indices: tp.Sequence[int] | None
 
   def __init__(self, items: tp.Iterable[tuple[PathParts, V]], /, *, sort: bool):
     keys, values = [], []
@@ -71,6 +77,7 @@ class FlatState(tp.Sequence[tuple[PathParts, V]], reprlib.Representable):
       values.append(value)
     self._keys = tuple(keys)
     self._values = values
+    self._table = self._indices = None
 
   @staticmethod
   def from_sorted_keys_values(
@@ -79,10 +86,27 @@ class FlatState(tp.Sequence[tuple[PathParts, V]], reprlib.Representable):
     flat_state = object.__new__(FlatState)
     flat_state._keys = keys
     flat_state._values = values
+    flat_state._table = flat_state._indices = None
+    return flat_state
+
+  @staticmethod
+  def _from_table(
+    table: tuple[PathParts, ...], indices: tp.Sequence[int], values: list[V], /
+  ) -> FlatState[V]:
+    flat_state = object.__new__(FlatState)
+    flat_state._keys = None
+    flat_state._values = values
+    flat_state._table = table
+    flat_state._indices = indices
     return flat_state
 
   @property
   def paths(self) -> tp.Tuple[PathParts, ...]:
+    if self._keys is None:
+      table, indices = self._table, self._indices
+      assert table is not None and indices is not None
+      self._keys = tuple([table[i] for i in indices])
+      self._table = self._indices = None
     return self._keys
 
   @property
@@ -102,16 +126,50 @@ class FlatState(tp.Sequence[tuple[PathParts, V]], reprlib.Representable):
   def __getitem__(
     self, index: int | slice
   ) -> tuple[PathParts, V] | FlatState[V]:
+    if self._keys is None:
+      table, indices = self._table, self._indices
+      assert table is not None and indices is not None
+      if isinstance(index, int):
+        return table[indices[index]], self._values[index]
+      return FlatState._from_table(
+        table, indices[index], self._values[index]
+      )
     if isinstance(index, int):
       return self._keys[index], self._values[index]
-    return FlatState(zip(self._keys[index], self._values[index]), sort=False)
+    return FlatState.from_sorted_keys_values(
+      self._keys[index], self._values[index]
+    )
 
   def __len__(self) -> int:
-    return len(self._keys)
+    return len(self._values)
 
   def __iter__(self) -> tp.Iterator[tuple[PathParts, V]]:
+    if self._keys is None:
+      table, indices = self._table, self._indices
+      assert table is not None and indices is not None
+      return iter(zip(map(table.__getitem__, indices), self._values))
     return iter(zip(self._keys, self._values))
 
+  def _take(self, indices: list[int], /) -> FlatState[V]:
+    """Returns a FlatState with the elements at ``indices``.
+
+    The result gets its own list of leaves, its paths are looked up in the
+    paths of ``self`` and only copied if they are requested. ``indices`` must
+    not be modified afterwards.
+    """
+    values = self._values
+    if len(indices) == len(values):
+      # the paths are immutable and can be shared
+      return FlatState.from_sorted_keys_values(self.paths, list(values))
+    leaves = [values[i] for i in indices]
+    if self._keys is None:
+      table, parent_indices = self._table, self._indices
+      assert table is not None and parent_indices is not None
+      indices = [parent_indices[i] for i in indices]
+    else:
+      table = self._keys
+    return FlatState._from_table(table, indices, leaves)
+
   def to_nested_state(self) -> State[Key, V]:
     return from_flat_state(self)
 
@@ -199,16 +257,13 @@ class FlatState(tp.Sequence[tuple[PathParts, V]], reprlib.Representable):
 
 
 def _flat_state_pytree_flatten(x: FlatState[V]):
-  return x._values, x._keys
+  return x._values, x.paths
 
 
 def _flat_state_pytree_unflatten(
   keys: tuple[PathParts, ...], values: list[V]
 ) -> FlatState[V]:
-  flat_state = object.__new__(FlatState)
-  flat_state._keys = keys
-  flat_state._values = values
-  return flat_state
+  return FlatState.from_sorted_keys_values(keys, values)
 
 
 jax.tree_util.register_pytree_node(
@@ -715,32 +770,48 @@ def _split_state(
   flat_state: FlatState[V],
   *filters: filterlib.Filter,
 ) -> tuple[FlatState[V], ...]:
-  for i, filter_ in enumerate(filters):
-    if filter_ in (..., True) and i != len(filters) - 1:
-      remaining_filters = filters[i + 1 :]
-      if not all(f in (..., True) for f in remaining_filters):
-        raise ValueError(
-          '`...` or `True` can only be used as the last filters, '
-          f'got {filter_} it at index {i}.'
-        )
-  predicates = tuple(map(filterlib.to_predicate, filters))
+  predicates = filterlib.filters_to_predicates(filters)
+  indices = _partition(flat_state, predicates)
+  return tuple(flat_state._take(state_indices) for state_indices in indices)
+
 
-  # we have n + 1 states, where n is the number of predicates
-  # the last state is for values that don't match any predicate
-  flat_states: tuple[list[tuple[PathParts, V]], ...] = tuple(
+def _partition(
+  flat_state: FlatState[tp.Any],
+  predicates: tuple[filterlib.Predicate, ...],
+) -> tuple[list[int], ...]:
+  """Returns the indices of the elements matched by each predicate.
+
+  Each element is assigned to the first predicate that matches it, the last
+  group contains the indices of the elements that don't match any predicate.
+  """
+  # we have n + 1 groups, where n is the number of predicates
+  # the last group is for values that don't match any predicate
+  indices: tuple[list[int], ...] = tuple(
     [] for _ in range(len(predicates) + 1)
   )
 
-  for path, value in flat_state:
-    for i, predicate in enumerate(predicates):
-      if predicate(path, value):
-        flat_states[i].append((path, value))  # type: ignore[index] # mypy is wrong here?
-        break
-    else:
-      # if we didn't break, set leaf to last state
-      flat_states[-1].append((path, value))  # type: ignore[index] # mypy is wrong here?
+  if all(map(filterlib.is_type_predicate, predicates)):
+    # evaluate the predicates once per type
+    type_group: dict[type, int] = {}
+    for index, (path, value) in enumerate(flat_state):
+      group = type_group.get(type(value))
+      if group is None:
+        group = type_group[type(value)] = _first_match(predicates, path, value)
+      indices[group].append(index)
+  else:
+    for index, (path, value) in enumerate(flat_state):
+      indices[_first_match(predicates, path, value)].append(index)
+
+  return indices
+
 
-  return tuple(FlatState(flat_state, sort=False) for flat_state in flat_states)
+def _first_match(
+  predicates: tuple[filterlib.Predicate, ...], path: PathParts, value: tp.Any
+) -> int:
+  for i, predicate in enumerate(predicates):
+    if predicate(path, value):
+      return i
+  return len(predicates)
 
 
 def create_path_filters(state: State):
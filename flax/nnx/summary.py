@@ -336,7 +336,7 @@ def tabulate(
     nnx.RngState  # type: ignore[misc]
     if isinstance(leaf, nnx.RngState)
     else type(leaf)
-    for _, leaf in nnx.to_flat_state(nnx.state(obj))
+    for _, leaf in nnx.iter_variables(obj)
   }
   variable_types: list[type] = sorted(_variable_types, key=lambda t: t.__name__)
 
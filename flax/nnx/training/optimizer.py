@@ -13,17 +13,22 @@
 # limitations under the License.
 from __future__ import annotations
 
+import dataclasses
 import functools
 import typing as tp
 
 import jax
 import jax.numpy as jnp
+import numpy as np
 import optax
+from jax.interpreters import pxla
+from jax.sharding import NamedSharding, PartitionSpec
 
 from flax import nnx
 from flax.nnx import filterlib
 from flax.nnx.object import Object
 from flax.nnx.variablelib import Variable
+from flax.typing import PathParts
 
 M = tp.TypeVar('M', bound=nnx.Module)
 F = tp.TypeVar('F', bound=tp.Callable[..., tp.Any])
@@ -65,6 +70,150 @@ def to_opt_state(tree):
   )
   return tree
 
+@dataclasses.dataclass(frozen=True)
+class _FusedLayout:
+  """Static layout of the flat buffers used by ``Optimizer(fused=True)``.
+
+  ``paths`` are the sorted paths of the optimized Variables, ``groups`` maps
+  each dtype name to the indices (into ``paths``) of the Variables packed
+  into its buffer and ``unfused`` are the indices of the Variables that are
+  kept as separate leaves because they are sharded.
+  """
+
+  paths: tuple[PathParts, ...]
+  groups: tuple[tuple[str, tuple[int, ...]], ...]
+  unfused: tuple[int, ...]
+
+
+def _is_sharded(variable: Variable) -> bool:
+  sharding = variable.get_metadata().get('sharding')
+  if sharding and any(axis is not None for axis in sharding):
+    return True
+  value = variable.raw_value
+  return (
+    isinstance(value, jax.Array)
+    and not isinstance(value, jax.core.Tracer)
+    and not value.sharding.is_fully_replicated
+  )
+
+
+def _fused_layout(
+  paths: tp.Sequence[PathParts], variables: tp.Sequence[Variable]
+) -> _FusedLayout:
+  groups: dict[str, list[int]] = {}
+  unfused: list[int] = []
+  for i, variable in enumerate(variables):
+    if _is_sharded(variable):
+      unfused.append(i)
+    else:
+      groups.setdefault(jnp.dtype(variable.dtype).name, []).append(i)
+  return _FusedLayout(
+    paths=tuple(paths),
+    groups=tuple((dtype, tuple(idxs)) for dtype, idxs in groups.items()),
+    unfused=tuple(unfused),
+  )
+
+
+def _fuse(layout: _FusedLayout, leaves: tp.Sequence[tp.Any]):
+  """Packs ``leaves`` into ``(buffers, unfused)`` where ``buffers`` maps each
+  dtype name to a 1D array with the concatenated raveled leaves."""
+  buffers = {
+    dtype: jnp.concatenate([jnp.ravel(leaves[i]) for i in idxs])
+    for dtype, idxs in layout.groups
+  }
+  return buffers, tuple(leaves[i] for i in layout.unfused)
+
+
+def _unfuse(
+  layout: _FusedLayout,
+  fused: tuple[dict[str, jax.Array], tuple[jax.Array, ...]],
+  shapes: tp.Sequence[tuple[int, ...]],
+) -> list[jax.Array]:
+  """Inverse of ``_fuse``, returns the leaves in the order of ``paths``."""
+  buffers, unfused = fused
+  leaves: list[tp.Any] = [None] * len(layout.paths)
+  for dtype, idxs in layout.groups:
+    sizes = [int(np.prod(shapes[i])) for i in idxs]
+    chunks = jnp.split(buffers[dtype], np.cumsum(sizes)[:-1])
+    for i, chunk in zip(idxs, chunks):
+      leaves[i] = chunk.reshape(shapes[i])
+  for i, leaf in zip(layout.unfused, unfused):
+    leaves[i] = leaf
+  return leaves
+
+
+def _zero_sharding(
+  sharding: tuple[tp.Any, ...] | None,
+  shape: tuple[int, ...],
+  axis: str,
+  axis_size: int,
+) -> tuple[tp.Any, ...] | None:
+  """Adds ``axis`` to the first unsharded dimension of ``shape`` that is
+  divisible by ``axis_size``, returns ``sharding`` unchanged if there is none
+  or if ``axis`` is already used."""
+  spec = list(sharding or ())
+  spec += [None] * (len(shape) - len(spec))
+  used = {
+    name
+    for names in spec
+    if names is not None
+    for name in (names if isinstance(names, tuple) else (names,))
+  }
+  if axis in used:
+    return sharding
+  for i, (dim, names) in enumerate(zip(shape, spec)):
+    if names is None and dim % axis_size == 0:
+      spec[i] = axis
+      return tuple(spec)
+  return sharding
+
+
+def _resolve_mesh(
+  mesh: jax.sharding.Mesh | jax.sharding.AbstractMesh | None,
+  axis: str,
+  variables: tp.Iterable[Variable],
+) -> jax.sharding.Mesh | jax.sharding.AbstractMesh:
+  """Returns ``mesh``, else the ``mesh`` metadata of the first Variable that
+  has one, else the mesh of the current context."""
+  if mesh is None:
+    for variable in variables:
+      if (mesh := variable.get_metadata().get('mesh')) is not None:
+        break
+  if mesh is None:
+    abstract_mesh = jax.sharding.get_abstract_mesh()
+    if not abstract_mesh.empty:
+      mesh = abstract_mesh
+  if mesh is None:
+    physical_mesh = pxla.thread_resources.env.physical_mesh
+    if not physical_mesh.empty:
+      mesh = physical_mesh
+  if mesh is None:
+    raise ValueError(
+      f'Cannot shard the optimizer state over axis {axis!r}, no mesh was '
+      'found. Pass `mesh` to the Optimizer, add `mesh` metadata to the '
+      'Variables or create the Optimizer inside a mesh context.'
+    )
+  if axis not in mesh.shape:
+    raise ValueError(
+      f'Axis {axis!r} not found in the mesh, available axes: '
+      f'{tuple(mesh.shape)}'
+    )
+  return mesh
+
+
+def _partition_spec(variable: Variable) -> PartitionSpec:
+  return nnx.get_partition_spec(variable).value
+
+
+def _constrain(tree, specs, mesh):
+  def _constrain_leaf(x, spec: PartitionSpec):
+    if isinstance(mesh, jax.sharding.Mesh):
+      return jax.lax.with_sharding_constraint(x, NamedSharding(mesh, spec))
+    return jax.lax.with_sharding_constraint(x, spec)
+
+  return jax.tree.map(_constrain_leaf, tree, specs)
+
+
 class _Missing:
   pass
 
@@ -123,6 +272,28 @@ class Optimizer(Object, tp.Generic[M]):
     >>> loss_fn(model)
     Array(2.310461, dtype=float32)
 
+  With ``fused=True`` the parameters, gradients and optimizer state are packed
+  into one contiguous buffer per dtype so ``tx`` runs a handful of large
+  elementwise operations instead of a few per parameter, which is much
+  cheaper for models with many small parameters::
+
+    >>> model = Model(nnx.Rngs(0))
+    >>> optimizer = nnx.Optimizer(model, tx, wrt=nnx.Param, fused=True)
+    >>> jax.tree.map(jnp.shape, nnx.pure(optimizer.opt_state[0].mu))
+    ({'float32': (25,)}, ())
+    >>> optimizer.update(model, nnx.grad(loss_fn)(model))
+    >>> loss_fn(model)
+    Array(2.310461, dtype=float32)
+
+  With ``opt_state_axis`` the optimizer state is partitioned over a mesh axis
+  (ZeRO stage 1): every ``OptVariable`` gets the axis added to the ``sharding``
+  metadata of its first unsharded dimension that is divisible by the axis
+  size. During ``update`` the gradients are constrained to that sharding
+  (a reduce-scatter under data parallelism), the update is computed on the
+  local shards and the new parameters are constrained back to their own
+  sharding (an all-gather). With ``N`` devices on the axis each device holds
+  ``1/N`` of the optimizer state, e.g. the Adam moments.
+
   Attributes:
     step: An ``OptState`` :class:`Variable` that tracks the step count.
     tx: An Optax gradient transformation.
@@ -136,6 +307,9 @@ class Optimizer(Object, tp.Generic[M]):
     tx: optax.GradientTransformation,
     *,
     wrt: filterlib.Filter,  # type: ignore
+    fused: bool = False,
+    opt_state_axis: str | None = None,
+    mesh: jax.sharding.Mesh | jax.sharding.AbstractMesh | None = None,
   ):
     """
     Instantiate the class and wrap the :class:`Module` and Optax gradient
@@ -151,6 +325,22 @@ class Optimizer(Object, tp.Generic[M]):
         ``wrt``  argument passed to the ``nnx.grad`` call that will generate the
         gradients that will be passed into the ``grads`` argument of the
         :func:`update` method.
+      fused: if True, the parameters, gradients and optimizer state are
+        packed into one flat buffer per dtype before calling ``tx``. Variables
+        with a sharding annotation or a non replicated sharding are kept as
+        separate leaves. This is only correct for transformations that treat
+        all leaves the same way (e.g. ``sgd``, ``adam``, ``adamw`` without a
+        mask, ``clip_by_global_norm``), transformations that depend on the
+        structure or the shape of the parameters (e.g. ``adafactor``,
+        ``lamb``, ``multi_transform``) should not be fused.
+      opt_state_axis: optional name of a mesh axis, e.g. ``'data'``, over
+        which the optimizer state is partitioned. Not supported together with
+        ``fused=True``.
+      mesh: the mesh used with ``opt_state_axis``. Defaults to the ``mesh``
+        metadata of the Variables or the mesh of the current context
+        (``with mesh:`` or ``jax.sharding.use_mesh``). If the mesh comes from
+        ``jax.sharding.use_mesh``, ``update`` must be called under the same
+        context.
     """
     if isinstance(wrt, _Missing):
       raise TypeError(
@@ -158,12 +348,72 @@ class Optimizer(Object, tp.Generic[M]):
         'if you want to keep the previous use nnx.ModelAndOptimizer instead of nnx.Optimizer.'
       )
       wrt = nnx.Param
+    if fused and opt_state_axis is not None:
+      raise ValueError(
+        '`opt_state_axis` is not supported together with `fused=True`.'
+      )
     self.step = OptState(jnp.array(0, dtype=jnp.uint32))
     self.tx = tx
-    self.opt_state = nnx.data(
-      to_opt_state(tx.init(nnx.state(model, wrt)))
-    )
+    self.opt_state_axis = opt_state_axis
+    self.mesh = mesh
+    self.fused_layout: _FusedLayout | None
+    if fused:
+      flat_params = nnx.to_flat_state(nnx.state(model, wrt))
+      paths, variables = flat_params.paths, flat_params.leaves
+      self.fused_layout = _fused_layout(paths, variables)
+      buffers, unfused = _fuse(
+        self.fused_layout, [variable[...] for variable in variables]
+      )
+      # unfused leaves are passed as Variables to keep their metadata
+      unfused = tuple(variables[i] for i in self.fused_layout.unfused)
+      params = (buffers, unfused)
+    else:
+      self.fused_layout = None
+      params = nnx.state(model, wrt)
+    self.opt_state = nnx.data(to_opt_state(tx.init(params)))
     self.wrt = wrt
+    if opt_state_axis is not None:
+      self._shard_opt_state(opt_state_axis)
+
+  def _shard_opt_state(self, axis: str):
+    opt_variables = [
+      x
+      for x in jax.tree.leaves(
+        self.opt_state, is_leaf=lambda x: isinstance(x, Variable)
+      )
+      if isinstance(x, OptVariable)
+    ]
+    self.mesh = _resolve_mesh(self.mesh, axis, opt_variables)
+    axis_size = self.mesh.shape[axis]
+    for variable in opt_variables:
+      sharding = variable.get_metadata().get('sharding')
+      zero_sharding = _zero_sharding(sharding, variable.shape, axis, axis_size)
+      if zero_sharding != sharding:
+        variable.sharding = zero_sharding
+        spec = _partition_spec(variable)
+        variable.value = _constrain(variable.value, spec, self.mesh)
+
+  def _opt_state_specs(self, params: nnx.State):
+    """Returns the PartitionSpecs of ``params`` and the ones of their
+    optimizer state sharded over ``opt_state_axis``."""
+    assert self.opt_state_axis is not None and self.mesh is not None
+    axis_size = self.mesh.shape[self.opt_state_axis]
+
+    def zero_spec(variable: Variable):
+      zero_sharding = _zero_sharding(
+        variable.get_metadata().get('sharding'),
+        variable.shape,
+        self.opt_state_axis,
+        axis_size,
+      )
+      return _partition_spec(
+        variable.replace(variable.raw_value, sharding=zero_sharding)
+      )
+
+    is_variable = lambda x: isinstance(x, Variable)
+    param_specs = jax.tree.map(_partition_spec, params, is_leaf=is_variable)
+    zero_specs = jax.tree.map(zero_spec, params, is_leaf=is_variable)
+    return param_specs, zero_specs
 
   if not tp.TYPE_CHECKING:
     def __getattribute__(self, name: str) -> tp.Any:
@@ -210,20 +460,69 @@ class Optimizer(Object, tp.Generic[M]):
       **kwargs: additional keyword arguments passed to the tx.update, to support
       ``GradientTransformationExtraArgs``, such as ``optax.scale_by_backtracking_linesearch``.
     """
-    param_arrays = nnx.freeze(nnx.pure(nnx.state(model, self.wrt)))
+    if self.fused_layout is not None:
+      return self._fused_update(model, grads, **kwargs)
+
+    params = nnx.state(model, self.wrt)
+    param_arrays = nnx.freeze(nnx.pure(params))
     grad_arrays = nnx.freeze(nnx.pure(nnx.state(grads)))
     opt_state_arrays = nnx.freeze(nnx.pure(self.opt_state))
     kwargs_arrays = nnx.freeze(nnx.pure(kwargs))
 
+    if self.opt_state_axis is not None:
+      param_specs, zero_specs = self._opt_state_specs(params)
+      grad_arrays = _constrain(grad_arrays, zero_specs, self.mesh)
+      param_arrays = _constrain(param_arrays, zero_specs, self.mesh)
+
     updates, new_opt_state = self.tx.update(
       grad_arrays, opt_state_arrays, param_arrays, **kwargs_arrays
     )
     new_params = optax.apply_updates(param_arrays, updates)
 
+    if self.opt_state_axis is not None:
+      new_params = _constrain(new_params, param_specs, self.mesh)
+
     nnx.update(model, new_params)
     nnx.update(self.opt_state, nnx.state(new_opt_state))
     self.step[...] += 1
 
+  def _fused_update(self, model: M, grads, /, **kwargs):
+    layout = self.fused_layout
+    assert layout is not None
+    flat_params = nnx.to_flat_state(nnx.state(model, self.wrt))
+    flat_grads = nnx.to_flat_state(nnx.state(grads))
+    paths, variables = flat_params.paths, flat_params.leaves
+    grad_paths, grad_leaves = flat_grads.paths, flat_grads.leaves
+    if tuple(paths) != layout.paths or tuple(grad_paths) != layout.paths:
+      raise ValueError(
+        'The Variables of the model or the gradients do not match the ones '
+        'the fused Optimizer was created with.\n'
+        f'Expected paths: {layout.paths}\n'
+        f'Model paths:    {tuple(paths)}\n'
+        f'Gradient paths: {tuple(grad_paths)}'
+      )
+    param_leaves = [variable[...] for variable in variables]
+    grad_leaves = [
+      g[...] if isinstance(g, Variable) else g for g in grad_leaves
+    ]
+    param_arrays = _fuse(layout, param_leaves)
+    grad_arrays = _fuse(layout, grad_leaves)
+    opt_state_arrays = nnx.freeze(nnx.pure(self.opt_state))
+    kwargs_arrays = nnx.freeze(nnx.pure(kwargs))
+
+    updates, new_opt_state = self.tx.update(
+      grad_arrays, opt_state_arrays, param_arrays, **kwargs_arrays
+    )
+    new_params = optax.apply_updates(param_arrays, updates)
+
+    shapes = [jnp.shape(leaf) for leaf in param_leaves]
+    for variable, value in zip(
+      variables, _unfuse(layout, new_params, shapes)
+    ):
+      variable.value = value
+    nnx.update(self.opt_state, nnx.state(new_opt_state))
+    self.step[...] += 1
+
 class ModelAndOptimizer(Optimizer[M]):
   """A convenience class that combines a model and an optimizer.
 
@@ -231,8 +530,24 @@ class ModelAndOptimizer(Optimizer[M]):
   Use :class:`Optimizer` instead.
   """
 
-  def __init__(self, model: M, tx: optax.GradientTransformation, *, wrt: filterlib.Filter = nnx.Param):
-    super().__init__(model, tx, wrt=wrt)
+  def __init__(
+    self,
+    model: M,
+    tx: optax.GradientTransformation,
+    *,
+    wrt: filterlib.Filter = nnx.Param,
+    fused: bool = False,
+    opt_state_axis: str | None = None,
+    mesh: jax.sharding.Mesh | jax.sharding.AbstractMesh | None = None,
+  ):
+    super().__init__(
+      model,
+      tx,
+      wrt=wrt,
+      fused=fused,
+      opt_state_axis=opt_state_axis,
+      mesh=mesh,
+    )
     self.model = model
 
   def update(self, grads, /, **kwargs): # type: ignore
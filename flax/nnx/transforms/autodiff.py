@@ -28,10 +28,12 @@ from flax.nnx import (
 from flax.nnx.statelib import State
 import jax
 import jax.core
+import jax.numpy as jnp
 import jax.stages
 
 from flax.nnx.transforms import general
-from flax.nnx.transforms.transforms import resolve_kwargs
+from flax.nnx.transforms.iteration import Carry, scan
+from flax.nnx.transforms.transforms import eval_shape, resolve_kwargs
 from flax.typing import MISSING, Missing
 
 
@@ -375,6 +377,156 @@ def value_and_grad(
     return_value=True,
   )
 
+
+def accumulate_value_and_grad(
+  f: tp.Callable[..., tp.Any],
+  *,
+  num_micro_batches: int,
+  argnums: int | DiffState | tp.Sequence[int | DiffState] = 0,
+  batch_argnums: int | tp.Sequence[int] | None = None,
+  has_aux: bool = False,
+  holomorphic: bool = False,
+  allow_int: bool = False,
+) -> tp.Callable[..., tp.Any]:
+  """Gradient accumulation version of :func:`value_and_grad`.
+
+  The arguments at ``batch_argnums`` are split along their leading axis into
+  ``num_micro_batches`` micro-batches and ``f`` is differentiated on each of
+  them inside a single :func:`scan`, accumulating the gradients into a
+  preallocated buffer. The returned value and gradients are the mean over the
+  micro-batches, so for a loss that is a mean over the batch they match the
+  ones of the full batch while only the activations of one micro-batch are
+  alive at a time. Graph nodes are carried through the micro-batches, so
+  updates to ``BatchStat``, ``Cache`` or ``Rngs`` state are applied in order
+  just like for ``num_micro_batches`` sequential calls.
+
+  Example::
+
+    >>> from flax import nnx
+    >>> import jax.numpy as jnp
+    >>> import optax
+    ...
+    >>> model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    >>> optimizer = nnx.Optimizer(model, optax.sgd(0.1), wrt=nnx.Param)
+    >>> x, y = jnp.ones((8, 2)), jnp.ones((8, 3))
+    ...
+    >>> loss_fn = lambda m, x, y: jnp.mean((m(x) - y) ** 2)
+    >>> grad_fn = nnx.accumulate_value_and_grad(loss_fn, num_micro_batches=4)
+    ...
+    >>> loss, grads = grad_fn(model, x, y)
+    >>> full_loss, full_grads = nnx.value_and_grad(loss_fn)(model, x, y)
+    >>> bool(jnp.allclose(grads['kernel'][...], full_grads['kernel'][...]))
+    True
+    >>> optimizer.update(model, grads)
+
+  Args:
+    f: function to be differentiated, see :func:`value_and_grad`.
+    num_micro_batches: number of micro-batches, the leading axis of all the
+      arrays in the batch arguments must be divisible by it.
+    argnums: which positional arguments to differentiate with respect to, see
+      :func:`grad`.
+    batch_argnums: positional arguments that are split into micro-batches.
+      Defaults to all the arguments that are not graph nodes and are not in
+      ``argnums``. Graph nodes not in ``batch_argnums`` are carried through the
+      micro-batches and any other argument is passed unchanged to every call.
+    has_aux: whether ``f`` returns a pair ``(loss, aux)``. The ``aux`` of each
+      micro-batch is stacked along a new leading axis.
+    holomorphic: see :func:`grad`.
+    allow_int: see :func:`grad`.
+
+  Returns:
+    A function with the same signature as ``f`` that returns
+    ``(loss, grads)``, or ``((loss, aux), grads)`` if ``has_aux`` is True.
+  """
+  if num_micro_batches < 1:
+    raise ValueError(
+      f'num_micro_batches must be a positive integer, got {num_micro_batches}'
+    )
+  value_and_grad_fn = value_and_grad(
+    f,
+    argnums=argnums,
+    has_aux=has_aux,
+    holomorphic=holomorphic,
+    allow_int=allow_int,
+  )
+  _argnums = (argnums,) if isinstance(argnums, (int, DiffState)) else argnums
+  diff_argnums = {
+    x.argnum if isinstance(x, DiffState) else x for x in _argnums
+  }
+
+  def split_micro_batches(x):
+    shape = jnp.shape(x)
+    if not shape or shape[0] % num_micro_batches != 0:
+      raise ValueError(
+        f'Cannot split an array of shape {shape} into {num_micro_batches} '
+        'micro-batches, the leading axis must be divisible by '
+        'num_micro_batches.'
+      )
+    return jnp.reshape(
+      x, (num_micro_batches, shape[0] // num_micro_batches, *shape[1:])
+    )
+
+  @functools.wraps(f)
+  def accumulate_wrapper(*args, **kwargs):
+    args = resolve_kwargs(f, args, kwargs)
+    del kwargs
+    if batch_argnums is None:
+      batch_indexes = tuple(
+        i
+        for i, arg in enumerate(args)
+        if i not in diff_argnums and not graph.is_graph_node(arg)
+      )
+    elif isinstance(batch_argnums, int):
+      batch_indexes = (batch_argnums,)
+    else:
+      batch_indexes = tuple(batch_argnums)
+
+    micro_batches = tuple(
+      jax.tree.map(split_micro_batches, args[i]) for i in batch_indexes
+    )
+    carry_indexes = tuple(
+      i
+      for i in range(len(args))
+      if i not in batch_indexes and graph.is_graph_node(args[i])
+    )
+
+    def merge_args(carried, micro_batch):
+      call_args = list(args)
+      for i, arg in zip(carry_indexes, carried):
+        call_args[i] = arg
+      for i, arg in zip(batch_indexes, micro_batch):
+        call_args[i] = arg
+      return call_args
+
+    first_micro_batch = jax.tree.map(lambda x: x[0], micro_batches)
+    carried = tuple(args[i] for i in carry_indexes)
+    _, grads_shape = eval_shape(
+      lambda carried, micro_batch: value_and_grad_fn(
+        *merge_args(carried, micro_batch)
+      ),
+      carried,
+      first_micro_batch,
+    )
+    grads_acc = jax.tree.map(
+      lambda x: jnp.zeros(x.shape, x.dtype), grads_shape
+    )
+
+    @scan(in_axes=(Carry, 0), out_axes=(Carry, 0))
+    def accumulate_step(carry, micro_batch):
+      carried, grads_acc = carry
+      out, grads = value_and_grad_fn(*merge_args(carried, micro_batch))
+      grads_acc = jax.tree.map(jnp.add, grads_acc, grads)
+      return (carried, grads_acc), out
+
+    (_, grads_acc), outs = accumulate_step((carried, grads_acc), micro_batches)
+    grads = jax.tree.map(lambda x: x / num_micro_batches, grads_acc)
+    if has_aux:
+      losses, aux = outs
+      return (jnp.mean(losses, axis=0), aux), grads
+    return jnp.mean(outs, axis=0), grads
+
+  return accumulate_wrapper
+
 # -----------------------------------------------
 # custom_vjp
 # -----------------------------------------------
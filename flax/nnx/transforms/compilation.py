@@ -14,14 +14,24 @@
 # pytype: skip-file
 from __future__ import annotations
 
+import concurrent.futures
+import contextlib
 import dataclasses
 import functools
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
 import typing as tp
+import warnings
 
 import jax
 import jax.experimental
 import jax.experimental.shard_map
 from jax.sharding import AbstractMesh, Mesh, PartitionSpec
+import numpy as np
 
 from flax.nnx import (
   extract,
@@ -30,7 +40,7 @@ from flax.nnx import (
   statelib,
   variablelib,
 )
-from flax.typing import Missing
+from flax.typing import Missing, PathParts
 
 F = tp.TypeVar('F', bound=tp.Callable[..., tp.Any])
 Specs = tp.Any
@@ -91,11 +101,69 @@ class StateSharding(extract.PrefixMapping):
     return hash((self.filters, self.shardings))
 
 
-def _jit_split_fn(ctx: graph.SplitContext, path, prefix, x):
+def _jit_split_fn(
+  ctx: graph.SplitContext,
+  path,
+  prefix,
+  x,
+  *,
+  skip_unchanged: bool = False,
+  with_paths: bool = False,
+):
   if isinstance(prefix, StateSharding):
     graphdef, *states = ctx.flatten(x, *prefix.filters)
     return extract.NodeStates.from_split(graphdef, *states, metadata=prefix)
-  return extract.NodeStates.from_split(*ctx.flatten(x, with_paths=False))
+  return extract.NodeStates.from_split(
+    *ctx.flatten(x, with_paths=with_paths, skip_unchanged=skip_unchanged)
+  )
+
+
+def _is_node_states(x) -> bool:
+  return isinstance(x, extract.NodeStates)
+
+
+def _extract_donated(donate: filterlib.Filter, pure_args_kwargs):
+  """Removes the Variables matching ``donate`` from the states of the
+  NodeStates in ``pure_args_kwargs``.
+
+  Returns the removed states, one tuple per NodeStates in flattening order,
+  and ``pure_args_kwargs`` without them.
+  """
+  donated: list[tuple[statelib.FlatState[tp.Any], ...]] = []
+
+  def extract_fn(x):
+    if not isinstance(x, extract.NodeStates):
+      return x
+    donated_states, kept_states = [], []
+    for state in x.states:
+      donated_state, kept_state = state.split(donate, ...)
+      donated_states.append(donated_state)
+      kept_states.append(kept_state)
+    donated.append(tuple(donated_states))
+    return x.replace(states=tuple(kept_states))
+
+  pure_args_kwargs = jax.tree.map(
+    extract_fn, pure_args_kwargs, is_leaf=_is_node_states
+  )
+  return tuple(donated), pure_args_kwargs
+
+
+def _insert_donated(donated, pure_args_kwargs):
+  """Inverse of :func:`_extract_donated`, the donated states are passed as
+  additional states of their NodeStates."""
+  donated_iter = iter(donated)
+
+  def insert_fn(x):
+    if not isinstance(x, extract.NodeStates):
+      return x
+    donated_states = next(donated_iter)
+    states = tuple(
+      statelib.FlatState.merge(kept_state, donated_state)
+      for kept_state, donated_state in zip(x.states, donated_states)
+    )
+    return x.replace(states=states)
+
+  return jax.tree.map(insert_fn, pure_args_kwargs, is_leaf=_is_node_states)
 
 
 def _jit_merge_fn(ctx: graph.MergeContext, path, prefix, leaf) -> tp.Any:
@@ -104,6 +172,126 @@ def _jit_merge_fn(ctx: graph.MergeContext, path, prefix, leaf) -> tp.Any:
   return ctx.unflatten(leaf.graphdef, *leaf.states)
 
 
+@dataclasses.dataclass
+class JitFunctionStats:
+  """Statistics of the calls to a single :func:`jit` function.
+
+  Times are accumulated in seconds.
+  """
+
+  calls: int = 0
+  # time spent splitting the inputs into pure pytrees
+  split_time: float = 0.0
+  # time spent in the underlying jax.jit call, including tracing/compilation
+  dispatch_time: float = 0.0
+  # time spent merging the outputs and writing back the Variables
+  merge_time: float = 0.0
+  cache_hits: int = 0
+  cache_misses: int = 0
+  # number of array leaves passed to and returned by the jitted function
+  leaves_in: int = 0
+  leaves_out: int = 0
+  retrace_causes: list[str] = dataclasses.field(default_factory=list)
+
+  @property
+  def total_time(self) -> float:
+    return self.split_time + self.dispatch_time + self.merge_time
+
+
+class JitStats(dict[str, JitFunctionStats]):
+  """Mapping from :func:`jit` function names to their :class:`JitFunctionStats`."""
+
+  def __missing__(self, key: str) -> JitFunctionStats:
+    self[key] = stats = JitFunctionStats()
+    return stats
+
+
+@dataclasses.dataclass
+class JitStatsContext(threading.local):
+  stats: JitStats | None = None
+  trace_annotations: bool = False
+
+
+JIT_STATS_CONTEXT = JitStatsContext()
+
+
+@contextlib.contextmanager
+def jit_stats(*, trace_annotations: bool = False):
+  """Records the overhead of the :func:`jit` calls made inside the context.
+
+  For every jitted function the time spent splitting the inputs, in the
+  underlying ``jax.jit`` call and merging the outputs is recorded, together
+  with the number of cache hits and misses of the ``jax.jit`` call, the
+  number of leaves moved in and out of it and a description of the cause of
+  each retrace.
+
+  Example usage::
+
+    >>> from flax import nnx
+    >>> import jax.numpy as jnp
+    ...
+    >>> model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    >>> @nnx.jit
+    ... def forward(model, x):
+    ...   return model(x)
+    ...
+    >>> with nnx.jit_stats() as stats:
+    ...   y = forward(model, jnp.ones((1, 2)))
+    ...   y = forward(model, jnp.ones((1, 2)))
+    ...   y = forward(model, jnp.ones((4, 2)))
+    >>> forward_stats = stats['forward']
+    >>> forward_stats.calls, forward_stats.cache_hits, forward_stats.cache_misses
+    (3, 1, 2)
+    >>> forward_stats.retrace_causes
+    ['first call', 'input [0][1] changed: float32[1,2] -> float32[4,2]']
+
+  Args:
+    trace_annotations: if True, each phase of the calls is also annotated with
+      ``jax.profiler.TraceAnnotation`` so it shows up in profiler traces.
+  Yields:
+    A :class:`JitStats` object that is filled as the calls are made.
+  """
+  prev_stats = JIT_STATS_CONTEXT.stats
+  prev_trace_annotations = JIT_STATS_CONTEXT.trace_annotations
+  JIT_STATS_CONTEXT.stats = stats = JitStats()
+  JIT_STATS_CONTEXT.trace_annotations = trace_annotations
+  try:
+    yield stats
+  finally:
+    JIT_STATS_CONTEXT.stats = prev_stats
+    JIT_STATS_CONTEXT.trace_annotations = prev_trace_annotations
+
+
+def _input_signature(pure_args, pure_kwargs):
+  paths_leaves, treedef = jax.tree_util.tree_flatten_with_path(
+    (pure_args, pure_kwargs)
+  )
+  avals = tuple(
+    (jax.tree_util.keystr(path), _aval_str(leaf)) for path, leaf in paths_leaves
+  )
+  return treedef, avals
+
+
+def _aval_str(leaf) -> str:
+  try:
+    return jax.core.get_aval(leaf).str_short()
+  except TypeError:
+    return repr(leaf)
+
+
+def _retrace_cause(prev_signature, signature) -> str:
+  if prev_signature is None:
+    return 'first call'
+  prev_treedef, prev_avals = prev_signature
+  treedef, avals = signature
+  if prev_treedef != treedef:
+    return 'input structure changed (graphdef, static or pytree structure)'
+  for (path, prev_aval), (_, aval) in zip(prev_avals, avals):
+    if prev_aval != aval:
+      return f'input {path} changed: {prev_aval} -> {aval}'
+  return 'unknown, inputs match the previous trace'
+
+
 @dataclasses.dataclass(eq=False)
 class JitFn:
   f: tp.Callable[..., tp.Any]
@@ -111,11 +299,24 @@ class JitFn:
   out_shardings: tp.Any
   kwarg_shardings: tp.Any
   ctxtag: tp.Hashable
+  # return unchanged Variables as NO_UPDATE instead of as outputs
+  skip_unchanged: bool = False
+  # if set, the positional arguments are the donated states and a tuple with
+  # the remaining positional arguments
+  donate: filterlib.Filter | None = None
+  # number of times the function was traced, used to detect cache misses
+  num_traces: int = dataclasses.field(default=0, init=False)
 
   def __post_init__(self):
     functools.update_wrapper(self, self.f)
 
   def __call__(self, *pure_args, **pure_kwargs):
+    self.num_traces += 1
+    if self.donate is not None:
+      donated, pure_args = pure_args
+      pure_args, pure_kwargs = _insert_donated(
+        donated, (pure_args, pure_kwargs)
+      )
     args, kwargs = extract.from_tree(
       (pure_args, pure_kwargs),
       merge_fn=_jit_merge_fn,
@@ -130,8 +331,19 @@ class JitFn:
       (args_out, kwargs_out, out),
       prefix=(self.in_shardings, self.kwarg_shardings, self.out_shardings),
       ctxtag=self.ctxtag,
-      split_fn=_jit_split_fn,
+      split_fn=functools.partial(
+        _jit_split_fn,
+        skip_unchanged=self.skip_unchanged,
+        with_paths=self.donate is not None,
+      ),
     )
+    if self.donate is not None:
+      # the donated states are returned separately so they keep the sharding
+      # of the donated buffers
+      donated_out, (pure_args_out, pure_kwargs_out) = _extract_donated(
+        self.donate, (pure_args_out, pure_kwargs_out)
+      )
+      pure_args_out = (donated_out, pure_args_out)
 
     return pure_args_out, pure_kwargs_out, pure_out
 
@@ -150,6 +362,9 @@ def jit(
   backend: tp.Optional[str] = None,
   inline: bool = False,
   abstracted_axes: tp.Optional[tp.Any] = None,
+  cache_graph_nodes: bool = False,
+  persistent_cache_dir: str | os.PathLike[str] | None = None,
+  donate: filterlib.Filter | None = None,
 ) -> tp.Callable[[tp.Callable[..., tp.Any]], JitWrapped]: ...
 @tp.overload
 def jit(
@@ -166,6 +381,9 @@ def jit(
   backend: tp.Optional[str] = None,
   inline: bool = False,
   abstracted_axes: tp.Optional[tp.Any] = None,
+  cache_graph_nodes: bool = False,
+  persistent_cache_dir: str | os.PathLike[str] | None = None,
+  donate: filterlib.Filter | None = None,
 ) -> JitWrapped: ...
 def jit(
   fun: tp.Callable[..., tp.Any] | type[Missing] = Missing,
@@ -181,6 +399,9 @@ def jit(
   backend: tp.Optional[str] = None,
   inline: bool = False,
   abstracted_axes: tp.Optional[tp.Any] = None,
+  cache_graph_nodes: bool = False,
+  persistent_cache_dir: str | os.PathLike[str] | None = None,
+  donate: filterlib.Filter | None = None,
 ) -> JitWrapped | tp.Callable[[tp.Callable[..., tp.Any]], JitWrapped]:
   """
   Lifted version of ``jax.jit`` that can handle Modules / graph nodes as
@@ -297,6 +518,40 @@ def jit(
     inline: Specify whether this function should be inlined into enclosing
       jaxprs (rather than being represented as an application of the xla_call
       primitive with its own subjaxpr). Default False.
+    cache_graph_nodes: If True, the jitted function remembers the graph node
+      arguments of its last call and, if it is called again with the same
+      objects and no graph node structure or Variable metadata was changed in
+      between, reuses their previous split instead of traversing them again.
+      This gives ``nnx.cached_partial`` like overhead without changing the call
+      site. Changes are detected through attribute assignment on Objects and
+      Variables, in-place mutations of list or dict attributes (e.g.
+      ``module.layers.append(...)``) are not detected and must not be done
+      between calls. The jitted function keeps a reference to the graph nodes
+      of its last call. Default False.
+    persistent_cache_dir: If set, compiled executables are serialized to this
+      directory and reused by later processes calling the same function with
+      the same graph structure and input avals, e.g. after a job restart.
+      Executables are keyed by a digest of the lowered computation, the
+      canonical input and output structure (see :meth:`GraphDef.digest`), the
+      JAX version and the devices. Graph nodes whose structure cannot be
+      canonicalized (e.g. they contain objects whose ``repr`` depends on the
+      process) are compiled without the persistent cache. It cannot be used
+      together with ``static_argnums`` or ``static_argnames``. Default None.
+
+      .. warning::
+        Loading an executable unpickles it (see
+        ``jax.experimental.serialize_executable``), which can run arbitrary
+        code. Only use directories that no untrusted user can write to. The
+        stored digest detects truncated or corrupted files, not tampering.
+    donate: A :ref:`Filter <filters_guide>` selecting the Variables of the
+      graph node arguments whose buffers are donated to the computation, e.g.
+      ``donate=nnx.Any(nnx.Param, nnx.OptState)``. Donated Variables are
+      always updated with the new values returned by the computation so the
+      Python objects never hold invalidated buffers. Inputs that are not graph
+      nodes are never donated. Donated Variables keep the sharding of their
+      buffers regardless of ``in_shardings``. It cannot be used together with
+      ``donate_argnums``, ``donate_argnames``, ``static_argnums`` or
+      ``static_argnames``. Default None.
 
   Returns:
     A wrapped version of ``fun``, set up for just-in-time compilation.
@@ -316,6 +571,9 @@ def jit(
       backend=backend,
       inline=inline,
       abstracted_axes=abstracted_axes,
+      cache_graph_nodes=cache_graph_nodes,
+      persistent_cache_dir=persistent_cache_dir,
+      donate=donate,
     )  # type: ignore[return-value]
 
   return JitWrapped(
@@ -331,9 +589,183 @@ def jit(
     backend=backend,
     inline=inline,
     abstracted_axes=abstracted_axes,
+    cache_graph_nodes=cache_graph_nodes,
+    persistent_cache_dir=persistent_cache_dir,
+    donate=donate,
   )
 
 
+# bump when the layout of the persistent cache key changes
+_PERSISTENT_CACHE_VERSION = 1
+_EXECUTABLE_FILE_MAGIC = b'NNXEXEC1'
+
+
+def _write_executable(f, device_ids: list[int], payload: bytes) -> None:
+  """Writes a serialized executable to a persistent cache file.
+
+  The layout is the magic, the SHA-256 of ``payload``, the number of devices
+  and their ids as little-endian integers, followed by ``payload``.
+  """
+  f.write(_EXECUTABLE_FILE_MAGIC)
+  f.write(hashlib.sha256(payload).digest())
+  f.write(struct.pack(f'<I{len(device_ids)}q', len(device_ids), *device_ids))
+  f.write(payload)
+
+
+def _read_executable(f) -> tuple[list[int], bytes]:
+  """Reads a file written by ``_write_executable``.
+
+  Raises a ``ValueError`` if the file is not a persistent cache file or its
+  payload does not match the stored digest, so truncated or corrupted files
+  are never passed to the unpickler of ``deserialize_and_load``.
+  """
+  if f.read(len(_EXECUTABLE_FILE_MAGIC)) != _EXECUTABLE_FILE_MAGIC:
+    raise ValueError('not an nnx.jit persistent cache file')
+  digest = f.read(32)
+  (num_devices,) = struct.unpack('<I', f.read(4))
+  device_ids = list(struct.unpack(f'<{num_devices}q', f.read(8 * num_devices)))
+  payload = f.read()
+  if hashlib.sha256(payload).digest() != digest:
+    raise ValueError('the executable does not match its digest')
+  return device_ids, payload
+
+
+def _executable_digest(
+  lowered: jax.stages.Lowered, input_devices: list[int]
+) -> str:
+  """Returns a key for ``lowered`` that is stable across processes.
+
+  Raises a ``ValueError`` if the input or output structure cannot be
+  canonicalized.
+  """
+  import jaxlib
+
+  devices = jax.devices()
+  h = hashlib.sha256()
+  for part in (
+    f'nnx.jit:{_PERSISTENT_CACHE_VERSION}',
+    jax.__version__,
+    jaxlib.__version__,
+    jax.default_backend(),
+    repr(sorted((d.id, d.platform, d.device_kind) for d in devices)),
+    repr(input_devices),
+    repr(graph._canonicalize(lowered.in_tree, set())),
+    repr(graph._canonicalize(lowered.out_tree, set())),
+    lowered.as_text(),
+  ):
+    h.update(part.encode('utf-8'))
+    h.update(b'\0')
+  return h.hexdigest()
+
+
+def _is_graph_node_or_variable(x) -> bool:
+  return graph.is_graph_node(x) or isinstance(x, variablelib.Variable)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _GraphNodeArgs:
+  """Split of the graph node arguments of the last call to a
+  :class:`JitWrapped` with ``cache_graph_nodes=True``.
+
+  The split is reused if the arguments are the same graph nodes and their
+  fingerprints still match, see :func:`graph.check_fingerprint`.
+  """
+
+  treedef: jax.tree_util.PyTreeDef
+  # (position, node, fingerprint, graphdef, paths, variables) of each graph
+  # node argument
+  nodes: tuple[
+    tuple[
+      int,
+      tp.Any,
+      list[tp.Hashable],
+      graph.GraphDef[tp.Any],
+      tuple[PathParts, ...],
+      list[variablelib.Variable],
+    ],
+    ...,
+  ]
+  ref_index: graph.RefMap
+  index_ref: graph.IndexMap
+  flatten_plans: tp.MutableMapping[tp.Any, graph.StaticCache]
+
+  @staticmethod
+  def create(
+    ctx: graph.UpdateContext,
+    treedef: jax.tree_util.PyTreeDef,
+    leaves: list[tp.Any],
+    pure_args_kwargs: tp.Any,
+  ) -> _GraphNodeArgs | None:
+    """Returns ``None`` if some graph node argument was not split using a
+    flatten plan or the arguments alias each other."""
+    flatten_plans = ctx.flatten_plans
+    if not flatten_plans:
+      return None
+    assert ctx.outer_ref_outer_index is not None
+    assert ctx.outer_index_outer_ref is not None
+    pure_leaves = jax.tree.leaves(
+      pure_args_kwargs, is_leaf=lambda x: isinstance(x, extract.NodeStates)
+    )
+    if len(pure_leaves) != len(leaves):
+      return None
+    nodes = []
+    seen: set[int] = set()
+    for i, (leaf, pure_leaf) in enumerate(zip(leaves, pure_leaves)):
+      if not _is_graph_node_or_variable(leaf):
+        continue
+      if (
+        id(leaf) in seen
+        or leaf not in flatten_plans
+        or not isinstance(pure_leaf, extract.NodeStates)
+        or pure_leaf.metadata is not None
+        or len(pure_leaf.states) != 1
+      ):
+        return None
+      seen.add(id(leaf))
+      static_cache = flatten_plans[leaf]
+      if (
+        static_cache.fingerprint is None
+        or pure_leaf.graphdef is not static_cache.graphdef
+      ):
+        return None
+      nodes.append((
+        i,
+        leaf,
+        static_cache.fingerprint,
+        static_cache.graphdef,
+        static_cache.paths,
+        static_cache.variables,
+      ))
+    return _GraphNodeArgs(
+      treedef,
+      tuple(nodes),
+      ctx.outer_ref_outer_index,
+      ctx.outer_index_outer_ref,
+      flatten_plans,
+    )
+
+  def matches(self, treedef: jax.tree_util.PyTreeDef, leaves: list[tp.Any]):
+    """Returns whether ``leaves`` are the same graph nodes as the cached
+    arguments and none of their structures changed."""
+    if treedef != self.treedef:
+      return False
+    if not all(leaves[i] is node for i, node, *_ in self.nodes):
+      return False
+    ref_index = graph.RefMap()
+    for _, node, fingerprint, *_ in self.nodes:
+      new_ref_index = graph.RefMap()
+      try:
+        if not graph.check_fingerprint(
+          node, fingerprint, ref_index=ref_index, new_ref_index=new_ref_index
+        ):
+          return False
+      except ValueError:
+        # array leaves were added
+        return False
+      ref_index.update(new_ref_index)
+    return True
+
+
 class JitWrapped:
   """A function ready to be traced, lowered, and compiled.
 
@@ -357,8 +789,28 @@ class JitWrapped:
     backend: tp.Optional[str] = None,
     inline: bool = False,
     abstracted_axes: tp.Optional[tp.Any] = None,
+    cache_graph_nodes: bool = False,
+    persistent_cache_dir: str | os.PathLike[str] | None = None,
+    donate: filterlib.Filter | None = None,
   ):
     functools.update_wrapper(self, fun)
+    if donate is not None and (
+      donate_argnums is not None
+      or donate_argnames is not None
+      or static_argnums is not None
+      or static_argnames is not None
+    ):
+      raise ValueError(
+        'donate cannot be used with donate_argnums, donate_argnames, '
+        'static_argnums or static_argnames'
+      )
+    if persistent_cache_dir is not None and (
+      static_argnums is not None or static_argnames is not None
+    ):
+      raise ValueError(
+        'persistent_cache_dir cannot be used with static_argnums or '
+        'static_argnames'
+      )
     kwarg_shardings = None
     self.jax_in_shardings = jax.tree.map(
       lambda x: extract.NodeStates.from_prefixes(x.shardings, metadata=x)
@@ -373,11 +825,37 @@ class JitWrapped:
       out_shardings,
     )
 
+    # donated buffers are invalidated by the call so all Variables have to be
+    # written back, otherwise unchanged Variables are not returned by the
+    # jitted function and the outer merge leaves them untouched
+    skip_unchanged = (
+      donate_argnums is None and donate_argnames is None and donate is None
+    )
+    self.jit_fn = JitFn(
+      fun,
+      in_shardings,
+      out_shardings,
+      kwarg_shardings,
+      self,
+      skip_unchanged=skip_unchanged,
+      donate=donate,
+    )
+    jax_in_shardings = self.jax_in_shardings
+    jax_args_out_shardings = self.jax_in_shardings
+    if donate is not None:
+      # the donated states are passed as an additional first argument, pass
+      # both argnums and argnames so jax does not infer them from the
+      # signature of fun
+      donate_argnums, donate_argnames = 0, ()
+      if jax_in_shardings is not None:
+        # in_shardings is a prefix of the tuple of the other arguments
+        jax_in_shardings = (None, jax_in_shardings)
+        jax_args_out_shardings = (None, jax_args_out_shardings)
     self.jitted_fn = jax.jit(
-      JitFn(fun, in_shardings, out_shardings, kwarg_shardings, self),
-      in_shardings=self.jax_in_shardings,
+      self.jit_fn,
+      in_shardings=jax_in_shardings,
       out_shardings=(
-        self.jax_in_shardings,
+        jax_args_out_shardings,
         kwarg_shardings,
         self.jax_out_shardings,
       ),
@@ -395,6 +873,14 @@ class JitWrapped:
     self.out_shardings = out_shardings
     self.kwarg_shardings = kwarg_shardings
     self.static_argnums = static_argnums
+    # signature of the inputs of the last trace, used by jit_stats
+    self._last_trace_signature = None
+    self.cache_graph_nodes = cache_graph_nodes
+    self._graph_node_args: _GraphNodeArgs | None = None
+    self.persistent_cache_dir = persistent_cache_dir
+    self.donate = donate
+    # (treedef, input avals) -> compiled executable
+    self._executables: dict[tp.Any, tp.Any] = {}
 
   # implement descriptor protocol so that we can use this as a method
   def __get__(self, obj, objtype=None):
@@ -403,19 +889,78 @@ class JitWrapped:
     return functools.partial(self, obj)
 
   def _get_pure_args_kwargs(self, args, kwargs):
+    return self._donate(*self._to_pure_args_kwargs(args, kwargs))
+
+  def _to_pure_args_kwargs(self, args, kwargs):
     pure_args, pure_kwargs = extract.to_tree(
       (args, kwargs),
       prefix=(self.in_shardings, self.kwarg_shardings)
       if self.in_shardings is not None or self.kwarg_shardings is not None
       else None,
-      split_fn=_jit_split_fn,
+      split_fn=functools.partial(
+        _jit_split_fn, with_paths=self.donate is not None
+      ),
       check_aliasing=self.in_shardings is not None
       or self.kwarg_shardings is not None,
       ctxtag=self,
     )
     return pure_args, pure_kwargs
 
+  def _donate(self, pure_args, pure_kwargs):
+    """Moves the donated states to an additional first argument, the other
+    positional arguments are passed as a tuple in the second argument."""
+    if self.donate is None:
+      return pure_args, pure_kwargs
+    donated, (pure_args, pure_kwargs) = _extract_donated(
+      self.donate, (pure_args, pure_kwargs)
+    )
+    return (donated, tuple(pure_args)), pure_kwargs
+
+  def _split_args(self, args, kwargs):
+    # MutableArrays are re-wrapped on every flatten, they cannot be cached
+    if self.cache_graph_nodes and not variablelib.using_mutable_arrays():
+      return self._get_pure_args_kwargs_cached(args, kwargs)
+    return self._get_pure_args_kwargs(args, kwargs)
+
+  def _get_pure_args_kwargs_cached(self, args, kwargs):
+    ctx = graph.current_update_context(self)
+    leaves, treedef = jax.tree.flatten(
+      (args, kwargs), is_leaf=_is_graph_node_or_variable
+    )
+    cached = self._graph_node_args
+    if (
+      cached is not None
+      and ctx.static_cache is None
+      and cached.matches(treedef, leaves)
+    ):
+      # same graph nodes with the same structure, reuse the previous split
+      for i, _, _, graphdef, paths, variables in cached.nodes:
+        state: statelib.FlatState[tp.Any] | list[tp.Any]
+        if self.donate is not None:
+          state = statelib.FlatState.from_sorted_keys_values(
+            paths, list(variables)
+          )
+        else:
+          state = [variable.raw_value for variable in variables]
+        leaves[i] = extract.NodeStates.from_split(graphdef, state)
+      ctx.outer_ref_outer_index = cached.ref_index
+      ctx.outer_index_outer_ref = cached.index_ref
+      ctx.flatten_plans = cached.flatten_plans
+      return self._donate(*jax.tree.unflatten(treedef, leaves))
+
+    with graph.use_flatten_plans():
+      pure_args, pure_kwargs = self._to_pure_args_kwargs(args, kwargs)
+    self._graph_node_args = _GraphNodeArgs.create(
+      ctx, treedef, leaves, (pure_args, pure_kwargs)
+    )
+    return self._donate(pure_args, pure_kwargs)
+
   def _get_non_pure_out(self, pure_args_out, pure_kwargs_out, pure_out, /):
+    if self.donate is not None:
+      donated_out, pure_args_out = pure_args_out
+      pure_args_out, pure_kwargs_out = _insert_donated(
+        donated_out, (pure_args_out, pure_kwargs_out)
+      )
     _args_out, _kwargs_out, out = extract.from_tree(
       (pure_args_out, pure_kwargs_out, pure_out),
       merge_fn=_jit_merge_fn,
@@ -425,18 +970,152 @@ class JitWrapped:
     return out
 
   def __call__(self, *args, **kwargs):
+    if JIT_STATS_CONTEXT.stats is not None:
+      return self._call_with_stats(JIT_STATS_CONTEXT.stats, args, kwargs)
     # run dynamic_cache_context before update_context
     with graph.update_context(self):
-      pure_args, pure_kwargs = self._get_pure_args_kwargs(args, kwargs)
-      pure_args_out, pure_kwargs_out, pure_out = self.jitted_fn(
-        *pure_args, **pure_kwargs
+      pure_args, pure_kwargs = self._split_args(args, kwargs)
+      pure_args_out, pure_kwargs_out, pure_out = self._dispatch(
+        pure_args, pure_kwargs
       )
       out = self._get_non_pure_out(pure_args_out, pure_kwargs_out, pure_out)
     return out
 
+  def _dispatch(self, pure_args, pure_kwargs):
+    if self.persistent_cache_dir is None:
+      return self.jitted_fn(*pure_args, **pure_kwargs)
+    leaves, treedef = jax.tree.flatten((pure_args, pure_kwargs))
+    key = (
+      treedef,
+      tuple(
+        (jax.typeof(leaf), getattr(leaf, 'sharding', None)) for leaf in leaves
+      ),
+    )
+    compiled = self._executables.get(key)
+    if compiled is None:
+      compiled = self._persistent_compile(pure_args, pure_kwargs)
+      self._executables[key] = compiled
+    return compiled(*pure_args, **pure_kwargs)
+
+  def _persistent_compile(self, pure_args, pure_kwargs):
+    """Loads the executable for the given inputs from ``persistent_cache_dir``
+    or compiles and stores it."""
+    from jax.experimental import serialize_executable
+
+    lowered = self.jitted_fn.trace(*pure_args, **pure_kwargs).lower()
+    input_devices = sorted(
+      {
+        device.id
+        for leaf in jax.tree.leaves((pure_args, pure_kwargs))
+        if isinstance(leaf, jax.Array)
+        for device in leaf.sharding.device_set
+      }
+    )
+    try:
+      digest = _executable_digest(lowered, input_devices)
+    except ValueError as e:
+      warnings.warn(
+        f'Not using the persistent cache for {self.__qualname__!r}: {e}',
+        stacklevel=3,
+      )
+      return lowered.compile()
+    path = os.path.join(os.fspath(self.persistent_cache_dir), f'{digest}.bin')
+
+    if os.path.exists(path):
+      try:
+        with open(path, 'rb') as f:
+          device_ids, payload = _read_executable(f)
+        devices = {device.id: device for device in jax.devices()}
+        return serialize_executable.deserialize_and_load(
+          payload,
+          lowered.in_tree,
+          lowered.out_tree,
+          execution_devices=[devices[i] for i in device_ids],
+        )
+      except Exception as e:  # pylint: disable=broad-except
+        warnings.warn(
+          f'Failed to load the executable from {path!r}, recompiling: {e}',
+          stacklevel=3,
+        )
+
+    compiled = lowered.compile()
+    payload, _, _ = serialize_executable.serialize(compiled)
+    device_ids = [
+      device.id for device in compiled.runtime_executable().local_devices()
+    ]
+    os.makedirs(self.persistent_cache_dir, exist_ok=True)
+    # write to a temporary file first so concurrent processes never read a
+    # partially written executable
+    fd, tmp_path = tempfile.mkstemp(
+      dir=self.persistent_cache_dir, suffix='.tmp'
+    )
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        _write_executable(f, device_ids, payload)
+      os.replace(tmp_path, path)
+    except BaseException:
+      os.remove(tmp_path)
+      raise
+    return compiled
+
+  def _call_with_stats(self, jit_stats: JitStats, args, kwargs):
+    name = getattr(self, '__qualname__', None) or repr(self)
+    stats = jit_stats[name]
+    if JIT_STATS_CONTEXT.trace_annotations:
+      annotate = lambda phase: jax.profiler.TraceAnnotation(
+        f'nnx.jit:{name}:{phase}'
+      )
+    else:
+      annotate = lambda phase: contextlib.nullcontext()
+
+    with graph.update_context(self):
+      t0 = time.perf_counter()
+      with annotate('split'):
+        pure_args, pure_kwargs = self._split_args(args, kwargs)
+      t1 = time.perf_counter()
+      num_traces = self.jit_fn.num_traces
+      with annotate('dispatch'):
+        pure_args_out, pure_kwargs_out, pure_out = self._dispatch(
+          pure_args, pure_kwargs
+        )
+      t2 = time.perf_counter()
+      with annotate('merge'):
+        out = self._get_non_pure_out(pure_args_out, pure_kwargs_out, pure_out)
+      t3 = time.perf_counter()
+
+    stats.calls += 1
+    stats.split_time += t1 - t0
+    stats.dispatch_time += t2 - t1
+    stats.merge_time += t3 - t2
+    stats.leaves_in += len(jax.tree.leaves((pure_args, pure_kwargs)))
+    stats.leaves_out += len(
+      jax.tree.leaves((pure_args_out, pure_kwargs_out, pure_out))
+    )
+    if self.jit_fn.num_traces == num_traces:
+      stats.cache_hits += 1
+    else:
+      stats.cache_misses += 1
+      signature = _input_signature(pure_args, pure_kwargs)
+      stats.retrace_causes.append(
+        _retrace_cause(self._last_trace_signature, signature)
+      )
+      self._last_trace_signature = signature
+    return out
+
   def eval_shape(self, *args, **kwargs):
     """See ``jax.eval_shape``."""
     args, kwargs = graph.clone((args, kwargs))
+    # Variables that are not modified are not returned by the jitted function,
+    # make them abstract so the outputs contain no concrete arrays
+    for _, node in graph.iter_graph((args, kwargs)):
+      if isinstance(node, variablelib.Variable) and isinstance(
+        node.raw_value, (jax.Array, np.ndarray)
+      ):
+        node.raw_value = jax.ShapeDtypeStruct(
+          node.raw_value.shape,
+          node.raw_value.dtype,
+          sharding=getattr(node.raw_value, 'sharding', None),
+        )
     with graph.update_context(self):
       pure_args, pure_kwargs = self._get_pure_args_kwargs(args, kwargs)
       pure_args_out, pure_kwargs_out, pure_out = self.jitted_fn.eval_shape(
@@ -723,6 +1402,217 @@ class Traced(Stage):
     return Lowered(lowered, self.jit_wrapped)
 
 
+# -------------------------------
+# precompile
+# -------------------------------
+
+
+def _abstract_leaves(leaves: list[tp.Any]) -> tuple[tp.Any, ...] | None:
+  """Returns the ``(shape, dtype, weak_type)`` of the array leaves, graph
+  nodes are replaced by ``None``. Returns ``None`` if some leaf is neither an
+  array nor a graph node, e.g. a static argument."""
+  avals = []
+  for leaf in leaves:
+    if _is_graph_node_or_variable(leaf):
+      avals.append(None)
+    elif isinstance(
+      leaf, (jax.Array, np.ndarray, np.generic, jax.ShapeDtypeStruct)
+    ):
+      aval = jax.typeof(leaf)
+      avals.append((aval.shape, aval.dtype, aval.weak_type))
+    else:
+      return None
+  return tuple(avals)
+
+
+def _pure_signature(pure_args, pure_kwargs):
+  leaves, treedef = jax.tree.flatten((pure_args, pure_kwargs))
+  return treedef, tuple(map(jax.typeof, leaves))
+
+
+def _fits_bucket(avals, bucket_avals) -> bool:
+  for aval, bucket_aval in zip(avals, bucket_avals):
+    if aval is None or bucket_aval is None:
+      if aval is not bucket_aval:
+        return False
+      continue
+    shape, dtype, weak_type = aval
+    bucket_shape, bucket_dtype, bucket_weak_type = bucket_aval
+    if (
+      dtype != bucket_dtype
+      or weak_type != bucket_weak_type
+      or len(shape) != len(bucket_shape)
+      or any(n > m for n, m in zip(shape, bucket_shape))
+    ):
+      return False
+  return True
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _Bucket:
+  treedef: jax.tree_util.PyTreeDef
+  avals: tuple[tp.Any, ...]
+  pure_signature: tp.Any
+  compiled: jax.stages.Compiled
+
+  @property
+  def size(self) -> int:
+    return sum(
+      int(np.prod(aval[0])) for aval in self.avals if aval is not None
+    )
+
+
+class Precompiled:
+  """A :func:`jit` function with executables compiled ahead of time for a set
+  of input signatures, see :func:`precompile`."""
+
+  def __init__(self, f: JitWrapped, buckets: list[_Bucket], pad: bool):
+    functools.update_wrapper(self, f)
+    self.f = f
+    self.pad = pad
+    self._buckets = {(bucket.treedef, bucket.avals): bucket for bucket in buckets}
+
+  @property
+  def signatures(self) -> list[tuple[tp.Any, ...]]:
+    """The ``(shape, dtype, weak_type)`` of the inputs of each bucket, ``None``
+    for graph nodes."""
+    return [avals for _, avals in self._buckets]
+
+  def _find_bucket(self, treedef, avals) -> _Bucket | None:
+    candidates = [
+      bucket
+      for (bucket_treedef, bucket_avals), bucket in self._buckets.items()
+      if bucket_treedef == treedef and _fits_bucket(avals, bucket_avals)
+    ]
+    return min(candidates, key=lambda bucket: bucket.size, default=None)
+
+  def __call__(self, *args, **kwargs):
+    leaves, treedef = jax.tree.flatten(
+      (args, kwargs), is_leaf=_is_graph_node_or_variable
+    )
+    avals = _abstract_leaves(leaves)
+    if avals is None:
+      # non-array inputs are not abstracted, use the regular jit path
+      return self.f(*args, **kwargs)
+    bucket = self._buckets.get((treedef, avals))
+    if bucket is None and self.pad:
+      bucket = self._find_bucket(treedef, avals)
+      if bucket is not None:
+        leaves = [
+          leaf
+          if aval is None or aval == bucket_aval
+          else jax.numpy.pad(
+            leaf, [(0, m - n) for n, m in zip(aval[0], bucket_aval[0])]
+          )
+          for leaf, aval, bucket_aval in zip(leaves, avals, bucket.avals)
+        ]
+        args, kwargs = jax.tree.unflatten(treedef, leaves)
+    if bucket is None:
+      return self.f(*args, **kwargs)
+
+    with graph.update_context(self.f):
+      pure_args, pure_kwargs = self.f._split_args(args, kwargs)
+      if _pure_signature(pure_args, pure_kwargs) == bucket.pure_signature:
+        pure_args_out, pure_kwargs_out, pure_out = bucket.compiled(
+          *pure_args, **pure_kwargs
+        )
+      else:
+        # the graph nodes changed since the bucket was compiled
+        pure_args_out, pure_kwargs_out, pure_out = self.f._dispatch(
+          pure_args, pure_kwargs
+        )
+      out = self.f._get_non_pure_out(pure_args_out, pure_kwargs_out, pure_out)
+    return out
+
+
+def precompile(
+  f: JitWrapped,
+  signatures: tp.Sequence[tuple[tp.Any, ...]],
+  /,
+  *,
+  pad: bool = False,
+  max_workers: int | None = None,
+) -> Precompiled:
+  """Compiles a :func:`jit` function ahead of time for a set of inputs.
+
+  Each signature is a tuple of positional arguments where arrays can be
+  replaced by ``jax.ShapeDtypeStruct``. All signatures are traced and lowered
+  first and then compiled concurrently in a thread pool. Calling the returned
+  function dispatches to the executable whose signature matches the inputs
+  without tracing, inputs that match no signature fall back to the regular
+  :func:`jit` path. Signatures can only contain arrays and graph nodes, calls
+  with any other input, e.g. a static argument, also use the regular path.
+
+  Example::
+
+    >>> from flax import nnx
+    >>> import jax, jax.numpy as jnp
+    ...
+    >>> model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    >>> @nnx.jit
+    ... def forward(model, x):
+    ...   return model(x)
+    ...
+    >>> forward = nnx.precompile(
+    ...   forward,
+    ...   [(model, jax.ShapeDtypeStruct((n, 2), jnp.float32)) for n in (4, 8)],
+    ...   pad=True,
+    ... )
+    >>> forward(model, jnp.ones((3, 2))).shape
+    (4, 3)
+
+  Args:
+    f: a function created with :func:`jit`.
+    signatures: the positional arguments of each signature.
+    pad: if True, array inputs that match no signature exactly are padded
+      with zeros at the end of each dimension to the smallest signature with
+      the same structure, dtypes and ranks that fits them. The outputs are
+      computed on the padded inputs, ``f`` is responsible for masking the
+      padding if needed. Default False.
+    max_workers: maximum number of threads used to compile, defaults to the
+      ``concurrent.futures.ThreadPoolExecutor`` default.
+
+  Returns:
+    A :class:`Precompiled` function with the same signature as ``f``.
+  """
+  if not isinstance(f, JitWrapped):
+    raise TypeError(f'Expected a function created with nnx.jit, got {f!r}')
+
+  lowered_buckets = []
+  for args in signatures:
+    leaves, treedef = jax.tree.flatten(
+      (tuple(args), {}), is_leaf=_is_graph_node_or_variable
+    )
+    avals = _abstract_leaves(leaves)
+    if avals is None:
+      raise ValueError(
+        'Signatures can only contain arrays, jax.ShapeDtypeStruct and graph '
+        f'nodes, got: {args!r}'
+      )
+    with graph.update_context(f):
+      pure_args, pure_kwargs = f._get_pure_args_kwargs(tuple(args), {})
+      lowered = f.jitted_fn.lower(*pure_args, **pure_kwargs)
+    lowered_buckets.append((
+      treedef,
+      avals,
+      _pure_signature(pure_args, pure_kwargs),
+      lowered,
+    ))
+
+  # XLA releases the GIL while compiling
+  with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+    executables = list(
+      executor.map(lambda bucket: bucket[-1].compile(), lowered_buckets)
+    )
+  buckets = [
+    _Bucket(treedef, avals, pure_signature, compiled)
+    for (treedef, avals, pure_signature, _), compiled in zip(
+      lowered_buckets, executables
+    )
+  ]
+  return Precompiled(f, buckets, pad)
+
+
 # -------------------------------
 # shard_map
 # -------------------------------
@@ -212,11 +212,12 @@ class Variable(tp.Generic[A], reprlib.Representable):
     })
   """
 
-  __slots__ = ('raw_value', '_trace_state', '_var_metadata')
+  __slots__ = ('raw_value', '_trace_state', '_var_metadata', '_var_version')
 
   raw_value: A
   _trace_state: tracers.TraceState
   _var_metadata: dict[str, tp.Any]
+  _var_version: int
 
   def __init__(
     self,
@@ -230,6 +231,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
 
     var_t = type(self)
     object.__setattr__(self, '_trace_state', tracers.TraceState())
+    object.__setattr__(self, '_var_version', 0)
 
     if isinstance(value, VariableMetadata):
       metadata.update(value.metadata)
@@ -276,12 +278,12 @@ class Variable(tp.Generic[A], reprlib.Representable):
       raise errors.TraceContextError(
         f'Cannot mutate {type(self).__name__} from a different trace level'
       )
-    if (
-      name == 'value'
-      or name == 'raw_value'
-      or name == '_var_metadata'
-      or name == '_trace_state'
-    ):
+    if name == 'raw_value':
+      object.__setattr__(self, name, value)
+      self._bump_version()
+    elif name == 'value' or name == '_trace_state':
+      object.__setattr__(self, name, value)
+    elif name == '_var_metadata':
       object.__setattr__(self, name, value)
     else:
       self._var_metadata[name] = value
@@ -321,6 +323,9 @@ class Variable(tp.Generic[A], reprlib.Representable):
   def get_metadata(self):
     return self._var_metadata
 
+  def _bump_version(self) -> None:
+    object.__setattr__(self, '_var_version', self._var_version + 1)
+
   def copy_from(self, other: Variable[A]) -> None:
     if type(self) is not type(other):
       raise ValueError(
@@ -334,12 +339,15 @@ class Variable(tp.Generic[A], reprlib.Representable):
     self._var_metadata.update(other.get_metadata())
 
   def update_from_state(self, variable_state: Variable[A]):
+    if variable_state is self:
+      return
     if self.mutable and (
       variable_state.mutable or isinstance(variable_state.raw_value, jax.Array)
     ):
       self.raw_value[...] = variable_state.raw_value[...] # type: ignore
     else:
       object.__setattr__(self, 'raw_value', variable_state.raw_value)
+    self._bump_version()
 
     if self._var_metadata != variable_state._var_metadata:
       object.__setattr__(
@@ -368,6 +376,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
       self.raw_value[...] = value  # type: ignore
     else:
       object.__setattr__(self, 'raw_value', value)
+    self._bump_version()
 
   def create_value(self, value: A):
     if 'on_create_value' in self._var_metadata:
@@ -418,6 +427,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     # return new instance with updated attributes
     obj = object.__new__(type(self))
     object.__setattr__(obj, '_trace_state', self._trace_state)
+    object.__setattr__(obj, '_var_version', 0)
     object.__setattr__(obj, 'raw_value', kwargs.pop('raw_value'))
     object.__setattr__(obj, '_var_metadata', self.get_metadata() | kwargs)
     return obj
@@ -426,6 +436,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
   def from_metadata(cls, value: A, attributes: dict[str, tp.Any]):
     obj = object.__new__(cls)
     object.__setattr__(obj, '_trace_state', tracers.TraceState())
+    object.__setattr__(obj, '_var_version', 0)
     object.__setattr__(obj, 'raw_value', value)
     object.__setattr__(obj, '_var_metadata', attributes)
     return obj
@@ -433,6 +444,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
   def copy(self: Variable[A]) -> Variable[A]:
     obj = object.__new__(type(self))
     object.__setattr__(obj, '_trace_state', tracers.TraceState())
+    object.__setattr__(obj, '_var_version', 0)
     object.__setattr__(obj, 'raw_value', self.raw_value)
     object.__setattr__(obj, '_var_metadata', self.get_metadata().copy())
     return obj
@@ -502,6 +514,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     object.__setattr__(self, 'raw_value', state['raw_value'])
     object.__setattr__(self, '_trace_state', state['_trace_state'])
     object.__setattr__(self, '_var_metadata', state['_var_metadata'])
+    object.__setattr__(self, '_var_version', 0)
 
   # --------------------------------------------
   # proxy methods
@@ -517,12 +530,14 @@ class Variable(tp.Generic[A], reprlib.Representable):
       )
     if self.mutable:
       self.raw_value[key] = value  # type: ignore
+      self._bump_version()
     elif key == ...:
       self.value = value
     elif isinstance(self.raw_value, jax.Array):
       self.raw_value = self.raw_value.at[key].set(value)  # type: ignore
     else:
       self.raw_value[key] = value  # type: ignore
+      self._bump_version()
 
   def __call__(self, *args, **kwargs) -> tp.Any:
     return self.value(*args, **kwargs)  # type: ignore
@@ -682,6 +697,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__iadd__'):
       value.__iadd__(other)
+      self._bump_version()
     else:
       self.value = value.__add__(other)
     return self
@@ -692,6 +708,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__isub__'):
       value.__isub__(other)
+      self._bump_version()
     else:
       self.value = value.__sub__(other)
     return self
@@ -702,6 +719,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__imul__'):
       value.__imul__(other)
+      self._bump_version()
     else:
       self.value = value.__mul__(other)
     return self
@@ -712,6 +730,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__imatmul__'):
       value.__imatmul__(other)
+      self._bump_version()
     else:
       self.value = value.__matmul__(other)
     return self
@@ -722,6 +741,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__itruediv__'):
       value.__itruediv__(other)
+      self._bump_version()
     else:
       self.value = value.__truediv__(other)
     return self
@@ -732,6 +752,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__ifloordiv__'):
       value.__ifloordiv__(other)
+      self._bump_version()
     else:
       self.value = value.__floordiv__(other)
     return self
@@ -742,6 +763,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__imod__'):
       value.__imod__(other)
+      self._bump_version()
     else:
       self.value = value.__mod__(other)
     return self
@@ -752,6 +774,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__ipow__'):
       value.__ipow__(other)
+      self._bump_version()
     else:
       self.value = value.__pow__(other)
     return self
@@ -762,6 +785,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__ilshift__'):
       value.__ilshift__(other)
+      self._bump_version()
     else:
       self.value = value.__lshift__(other)
     return self
@@ -772,6 +796,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__irshift__'):
       value.__irshift__(other)
+      self._bump_version()
     else:
       self.value = value.__rshift__(other)
     return self
@@ -782,6 +807,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__iand__'):
       value.__iand__(other)
+      self._bump_version()
     else:
       self.value = value.__and__(other)
     return self
@@ -792,6 +818,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__ixor__'):
       value.__ixor__(other)
+      self._bump_version()
     else:
       self.value = value.__xor__(other)
     return self
@@ -802,6 +829,7 @@ class Variable(tp.Generic[A], reprlib.Representable):
     value = self.value
     if hasattr(value, '__ior__'):
       value.__ior__(other)
+      self._bump_version()
     else:
       self.value = value.__or__(other)
     return self
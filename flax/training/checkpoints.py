@@ -19,12 +19,15 @@ other numerical metric in filename.  Cleans up older / worse-performing
 checkpoint files.
 """
 
+import collections
 import functools
+import hashlib
 import os
 import pathlib
 import re
 import time
 import warnings
+from concurrent import futures
 from concurrent.futures import thread
 from typing import (
   Any,
@@ -32,6 +35,8 @@ from typing import (
 from collections.abc import Callable, Iterable
 
 import jax
+import msgpack
+import numpy as np
 import orbax.checkpoint as ocp
 from absl import logging
 from jax import monitoring, process_index
@@ -70,6 +75,12 @@ MP_ARRAY_POSTFIX = '_gda'
 # replaced by this string placeholder.
 MP_ARRAY_PH = '//GDAPlaceholder:'
 
+# Incremental checkpoints store every array leaf once, content-addressed, in a
+# blob directory shared by all steps of a prefix. Occurrences of the array
+# leaves in the saved pytree are replaced by this placeholder followed by the
+# blob path relative to the checkpoint directory.
+BLOB_PH = '//BlobPlaceholder:'
+
 # Add a copy-success file to a distributed array directory to indicate the
 # array save is complete.
 # We need this for GCS because GCS's directory move is not atomic.
@@ -137,31 +148,145 @@ class AsyncManager:
   How to use: create an instance and pass to save_checkpoint() calls:
     am = AsyncManager()
     save_checkpoint(..., async_manager=am)
+
+  Saves are pipelined: ``save_checkpoint`` only snapshots the device arrays
+  with non-blocking device copies and returns, while the host transfer,
+  serialization and file writes run in the background. Several saves can be
+  in flight at once, they are written and committed in submission order.
+
+  Args:
+    max_workers: number of worker threads.
+    max_in_flight_bytes: if defined, the memory budget of the snapshots of the
+      saves in flight. A new save blocks until enough previous saves finished
+      for it to fit in the budget, a single save is always allowed.
+    commit_callback: if defined, called on the worker thread with the result of
+      each save task once it finished, for ``save_checkpoint`` this is the path
+      of the committed checkpoint.
   """
 
-  def __init__(self, max_workers: int = 1):
+  def __init__(
+    self,
+    max_workers: int = 1,
+    max_in_flight_bytes: int | None = None,
+    commit_callback: Callable[[Any], Any] | None = None,
+  ):
     self.executor = thread.ThreadPoolExecutor(max_workers=max_workers)
+    self.max_in_flight_bytes = max_in_flight_bytes
+    self.commit_callback = commit_callback
     self.save_future = None
+    self._in_flight: collections.deque[
+      tuple[futures.Future, int, str | None]
+    ] = collections.deque()
 
   def wait_previous_save(self):
-    """Block until the previous save finishes, to keep files' consistency."""
-    if self.save_future and not self.save_future.done():
+    """Block until the previous saves finish, to keep files' consistency."""
+    in_flight = [future for future, _, _ in list(self._in_flight)]
+    if not all(future.done() for future in in_flight):
       logging.warning(
         'The previous async save_checkpoint has not finished yet. Waiting '
         'for it to complete before the next save.'
       )
-      self.save_future.result()
+    for future in in_flight:
+      future.result()
+
+  def wait_for_budget(self, nbytes: int):
+    """Block until a save of ``nbytes`` fits in the in-flight memory budget.
 
-  def save_async(self, task: Callable[[], Any]):
+    Also raises the exception of any previous save that failed.
+
+    Args:
+      nbytes: the size of the snapshot of the next save.
+    """
+    while self._in_flight and self._in_flight[0][0].done():
+      future, _, _ = self._in_flight.popleft()
+      future.result()
+    if self.max_in_flight_bytes is None:
+      return
+    while (
+      self._in_flight
+      and sum(n for _, n, _ in self._in_flight) + nbytes
+      > self.max_in_flight_bytes
+    ):
+      logging.warning(
+        'The async saves in flight exceed max_in_flight_bytes=%d. Waiting '
+        'for the oldest one to complete before the next save.',
+        self.max_in_flight_bytes,
+      )
+      future, _, _ = self._in_flight.popleft()
+      future.result()
+
+  def pending_paths(self) -> list[str]:
+    """Returns the checkpoint paths of the saves that are still in flight."""
+    return [
+      path
+      for future, _, path in list(self._in_flight)
+      if path is not None and not future.done()
+    ]
+
+  def save_async(
+    self,
+    task: Callable[[], Any],
+    nbytes: int = 0,
+    ckpt_path: str | None = None,
+  ):
     """Run a task async.
 
-    The future will be tracked as self.save_future.
+    Tasks run one after another in submission order. The future of the last
+    task will be tracked as self.save_future.
 
     Args:
       task: The callable to be executed asynchronously.
+      nbytes: the memory held by the task until it finishes, see
+        ``max_in_flight_bytes``.
+      ckpt_path: the checkpoint path written by the task, see
+        ``pending_paths``.
+
+    Returns:
+      The future of the task.
     """
-    self.wait_previous_save()
-    self.save_future = self.executor.submit(task)  # type: ignore
+    self.wait_for_budget(nbytes)
+    previous_future = self.save_future
+
+    def run():
+      if previous_future is not None:
+        futures.wait([previous_future])
+      result = task()
+      if self.commit_callback is not None:
+        self.commit_callback(result)
+      return result
+
+    self.save_future = self.executor.submit(run)
+    self._in_flight.append((self.save_future, nbytes, ckpt_path))
+    return self.save_future
+
+
+def _snapshot_nbytes(target: PyTree) -> int:
+  """Returns the size of the device arrays snapshotted by ``_snapshot``."""
+  return sum(
+    x.nbytes for x in jtu.tree_leaves(target) if isinstance(x, jax.Array)
+  )
+
+
+def _snapshot(target: PyTree) -> PyTree:
+  """Snapshots the device arrays of ``target`` without blocking.
+
+  The training loop can donate or delete the arrays before they are written
+  by a background save. Each array is copied on device, which is only ordered
+  before later computations, and the copy is fetched to host asynchronously.
+  Single-device CPU arrays already live in host memory, they are snapshotted
+  with a zero-copy view instead, which prevents their donation.
+  """
+
+  def snapshot(x):
+    if isinstance(x, jax.Array):
+      devices = x.devices()
+      if len(devices) == 1 and next(iter(devices)).platform == 'cpu':
+        return np.asarray(x)
+      x = x.copy()
+      x.copy_to_host_async()
+    return x
+
+  return jtu.tree_map(snapshot, target)
 
 
 def _split_mp_arrays(
@@ -344,6 +469,103 @@ def _restore_mpas(
   return state_dict
 
 
+def _blobs_dir(base_path: str) -> str:
+  """Returns the blob directory of incremental checkpoints with a prefix."""
+  dir_path, prefix = os.path.split(base_path)
+  # hidden, so that it never matches the checkpoint prefix
+  return os.path.join(dir_path, f'.{prefix}blobs')
+
+
+def _blob_digest(arr: np.ndarray) -> str:
+  """Returns the content hash of an array leaf."""
+  h = hashlib.sha256(f'{arr.dtype.name}{arr.shape}'.encode())
+  h.update(np.ascontiguousarray(arr).view(np.uint8))
+  return h.hexdigest()[:32]
+
+
+def _save_blobs(target: PyTree, base_path: str) -> PyTree:
+  """Writes the array leaves missing from the blob directory.
+
+  Returns ``target`` with the array leaves replaced by blob placeholders.
+  """
+  blobs_dir = _blobs_dir(base_path)
+  io.makedirs(blobs_dir)
+  existing = set(_allowempty_listdir(blobs_dir))
+  num_written = 0
+
+  def save_blob(x):
+    nonlocal num_written
+    if not isinstance(x, (np.ndarray, jax.Array)):
+      return x
+    arr = np.asarray(x)
+    digest = _blob_digest(arr)
+    if digest not in existing:
+      blob_path = os.path.join(blobs_dir, digest)
+      with io.GFile(blob_path + '.tmp', 'wb') as fp:
+        serialization.tensor_file_serialize(arr, fp)
+      io.rename(blob_path + '.tmp', blob_path, overwrite=True)
+      existing.add(digest)
+      num_written += 1
+    return BLOB_PH + os.path.join(os.path.basename(blobs_dir), digest)
+
+  target = jtu.tree_map(save_blob, target)
+  logging.info('Wrote %d new blobs to %s', num_written, blobs_dir)
+  return target
+
+
+def _restore_blobs(state_dict: PyTree, ckpt_path: str) -> PyTree:
+  """Replaces the blob placeholders of a restored pytree with the arrays."""
+  dir_path = os.path.dirname(ckpt_path)
+
+  def restore_blob(x):
+    if isinstance(x, str) and x.startswith(BLOB_PH):
+      blob_path = os.path.join(dir_path, x[len(BLOB_PH) :])
+      with io.GFile(blob_path, 'rb') as fp:
+        return serialization.tensor_file_restore(fp)
+    return x
+
+  return jtu.tree_map(restore_blob, state_dict)
+
+
+def _blob_placeholders(ckpt_path: str) -> set[str]:
+  """Returns the blob names referenced by a checkpoint file.
+
+  Only the manifest is decoded, the array payloads are skipped.
+  """
+  with io.GFile(ckpt_path, 'rb') as fp:
+    contents = fp.read()
+  state_dict = msgpack.unpackb(
+    contents, ext_hook=lambda code, data: None, raw=False
+  )
+  names = set()
+  stack = [state_dict]
+  while stack:
+    x = stack.pop()
+    if isinstance(x, dict):
+      stack.extend(x.values())
+    elif isinstance(x, list):
+      stack.extend(x)
+    elif isinstance(x, str) and x.startswith(BLOB_PH):
+      names.add(os.path.basename(x))
+  return names
+
+
+def _remove_unreferenced_blobs(base_path: str) -> None:
+  """Garbage-collect the blobs not referenced by any remaining checkpoint."""
+  blobs_dir = _blobs_dir(base_path)
+  if not io.exists(blobs_dir):
+    return
+  dir_path, prefix = os.path.split(base_path)
+  referenced = set()
+  for path in _all_checkpoints(dir_path, prefix):
+    if not io.isdir(path):
+      referenced |= _blob_placeholders(path)
+  for name in _allowempty_listdir(blobs_dir):
+    if name not in referenced:
+      logging.info('Removing unreferenced blob %s', name)
+      io.remove(os.path.join(blobs_dir, name))
+
+
 def natural_sort(file_list: Iterable[str], signed: bool = True) -> list[str]:
   """Natural sort for filenames with numerical substrings.
 
@@ -387,8 +609,10 @@ def _remove_invalid_ckpts(
   overwrite: bool,
   keep_every_n_steps: int | None,
   has_mpa: bool,
+  incremental: bool = False,
 ) -> None:
   """Clean up the checkpoint space according to `overwrite`, `keep`, and `keep_every_n_steps` parameters."""
+  removed_ckpts = False
   dir_path, prefix = os.path.split(base_path)
   checkpoint_files: list[Any] = [
     pathlib.PurePath(c) for c in _allowempty_listdir(dir_path)
@@ -414,6 +638,7 @@ def _remove_invalid_ckpts(
         if io.exists(path + MP_ARRAY_POSTFIX):
           io.rmtree(path + MP_ARRAY_POSTFIX)
       _safe_remove(path)
+      removed_ckpts = True
 
   # Remove old checkpoint files.
   last_kept = -float('inf')
@@ -439,6 +664,12 @@ def _remove_invalid_ckpts(
         if io.exists(path + MP_ARRAY_POSTFIX):
           io.rmtree(path + MP_ARRAY_POSTFIX)
       _safe_remove(path)
+      removed_ckpts = True
+
+  # Remove the blobs of incremental checkpoints that are no longer used, blobs
+  # can only become unreferenced by this save or by removed checkpoints.
+  if incremental or removed_ckpts:
+    _remove_unreferenced_blobs(base_path)
 
 
 def _save_commit(
@@ -452,6 +683,7 @@ def _save_commit(
   has_mpa: bool,
   write_commit_success: bool,
   async_manager: AsyncManager | None = None,
+  incremental: bool = False,
 ) -> None:
   """Commit changes after saving checkpoints to disk.
 
@@ -491,7 +723,13 @@ def _save_commit(
 
   # Remove newer and older invalid checkpoints.
   _remove_invalid_ckpts(
-    ckpt_path, base_path, keep, overwrite, keep_every_n_steps, has_mpa
+    ckpt_path,
+    base_path,
+    keep,
+    overwrite,
+    keep_every_n_steps,
+    has_mpa,
+    incremental,
   )
   # Record checkpoint-related metrics.
   ocp.utils.record_saved_duration(ckpt_start_time)
@@ -503,9 +741,17 @@ def _save_commit(
 
 
 def _check_overwrite_error(
-  ckpt_tmp_path: str, ckpt_path: str, base_path: str, step: int
+  ckpt_tmp_path: str,
+  ckpt_path: str,
+  base_path: str,
+  step: int,
+  pending_paths: Iterable[str] = (),
 ):
-  """Throw error if a ckpt file of this step or higher already exists."""
+  """Throw error if a ckpt file of this step or higher already exists.
+
+  ``pending_paths`` are the checkpoints of async saves that are still in
+  flight, they are treated as if they were already committed.
+  """
   dir_path, prefix = os.path.split(base_path)
   checkpoint_files: list[Any] = [
     pathlib.PurePath(c) for c in _allowempty_listdir(dir_path)
@@ -515,6 +761,7 @@ def _check_overwrite_error(
     for c in checkpoint_files
     if c.match(f'{prefix}*') and not c.match(f'*{MP_ARRAY_POSTFIX}')
   ]
+  checkpoint_files += pending_paths
   if ckpt_path in checkpoint_files:
     raise errors.InvalidCheckpointError(ckpt_path, step)
   checkpoint_files.append(ckpt_path)
@@ -529,7 +776,7 @@ def _check_overwrite_error(
 
 
 def _save_main_ckpt_file(
-  target: bytes,
+  target: PyTree,
   has_mpa: bool,
   paths: tuple[str, str],
   base_path: str,
@@ -538,13 +785,20 @@ def _save_main_ckpt_file(
   overwrite: bool,
   keep_every_n_steps: int | None,
   ckpt_start_time: float,
+  incremental: bool = False,
 ):
-  """Save the main checkpoint file via file system."""
+  """Save the main checkpoint file via file system.
+
+  ``target`` is a state dict, it is streamed to the file one leaf at a time.
+  If ``incremental``, the array leaves are stored as blobs instead.
+  """
   ckpt_tmp_path, ckpt_path = paths
   io.makedirs(os.path.dirname(ckpt_path))
+  if incremental:
+    target = _save_blobs(target, base_path)
 
   with io.GFile(ckpt_tmp_path, 'wb') as fp:
-    fp.write(target)
+    serialization.msgpack_serialize_to_file(target, fp)
 
   # Postpone the commitment of checkpoint to after MPA writes are done.
   if not has_mpa:
@@ -558,6 +812,7 @@ def _save_main_ckpt_file(
       ckpt_start_time,
       has_mpa=False,
       write_commit_success=False,
+      incremental=incremental,
     )
 
 
@@ -587,6 +842,7 @@ def save_checkpoint(
   keep_every_n_steps: int | None = None,
   async_manager: AsyncManager | None = None,
   orbax_checkpointer: ocp.Checkpointer | None = None,
+  incremental: bool = False,
 ) -> str:
   """Save a checkpoint of the model. Suitable for single-host.
 
@@ -632,30 +888,42 @@ def save_checkpoint(
     keep_every_n_steps: if defined, keep every checkpoints every n steps (in
       addition to keeping the last 'keep' checkpoints).
     async_manager: if defined, the save will run without blocking the main
-      thread. Only works for single host. Note that an ongoing save will still
-      block subsequent saves, to make sure overwrite/keep logic works correctly.
+      thread. Only works for single host. The device arrays are snapshotted
+      with non-blocking device copies, so they can be donated or deleted right
+      after this call. Ongoing saves don't block subsequent saves unless they
+      exceed the ``max_in_flight_bytes`` of the manager, saves are committed
+      in order to make sure overwrite/keep logic works correctly.
     orbax_checkpointer: if defined, the save will be done by ocp. In the future,
       all Flax checkpointing features will be migrated to Orbax, and starting to
       use an ``orbax_checkpointer`` is recommended. Please check out the
       checkpointing guide
       (https://flax.readthedocs.io/en/latest/guides/training_techniques/use_checkpointing.html#save-checkpoints)
       for how to use Orbax checkpointers.
+    incremental: if True, every array leaf is stored once in a blob directory
+      shared by all steps, addressed by the hash of its content, and the
+      checkpoint file only contains references to the blobs. Leaves that did
+      not change since a previous step are not written again, and blobs that
+      are no longer referenced are removed together with old checkpoints.
+      Always uses the legacy Flax format, not supported with an
+      ``orbax_checkpointer``.
 
   Returns:
     Filename of saved checkpoint.
   """
   jax.monitoring.record_event('/jax/flax/checkpoint/save')
   start_time = time.time()
-  # Make sure all saves are finished before the logic of checking and removing
-  # outdated checkpoints happens.
-  if async_manager:
-    async_manager.wait_previous_save()
 
   ckpt_path, ckpt_tmp_path, base_path = _get_checkpoint_paths(
     ckpt_dir, step, prefix
   )
 
-  if config.flax_use_orbax_checkpointing or orbax_checkpointer:
+  if incremental and orbax_checkpointer:
+    raise ValueError(
+      'Incremental checkpoints are not supported with the Orbax backend.'
+    )
+  if (
+    config.flax_use_orbax_checkpointing or orbax_checkpointer
+  ) and not incremental:
     logging.info(
       'Using Orbax as backend to save Flax checkpoints. For potential'
       ' troubleshooting see:'
@@ -715,14 +983,24 @@ def save_checkpoint(
     DeprecationWarning,
   )
   if not overwrite:
-    _check_overwrite_error(ckpt_tmp_path, ckpt_path, base_path, step)  # type: ignore
+    _check_overwrite_error(
+      ckpt_tmp_path,
+      ckpt_path,
+      base_path,
+      step,  # type: ignore
+      async_manager.pending_paths() if async_manager else (),
+    )
 
-  target = serialization.to_bytes(target)
+  target = serialization.to_state_dict(target)
+  if async_manager:
+    nbytes = _snapshot_nbytes(target)
+    async_manager.wait_for_budget(nbytes)
+    target = _snapshot(target)
 
   # Save the files via I/O sync or async.
   def save_main_ckpt_task():
     jax.monitoring.record_event('/jax/flax/checkpoint/save_main_ckpt_task')
-    return _save_main_ckpt_file(
+    _save_main_ckpt_file(
       target,
       False,
       (ckpt_tmp_path, ckpt_path),
@@ -732,10 +1010,12 @@ def save_checkpoint(
       overwrite,
       keep_every_n_steps,
       start_time,
+      incremental,
     )
+    return ckpt_path
 
   if async_manager:
-    async_manager.save_async(save_main_ckpt_task)
+    async_manager.save_async(save_main_ckpt_task, nbytes, ckpt_path)
   else:
     save_main_ckpt_task()
   end_time = time.time()
@@ -864,7 +1144,9 @@ def save_checkpoint_multiprocess(
 
   target = serialization.to_state_dict(target)
   target, mpa_targets = _split_mp_arrays(target)
-  target = serialization.msgpack_serialize(target)
+  if async_manager:
+    # See save_checkpoint, the main file is written in the background.
+    target = jax.device_get(target)
   has_mpa = bool(mpa_targets)
 
   if not overwrite:
@@ -1008,6 +1290,7 @@ def restore_checkpoint(
   allow_partial_mpa_restoration: bool = False,
   orbax_checkpointer: ocp.Checkpointer | None = None,
   orbax_transforms: dict | None = None,
+  memory_map: bool = False,
 ) -> PyTree:
   """Restore last/best checkpoint from checkpoints in path.
 
@@ -1060,6 +1343,12 @@ def restore_checkpoint(
       restore, if the given checkpoint is saved with ocp.
     orbax_transforms: the Orbax transformations that will be passed into
       ``orbax_checkpointer.restore()`` call.
+    memory_map: bool: whether to restore legacy Flax checkpoints with
+      ``serialization.msgpack_restore_from_file``, which memory-maps local
+      files and returns array leaves that are views into the mapping instead
+      of copies. Worth it for checkpoints dominated by large arrays; trees with
+      many small leaves restore faster without it. ``parallel`` is ignored
+      when set.
 
   Returns:
     Restored ``target`` updated from checkpoint file, or if no step specified
@@ -1138,7 +1427,11 @@ def restore_checkpoint(
   # Legacy Flax checkpoint restoration.
   ckpt_size = io.getsize(ckpt_path)
   with io.GFile(ckpt_path, 'rb') as fp:
-    if parallel and fp.seekable():
+    if memory_map:
+      # Local files are memory-mapped, array leaves are views into the file.
+      checkpoint_contents = None
+      state_dict = serialization.msgpack_restore_from_file(fp)
+    elif parallel and fp.seekable():
       buf_size = 128 << 20  # 128M buffer.
       num_bufs = ckpt_size / buf_size
       logging.debug('num_bufs: %d', num_bufs)
@@ -1163,7 +1456,9 @@ def restore_checkpoint(
     else:
       checkpoint_contents = fp.read()
 
-  state_dict = serialization.msgpack_restore(checkpoint_contents)
+  if checkpoint_contents is not None:
+    state_dict = serialization.msgpack_restore(checkpoint_contents)
+  state_dict = _restore_blobs(state_dict, ckpt_path)
   state_dict = _restore_mpas(
     state_dict,
     target,
@@ -17,8 +17,11 @@
 import copy
 import os
 import pathlib
+import threading
 from typing import Any
 
+os.environ['XLA_FLAGS'] = '--xla_force_host_platform_device_count=4'
+
 import jax
 import numpy as np
 import orbax.checkpoint as orbax
@@ -284,6 +287,79 @@ class CheckpointsTest(parameterized.TestCase):
     expected_new_object = {str(k): v for k, v in enumerate(test_object1)}
     check_eq(new_object, expected_new_object)
 
+  def test_restore_checkpoint_mmap(self):
+    config.update('flax_use_orbax_checkpointing', False)
+    tmp_dir = self.create_tempdir().full_path
+    test_object = {
+      'a': np.arange(12, dtype=np.float32).reshape(3, 4),
+      'b': {'c': np.array([1, 2, 3], np.int32), 'd': 2},
+    }
+    checkpoints.save_checkpoint(tmp_dir, test_object, 0)
+    new_object = checkpoints.restore_checkpoint(tmp_dir, target=None)
+    check_eq(new_object, test_object)
+    new_object = checkpoints.restore_checkpoint(
+      tmp_dir, target=None, memory_map=True
+    )
+    check_eq(new_object, test_object)
+    # array leaves are read-only views into the memory-mapped checkpoint
+    self.assertFalse(new_object['a'].flags.owndata)
+    self.assertFalse(new_object['a'].flags.writeable)
+
+  def test_save_restore_incremental(self):
+    tmp_dir = self.create_tempdir().full_path
+    blobs_dir = os.path.join(tmp_dir, '.test_blobs')
+    backbone = {'kernel': np.arange(12, dtype=np.float32).reshape(3, 4)}
+    test_objects = [
+      {'backbone': backbone, 'head': np.full((3,), i, np.float32), 'step': i}
+      for i in range(3)
+    ]
+    async_manager = checkpoints.AsyncManager()
+    for i, test_object in enumerate(test_objects):
+      checkpoints.save_checkpoint(
+        tmp_dir,
+        test_object,
+        i,
+        prefix='test_',
+        keep=2,
+        incremental=True,
+        async_manager=async_manager if i == 1 else None,
+      )
+      async_manager.wait_previous_save()
+      # the backbone is only written once
+      self.assertLen(os.listdir(blobs_dir), min(i, 1) + 2)
+    self.assertEqual(checkpoints.available_steps(tmp_dir, 'test_'), [1, 2])
+
+    for step in (1, 2):
+      new_object = checkpoints.restore_checkpoint(
+        tmp_dir, test_objects[0], step=step, prefix='test_'
+      )
+      check_eq(new_object, test_objects[step])
+    new_object = checkpoints.restore_checkpoint(
+      tmp_dir, target=None, prefix='test_'
+    )
+    check_eq(new_object, test_objects[2])
+
+    with self.assertRaisesRegex(ValueError, 'not supported'):
+      checkpoints.save_checkpoint(
+        tmp_dir,
+        test_objects[0],
+        3,
+        prefix='test_',
+        incremental=True,
+        orbax_checkpointer=orbax.Checkpointer(orbax.PyTreeCheckpointHandler()),
+      )
+
+    head1_blob = checkpoints._blob_digest(test_objects[1]['head'])
+    self.assertEqual(
+      checkpoints._blob_placeholders(os.path.join(tmp_dir, 'test_2')),
+      set(os.listdir(blobs_dir)) - {head1_blob},
+    )
+    # pruning step 1 with a regular save releases the blobs only it referenced
+    checkpoints.save_checkpoint(
+      tmp_dir, test_objects[0], 3, prefix='test_', keep=2
+    )
+    self.assertLen(os.listdir(blobs_dir), 2)
+
   @parameterized.parameters({'use_orbax': True}, {'use_orbax': False})
   def test_save_restore_checkpoints_target_singular(self, use_orbax):
     config.update('flax_use_orbax_checkpointing', use_orbax)
@@ -364,6 +440,73 @@ class CheckpointsTest(parameterized.TestCase):
     )
     check_eq(new_object, test_object3)
 
+  def test_async_save_pipelined(self):
+    config.update('flax_use_orbax_checkpointing', False)
+    tmp_dir = self.create_tempdir().full_path
+    committed = []
+    am = checkpoints.AsyncManager(
+      max_in_flight_bytes=3 * 480, commit_callback=committed.append
+    )
+    # multi-device arrays are snapshotted with device copies
+    self.assertGreater(jax.device_count(), 1)
+    mesh = jax.make_mesh((jax.device_count(),), ('x',))
+    sharding = jax.sharding.NamedSharding(mesh, jax.sharding.PartitionSpec('x'))
+    test_objects = [
+      {'a': jax.device_put(jnp.full((120,), i, jnp.float32), sharding)}
+      for i in range(5)
+    ]
+    paths = []
+    self.assertIsInstance(
+      checkpoints._snapshot(test_objects[0])['a'], jax.Array
+    )
+    for i, test_object in enumerate(test_objects):
+      paths.append(
+        checkpoints.save_checkpoint(
+          tmp_dir, test_object, i, prefix='test_', keep=5, async_manager=am
+        )
+      )
+      # the arrays can be donated or deleted right after the save
+      test_object['a'].delete()
+    # the step order is checked against the saves in flight
+    with self.assertRaises(errors.InvalidCheckpointError):
+      checkpoints.save_checkpoint(
+        tmp_dir, {'a': np.zeros((120,))}, 3, prefix='test_', async_manager=am
+      )
+    am.wait_previous_save()
+    self.assertEqual(committed, paths)
+    for i in range(5):
+      new_object = checkpoints.restore_checkpoint(
+        tmp_dir, None, step=i, prefix='test_'
+      )
+      np.testing.assert_array_equal(new_object['a'], np.full((120,), i))
+
+  def test_async_manager_budget(self):
+    am = checkpoints.AsyncManager(max_in_flight_bytes=15)
+    release = threading.Event()
+    first = am.save_async(lambda: release.wait() and 1, nbytes=10)
+    second = None
+
+    def save_second():
+      nonlocal second
+      second = am.save_async(lambda: 2, nbytes=10)
+
+    t = threading.Thread(target=save_second)
+    t.start()
+    t.join(timeout=0.1)
+    # the second save doesn't fit in the budget until the first one finished
+    self.assertTrue(t.is_alive())
+    release.set()
+    t.join()
+    self.assertEqual(first.result(), 1)
+    self.assertEqual(second.result(), 2)
+
+    def fail():
+      raise ValueError('save failed')
+
+    am.save_async(fail)
+    with self.assertRaisesRegex(ValueError, 'save failed'):
+      am.wait_previous_save()
+
   def test_last_checkpoint(self):
     tmp_dir = pathlib.Path(self.create_tempdir().full_path)
     with io.GFile(os.path.join(tmp_dir, 'test_tmp'), 'w') as f:
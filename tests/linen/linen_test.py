@@ -1055,6 +1055,18 @@ class StochasticTest(parameterized.TestCase):
 
     np.testing.assert_array_equal(x1, x2)
 
+  def test_dropout_rng_impl(self):
+    module = nn.Dropout(rate=0.5, deterministic=False, rng_impl='rbg')
+    x = jnp.ones((20, 20))
+    rngs = {'dropout': random.key(0)}
+    y1 = module.apply({}, x, rngs=rngs)
+    y2 = module.apply({}, x, rngs=rngs)
+    y3 = module.apply({}, x, rng=jax.random.key(0, impl='rbg'))
+
+    np.testing.assert_array_equal(y1, y2)
+    self.assertTrue(np.all((y1 == 0.0) | (y1 == 2.0)))
+    self.assertEqual(y3.shape, x.shape)
+
 
 # TODO(flax-dev): add integration tests for RNN cells
 class RecurrentTest(parameterized.TestCase):
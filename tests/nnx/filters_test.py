@@ -15,6 +15,8 @@
 from absl.testing import absltest
 
 from flax import nnx
+from flax.configurations import temp_flip_flag
+from flax.nnx import filterlib
 
 
 class TestFilters(absltest.TestCase):
@@ -31,5 +33,43 @@ class TestFilters(absltest.TestCase):
     self.assertIn('head', head_state)
     self.assertNotIn('backbone', head_state)
 
+  def test_static_predicates(self):
+    def is_static(filter):
+      return filterlib.is_static_predicate(filterlib.to_predicate(filter))
+
+    def is_type(filter):
+      return filterlib.is_type_predicate(filterlib.to_predicate(filter))
+
+    self.assertTrue(is_type(nnx.Param))
+    self.assertTrue(is_type((nnx.Param, nnx.BatchStat)))
+    self.assertTrue(is_type(nnx.Not(nnx.Param)))
+    self.assertTrue(is_type(...))
+    self.assertFalse(is_type(nnx.PathContains('head')))
+    self.assertTrue(is_static(nnx.All(nnx.Param, nnx.PathContains('head'))))
+    self.assertTrue(is_static('params'))
+    self.assertFalse(is_static(lambda path, x: x.ndim > 1))
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_memoized_partition(self):
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.backbone = nnx.Linear(2, 3, rngs=rngs)
+        self.head = nnx.Linear(3, 10, rngs=rngs)
+        self.head.count = nnx.BatchStat(0)
+
+    model = Model(nnx.Rngs(0))
+    filters = (nnx.All(nnx.Param, nnx.PathContains('head')), nnx.BatchStat)
+
+    for _ in range(2):
+      head_params, stats = nnx.state(model, *filters)
+      self.assertEqual(set(head_params['head']), {'kernel', 'bias'})
+      self.assertNotIn('backbone', head_params)
+      self.assertIs(stats['head']['count'], model.head.count)
+
+    # structural changes invalidate the partition
+    model.backbone.count = nnx.BatchStat(0)
+    _, stats = nnx.state(model, *filters)
+    self.assertIn('backbone', stats)
+
 if __name__ == '__main__':
   absltest.main()
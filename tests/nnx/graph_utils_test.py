@@ -14,6 +14,7 @@
 
 import dataclasses
 from functools import partial
+import pickle
 from threading import Thread
 from typing import Any
 
@@ -23,6 +24,7 @@ from flax import linen, nnx, struct
 import jax
 import jax.numpy as jnp
 from flax import config
+from flax.configurations import temp_flip_flag
 
 
 class List(nnx.Module):
@@ -1085,6 +1087,308 @@ class TestGraphUtils(absltest.TestCase):
     self.assertIn('ls', m._object__nodes)
     self.assertLen(jax.tree.leaves(m), 1)
 
+  @temp_flip_flag('graph_flatten_cache', False)
+  def test_graphdef_hash_and_outer_index_cached(self):
+    m = nnx.Sequential(*[nnx.Linear(2, 2, rngs=nnx.Rngs(0)) for _ in range(3)])
+    graphdef1 = nnx.graphdef(m)
+    graphdef2 = nnx.graphdef(m)
+
+    self.assertIsNot(graphdef1, graphdef2)
+    self.assertEqual(graphdef1, graphdef2)
+    self.assertEqual(hash(graphdef1), hash(graphdef2))
+    self.assertEqual(graphdef1._hash, hash(graphdef1))
+    self.assertIs(
+      graphdef1.with_same_outer_index(), graphdef1.with_same_outer_index()
+    )
+    self.assertIs(
+      graphdef1.with_no_outer_index(), graphdef1.with_no_outer_index()
+    )
+    self.assertNotEqual(graphdef1, graphdef1.with_same_outer_index())
+
+    restored = pickle.loads(pickle.dumps(nnx.graphdef([nnx.Param(1)])))
+    self.assertIsNone(restored._hash)
+    self.assertEqual(restored, nnx.graphdef([nnx.Param(1)]))
+
+  def test_intern_graphdef(self):
+    graphdef1 = nnx.graphdef(nnx.Linear(2, 3, rngs=nnx.Rngs(0)))
+    graphdef2 = nnx.graphdef(nnx.Linear(2, 3, rngs=nnx.Rngs(1)))
+    graphdef3 = nnx.graphdef(nnx.Linear(3, 3, rngs=nnx.Rngs(0)))
+
+    canonical = nnx.graph._intern_graphdef(graphdef1)
+    self.assertEqual(canonical, graphdef1)
+    self.assertIs(nnx.graph._intern_graphdef(graphdef2), canonical)
+    self.assertIsNot(nnx.graph._intern_graphdef(graphdef3), canonical)
+
+  def test_lazy_merge(self):
+    class Block(nnx.Module):
+      def __init__(self, rngs):
+        self.linear = nnx.Linear(2, 2, rngs=rngs)
+        self.bn = nnx.BatchNorm(2, rngs=rngs)
+
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.block1 = Block(rngs)
+        self.block2 = Block(rngs)
+        self.count = nnx.BatchStat(jnp.array(0))
+
+    model = Model(nnx.Rngs(0))
+    graphdef, state = nnx.split(model)
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+
+    self.assertNotIn('block1', vars(lazy_model))
+    self.assertNotIn('block2', vars(lazy_model))
+    self.assertIsInstance(lazy_model.count, nnx.BatchStat)
+
+    block1 = lazy_model.block1
+    self.assertIsInstance(block1, Block)
+    self.assertIs(lazy_model.block1, block1)
+    self.assertNotIn('linear', vars(block1))
+    np.testing.assert_allclose(
+      block1.linear.kernel.value, model.block1.linear.kernel.value
+    )
+    self.assertNotIn('block2', vars(lazy_model))
+
+    # split materializes the remaining submodules
+    lazy_graphdef, lazy_state = nnx.split(lazy_model)
+    self.assertEqual(lazy_graphdef, graphdef)
+    self.assertIn('block2', vars(lazy_model))
+    jax.tree.map(np.testing.assert_allclose, lazy_state, state)
+
+  def test_lazy_merge_shared_references(self):
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.a = nnx.Linear(2, 2, rngs=rngs)
+        self.b = nnx.Sequential(self.a, nnx.Linear(2, 2, rngs=rngs))
+
+    graphdef, state = nnx.split(Model(nnx.Rngs(0)))
+
+    model = nnx.merge(graphdef, state, lazy=True)
+    self.assertIs(model.b.layers[0], model.a)
+
+    model = nnx.merge(graphdef, state, lazy=True)
+    a = model.a
+    self.assertIs(model.b.layers[0], a)
+
+  def test_lazy_merge_update(self):
+    model = nnx.Sequential(
+      nnx.Linear(2, 2, rngs=nnx.Rngs(0)), nnx.Linear(2, 2, rngs=nnx.Rngs(1))
+    )
+    graphdef, state = nnx.split(model)
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+
+    self.assertIs(lazy_model.layers[1].kernel, lazy_model.layers[1].kernel)
+    new_state = jax.tree.map(lambda x: x + 1, state)
+    nnx.update(lazy_model, new_state)
+    np.testing.assert_allclose(
+      lazy_model.layers[0].kernel.value, model.layers[0].kernel.value + 1
+    )
+
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+    lazy_model.layers = None
+    self.assertIsNone(lazy_model.layers)
+    self.assertNotIn('_object__lazy', vars(lazy_model))
+
+  def test_lazy_merge_errors(self):
+    graphdef, state = nnx.split(nnx.Linear(2, 3, rngs=nnx.Rngs(0)))
+    with self.assertRaisesRegex(ValueError, 'lazy=True cannot be used'):
+      nnx.graph.unflatten(
+        graphdef, state, index_ref=nnx.graph.IndexMap(), lazy=True
+      )
+    model = nnx.merge(graphdef, state, lazy=True)
+    with self.assertRaises(AttributeError):
+      model.missing
+
+  def test_lazy_merge_keeps_class(self):
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.linear = nnx.Linear(2, 2, rngs=rngs)
+
+      @property
+      def broken(self):
+        return self.missing
+
+    model = Model(nnx.Rngs(0))
+    with self.assertRaisesRegex(AttributeError, "'missing'"):
+      model.broken
+
+    graphdef, state = nnx.split(model)
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+    self.assertIs(type(lazy_model), Model)
+    with self.assertRaisesRegex(AttributeError, "'missing'"):
+      lazy_model.broken
+
+    self.assertIsInstance(lazy_model.linear, nnx.Linear)
+    self.assertIs(type(lazy_model), Model)
+    self.assertNotIn('_object__lazy', vars(lazy_model))
+
+  def test_lazy_merge_pytree(self):
+    model = nnx.Sequential(
+      nnx.Linear(2, 3, rngs=nnx.Rngs(0)),
+      nnx.Linear(3, 2, rngs=nnx.Rngs(1)),
+    )
+    graphdef, state = nnx.split(model)
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+    self.assertIs(type(lazy_model), nnx.Sequential)
+    self.assertEqual(
+      jax.tree.structure(lazy_model), jax.tree.structure(model)
+    )
+    lazy_model = nnx.merge(graphdef, state, lazy=True)
+    jax.tree.map(np.testing.assert_allclose, lazy_model, model)
+
+  def test_iter_variables(self):
+    model = nnx.Sequential(
+      nnx.Linear(2, 3, rngs=nnx.Rngs(0)),
+      nnx.BatchNorm(3, rngs=nnx.Rngs(0)),
+    )
+    model.shared = model.layers[0].kernel
+
+    params = nnx.state(model, nnx.Param)
+    paths = [path for path, _ in nnx.iter_variables(model, nnx.Param)]
+    self.assertCountEqual(paths, [path for path, _ in nnx.to_flat_state(params)])
+    for path, variable in nnx.iter_variables(model, nnx.Param):
+      self.assertIsInstance(variable, nnx.Param)
+
+    size_bytes = nnx.variables_size_bytes(model)
+    self.assertEqual(size_bytes.size, 2 * 3 + 3 + 4 * 3)
+    self.assertEqual(size_bytes.bytes, 4 * size_bytes.size)
+    self.assertEqual(
+      nnx.variables_size_bytes(model, nnx.BatchStat).size, 2 * 3
+    )
+
+    dtypes = nnx.variables_dtypes(model)
+    self.assertEqual(list(dtypes), [np.dtype('float32')])
+    self.assertEqual(dtypes[np.dtype('float32')], size_bytes)
+
+  def test_graphdef_digest(self):
+    def create(din, dout, seed):
+      return nnx.Sequential(
+        nnx.Linear(din, dout, rngs=nnx.Rngs(seed)),
+        partial(nnx.leaky_relu, negative_slope=0.1),
+        nnx.BatchNorm(dout, rngs=nnx.Rngs(seed)),
+      )
+
+    graphdef = nnx.graphdef(create(2, 3, 0))
+    self.assertIsInstance(graphdef.canonical_bytes(), bytes)
+    self.assertEqual(graphdef.digest(), nnx.graphdef(create(2, 3, 1)).digest())
+    self.assertNotEqual(
+      graphdef.digest(), nnx.graphdef(create(2, 4, 0)).digest()
+    )
+    model = create(2, 3, 0)
+    model.layers[1] = partial(nnx.leaky_relu, negative_slope=0.2)
+    self.assertNotEqual(graphdef.digest(), nnx.graphdef(model).digest())
+
+    model.layers[1] = object()
+    with self.assertRaisesRegex(ValueError, 'depends on the process'):
+      nnx.graphdef(model).digest()
+
+
+class TestFlattenPlanCache(absltest.TestCase):
+  def setUp(self):
+    super().setUp()
+    nnx.graph.clear_flatten_plans()
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_split_reuses_graphdef(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    graphdef1, state1 = nnx.split(m)
+    graphdef2, state2 = nnx.split(m)
+
+    self.assertIs(graphdef1, graphdef2)
+    self.assertIs(state2['kernel'], m.kernel)
+    with temp_flip_flag('graph_flatten_cache', False):
+      self.assertEqual(graphdef1, nnx.graphdef(m))
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_structure_change_invalidates_plan(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    graphdef1, _ = nnx.split(m)
+    m.extra = nnx.BatchStat(jnp.zeros(3))
+    graphdef2, state2 = nnx.split(m)
+
+    self.assertIsNot(graphdef1, graphdef2)
+    self.assertIn('extra', state2)
+
+    m.kernel = nnx.Param(jnp.ones((2, 3)))
+    _, state3 = nnx.split(m)
+    self.assertIs(state3['kernel'], m.kernel)
+
+    m.use_bias = False
+    graphdef4, _ = nnx.split(m)
+    self.assertIsNot(graphdef2, graphdef4)
+    self.assertEqual(nnx.merge(*nnx.split(m)).use_bias, False)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_array_attributes_not_cached(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.x = jnp.zeros(3)
+    _, state1 = nnx.split(m)
+    m.x = jnp.ones(3)
+    _, state2 = nnx.split(m)
+
+    np.testing.assert_allclose(state1['x'], 0)
+    np.testing.assert_allclose(state2['x'], 1)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_array_attribute_added_after_caching(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.x = nnx.data(0.0)
+    fp = nnx.graph.fingerprint(m)
+    nnx.split(m)
+    m.x = jnp.zeros(3)
+    with self.assertRaisesRegex(ValueError, 'Arrays leaves are not supported'):
+      nnx.graph.check_fingerprint(m, fp)
+
+    _, state = nnx.split(m)
+    np.testing.assert_allclose(state['x'], 0)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_plan_dropped_with_node(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    nnx.split(m)
+    self.assertLen(nnx.graph.GRAPH_CONTEXT.flatten_plans, 1)
+    del m
+    self.assertEmpty(nnx.graph.GRAPH_CONTEXT.flatten_plans)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_jit_updates_variables_in_place(self):
+    m = StatefulLinear(2, 3, nnx.Rngs(0))
+    w = m.w
+
+    @nnx.jit
+    def f(m, x):
+      return m(x)
+
+    for i in range(3):
+      f(m, jnp.ones((1, 2)))
+      self.assertEqual(m.count.value, i + 1)
+    self.assertIs(m.w, w)
+
+    @nnx.jit
+    def g(m):
+      m.new = nnx.Param(jnp.zeros(()))
+
+    g(m)
+    self.assertIsInstance(m.new, nnx.Param)
+    f(m, jnp.ones((1, 2)))
+    self.assertEqual(m.count.value, 4)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_shared_references(self):
+    m1 = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m2 = nnx.Linear(2, 3, rngs=nnx.Rngs(1))
+    m2.kernel = m1.kernel
+
+    @nnx.jit
+    def f(m1, m2):
+      m1.kernel.value += 1
+      assert m1.kernel is m2.kernel
+
+    for _ in range(2):
+      f(m1, m2)
+    np.testing.assert_allclose(m2.kernel.value, m1.kernel.value)
+    self.assertIs(m2.kernel, m1.kernel)
+
+
 class SimpleModule(nnx.Module):
   pass
 
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 
+import jax
 import jax.numpy as jnp
 import numpy as np
 
@@ -87,3 +88,17 @@ class TestStochastic:
       match='`deterministic` is False, but no `rngs` argument was provided to Dropout',
     ):
       m(x)
+
+  def test_dropout_rng_impl(self):
+    m = nnx.Dropout(rate=0.5, rng_impl='rbg', rngs=nnx.Rngs(dropout=0))
+    x = jnp.ones((4, 10))
+    assert m.rngs.impl == 'rbg'
+
+    y = m(x)
+    assert set(np.unique(y)) <= {0.0, 2.0}
+    assert m.rngs.impl == 'rbg'
+
+    # threefry keys passed at call time are converted deterministically
+    key = jax.random.key(1)
+    np.testing.assert_allclose(m(x, rngs=key), m(x, rngs=key))
+    assert jax.random.key_impl(key) == 'threefry2x32'
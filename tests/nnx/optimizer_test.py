@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+os.environ['XLA_FLAGS'] = '--xla_force_host_platform_device_count=4'
+
 from absl.testing import absltest
 from absl.testing import parameterized
 from flax import nnx
@@ -322,6 +326,130 @@ class TestOptimizer(parameterized.TestCase):
           assert_equal, prev_other_variables, other_variables
       )
 
+  @parameterized.product(
+    optimizer=[optax.sgd, optax.adam, optax.adamw],
+    jit=[False, True],
+  )
+  def test_fused_update(self, optimizer, jit):
+    class MixedModel(nnx.Module):
+      def __init__(self, rngs):
+        self.linear1 = nnx.Linear(2, 3, rngs=rngs)
+        self.norm = nnx.LayerNorm(3, param_dtype=jnp.bfloat16, rngs=rngs)
+        self.linear2 = nnx.Linear(3, 4, rngs=rngs)
+
+      def __call__(self, x):
+        return self.linear2(self.norm(self.linear1(x)))
+
+    x = jax.random.normal(jax.random.key(0), (8, 2))
+    y = jnp.ones((8, 4))
+    loss_fn = lambda model: ((model(x) - y) ** 2).mean()
+
+    def train_step(model, optimizer):
+      optimizer.update(model, nnx.grad(loss_fn)(model))
+
+    if jit:
+      train_step = nnx.jit(train_step)
+
+    model = MixedModel(nnx.Rngs(0))
+    fused_model = nnx.clone(model)
+    tx = optimizer(1e-2)
+    opt = nnx.Optimizer(model, tx, wrt=nnx.Param)
+    fused_opt = nnx.Optimizer(fused_model, tx, wrt=nnx.Param, fused=True)
+
+    leaves = jax.tree.leaves(nnx.pure(fused_opt.opt_state))
+    self.assertLen(leaves, len(jax.tree.leaves(tx.init({'a': 0.0, 'b': 0.0}))))
+
+    for _ in range(3):
+      train_step(model, opt)
+      train_step(fused_model, fused_opt)
+
+    self.assertEqual(fused_opt.step[...], 3)
+    jax.tree.map_with_path(
+      lambda path, a, b: np.testing.assert_allclose(
+        a, b, rtol=1e-6, err_msg=f'Mismatch at path: {path}'
+      ),
+      nnx.state(model),
+      nnx.state(fused_model),
+    )
+    self.assertEqual(fused_model.norm.scale.dtype, jnp.bfloat16)
+
+  def test_fused_sharded_variables(self):
+    model = nnx.Linear(
+      2,
+      3,
+      rngs=nnx.Rngs(0),
+      kernel_init=nnx.with_partitioning(
+        nnx.initializers.lecun_normal(),
+        sharding=('a', 'b'),
+      ),
+    )
+    optimizer = nnx.Optimizer(model, optax.adam(0.1), wrt=nnx.Param, fused=True)
+
+    buffers, unfused = optimizer.opt_state[0].mu
+    self.assertEqual(buffers['float32'].shape, (3,))
+    self.assertLen(unfused, 1)
+    self.assertEqual(unfused[0].sharding, ('a', 'b'))
+    self.assertEqual(unfused[0].shape, (2, 3))
+
+    graphdef, state = nnx.split(optimizer)
+    optimizer = nnx.merge(graphdef, state)
+    loss_fn = lambda model: jnp.sum(model(jnp.ones((1, 2))) ** 2)
+    initial_loss = loss_fn(model)
+    optimizer.update(model, nnx.grad(loss_fn)(model))
+    self.assertLess(loss_fn(model), initial_loss)
+
+    with self.assertRaisesRegex(ValueError, 'do not match'):
+      optimizer.update(
+        nnx.Linear(2, 3, use_bias=False, rngs=nnx.Rngs(0)), nnx.state(model)
+      )
+
+  def test_opt_state_axis(self):
+    if jax.device_count() < 4:
+      self.skipTest('At least 4 devices required')
+    mesh = jax.sharding.Mesh(np.array(jax.devices()[:4]), ('data',))
+    model = Model(8, 4, rngs=nnx.Rngs(0))
+    ref_model = nnx.clone(model)
+
+    optimizer = nnx.Optimizer(
+      model, optax.adam(1e-2), wrt=nnx.Param, opt_state_axis='data', mesh=mesh
+    )
+    ref_optimizer = nnx.Optimizer(ref_model, optax.adam(1e-2), wrt=nnx.Param)
+
+    mu = optimizer.opt_state[0].mu
+    self.assertEqual(mu['linear1']['kernel'].sharding, ('data', None))
+    self.assertEqual(mu['linear2']['kernel'].sharding, (None, 'data'))
+    self.assertEqual(mu['linear2']['bias'].sharding, ('data',))
+    # (3,) is not divisible by the axis size, stays replicated
+    self.assertIsNone(mu['linear1']['bias'].get_metadata().get('sharding'))
+    self.assertEqual(
+      mu['linear1']['kernel'].value.addressable_shards[0].data.shape, (2, 3)
+    )
+
+    x = jax.random.normal(jax.random.key(0), (8, 8))
+
+    @nnx.jit
+    def train_step(model, optimizer):
+      grads = nnx.grad(lambda model: (model(x) ** 2).mean())(model)
+      optimizer.update(model, grads)
+
+    for _ in range(3):
+      train_step(model, optimizer)
+      train_step(ref_model, ref_optimizer)
+
+    np.testing.assert_allclose(
+      model.linear1.kernel[...], ref_model.linear1.kernel[...], atol=1e-6
+    )
+    self.assertEqual(
+      mu['linear1']['kernel'].value.sharding.spec,
+      jax.sharding.PartitionSpec('data'),
+    )
+    self.assertTrue(model.linear1.kernel.value.sharding.is_fully_replicated)
+
+    with self.assertRaisesRegex(ValueError, 'not found in the mesh'):
+      nnx.Optimizer(
+        model, optax.adam(1e-2), wrt=nnx.Param, opt_state_axis='x', mesh=mesh
+      )
+
 
 if __name__ == '__main__':
   absltest.main()
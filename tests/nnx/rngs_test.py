@@ -192,5 +192,107 @@ class TestRngs(absltest.TestCase):
 
     np.testing.assert_allclose(y1, y2)
 
+  def test_host_counter(self):
+    host_rngs = nnx.Rngs(0, dropout=1, host_counter=True)
+    device_rngs = nnx.Rngs(0, dropout=1)
+
+    for _ in range(3):
+      np.testing.assert_array_equal(
+        jax.random.key_data(host_rngs.params()),
+        jax.random.key_data(device_rngs.params()),
+      )
+    self.assertIsInstance(host_rngs.params.count.value, np.ndarray)
+    self.assertEqual(host_rngs.params.count.value, 3)
+    self.assertTrue(host_rngs['dropout'].host_counter)
+
+    # inside transforms the count is traced as before
+    @nnx.jit
+    def f(rngs):
+      return rngs.dropout()
+
+    np.testing.assert_array_equal(
+      jax.random.key_data(f(host_rngs)),
+      jax.random.key_data(f(device_rngs)),
+    )
+    self.assertEqual(host_rngs['dropout'].count.value, 1)
+    host_rngs.dropout()
+    self.assertIsInstance(host_rngs['dropout'].count.value, np.ndarray)
+    self.assertEqual(host_rngs['dropout'].count.value, 2)
+
+    forked = host_rngs.fork()
+    self.assertTrue(forked['dropout'].host_counter)
+
+  def test_take(self):
+    for host_counter in (False, True):
+      with self.subTest(host_counter=host_counter):
+        rngs = nnx.Rngs(0, host_counter=host_counter)
+        reference = nnx.Rngs(0)
+        rngs.params()
+        reference.params()
+
+        keys = rngs.take(4)
+        self.assertEqual(keys.shape, (4,))
+        self.assertEqual(rngs.params.count.value, 5)
+        for i in range(4):
+          np.testing.assert_array_equal(
+            jax.random.key_data(keys[i]),
+            jax.random.key_data(reference.params()),
+          )
+
+  def test_reserved_stream_names(self):
+    with self.assertRaises(TypeError):
+      nnx.Rngs(0, True)
+    # reserved names can still be used as streams through a mapping
+    rngs = nnx.Rngs({'host_counter': 0, 'impl': 1}, host_counter=True)
+    self.assertTrue(rngs.impl.host_counter)
+    self.assertEqual(rngs.host_counter.count.value, 0)
+
+  def test_impl(self):
+    rngs = nnx.Rngs(0, dropout=1, impl={'dropout': 'rbg'})
+    self.assertEqual(rngs.default.impl, 'threefry2x32')
+    self.assertEqual(rngs.dropout.impl, 'rbg')
+    self.assertEqual(rngs.dropout().dtype, jax.random.key(0, impl='rbg').dtype)
+
+    # integer seeds use the implementation directly
+    np.testing.assert_array_equal(
+      jax.random.key_data(rngs.dropout.key.value),
+      jax.random.key_data(jax.random.key(1, impl='rbg')),
+    )
+    # keys of a different implementation are converted
+    rngs = nnx.Rngs(dropout=jax.random.key(1), impl='rbg')
+    self.assertEqual(rngs.dropout.impl, 'rbg')
+
+    with self.assertRaisesRegex(ValueError, 'do not exist.*dropuot'):
+      nnx.Rngs(params=0, dropout=1, impl={'dropuot': 'rbg'})
+
+    # abstract keys
+    abstract = nnx.eval_shape(lambda: nnx.Rngs(0, impl='rbg'))
+    self.assertIsInstance(abstract.default.key.value, jax.ShapeDtypeStruct)
+    self.assertEqual(abstract.default.impl, 'rbg')
+
+    rngs = nnx.Rngs(params=0, dropout=1, impl={'dropout': 'rbg'})
+    forked = rngs.fork(split={'params': 2, ...: None})
+    self.assertEqual(forked.params.impl, 'threefry2x32')
+    self.assertEqual(forked.dropout.impl, 'rbg')
+    self.assertEqual(rngs.dropout.fork(impl='unsafe_rbg').impl, 'unsafe_rbg')
+
+    with nnx.split_rngs(rngs, splits=3):
+      self.assertEqual(rngs.dropout.key.shape, (3,))
+      self.assertEqual(rngs.dropout.impl, 'rbg')
+
+      @nnx.vmap(in_axes=0)
+      def f(rngs):
+        return rngs.dropout()
+
+      self.assertEqual(f(rngs).shape, (3,))
+
+    nnx.reseed(rngs, params=2, dropout=3)
+    self.assertEqual(rngs.params.impl, 'threefry2x32')
+    self.assertEqual(rngs.dropout.impl, 'rbg')
+    np.testing.assert_array_equal(
+      jax.random.key_data(rngs.params.key.value),
+      jax.random.key_data(nnx.Rngs(params=2).params()),
+    )
+
 if __name__ == '__main__':
   absltest.main()
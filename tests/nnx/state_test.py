@@ -92,6 +92,30 @@ class StateTest(absltest.TestCase):
     nnx.update(module, state)
     assert jnp.array_equal(module(jnp.ones((3, 4))), jnp.zeros((3, 5)))
 
+  def test_flat_state_split(self):
+    module = nnx.BatchNorm(3, rngs=nnx.Rngs(0))
+    _, flat_state = nnx.graph.flatten(module)
+
+    params, batch_stats = flat_state.split(nnx.Param, nnx.BatchStat)
+    # groups are index views into the paths of the parent
+    self.assertIs(params._table, flat_state.paths)
+    self.assertEqual(list(params), [flat_state[0], flat_state[2]])
+    self.assertEqual(params[1:][0], (('scale',), module.scale))
+    mean = batch_stats._take([0])
+    self.assertIs(mean._table, flat_state.paths)
+    self.assertEqual(mean.paths, (('mean',),))
+    self.assertEqual(params.paths, (('bias',), ('scale',)))
+    self.assertEqual(batch_stats.paths, (('mean',), ('var',)))
+    self.assertIs(params.leaves[0], module.bias)
+
+    # selecting everything shares the paths but not the mutable leaves
+    everything = flat_state.split(...)
+    self.assertIs(everything.paths, flat_state.paths)
+    self.assertEqual(everything.leaves, flat_state.leaves)
+    everything.leaves[0] = None
+    self.assertIs(flat_state.leaves[0], module.bias)
+    self.assertEqual(flat_state[1:].paths, flat_state.paths[1:])
+
 
 if __name__ == '__main__':
   absltest.main()
\ No newline at end of file
@@ -14,6 +14,9 @@
 
 import dataclasses
 from functools import partial
+import os
+import shutil
+import tempfile
 import typing as tp
 
 from absl.testing import absltest
@@ -25,7 +28,9 @@ import jax
 from jax.experimental import checkify, mesh_utils
 import jax.numpy as jnp
 import numpy as np
+import optax
 from flax import errors, config
+from flax.configurations import temp_flip_flag
 
 
 class List(nnx.Module):
@@ -68,6 +73,319 @@ class TestJIT(absltest.TestCase):
     assert m.a == 2
     assert out == 1.0
 
+  def test_jit_skips_unchanged_variables(self):
+    m = Dict(a=nnx.Param(jnp.array(1.0)), b=nnx.BatchStat(jnp.array(0.0)))
+    a, b = m.a.raw_value, m.b.raw_value
+
+    @nnx.jit
+    def f(m: Dict):
+      m.b.value += m.a.value
+      return m.a.value
+
+    # only the updated BatchStat and the output are returned
+    self.assertEqual(f.lower(m).out_tree.num_leaves, 2)
+
+    out = f(m)
+
+    self.assertEqual(out, 1.0)
+    self.assertIs(m.a.raw_value, a)
+    self.assertIsNot(m.b.raw_value, b)
+    self.assertEqual(m.b.value, 1.0)
+
+  def test_jit_donate_writes_back_all_variables(self):
+    m = Dict(a=nnx.Param(jnp.array(1.0)), b=nnx.BatchStat(jnp.array(0.0)))
+    a = m.a.raw_value
+
+    @nnx.jit(donate_argnums=0)
+    def f(m: Dict):
+      m.b.value += m.a.value
+
+    f(m)
+
+    self.assertIsNot(m.a.raw_value, a)
+    self.assertEqual(m.a.value, 1.0)
+    self.assertEqual(m.b.value, 1.0)
+
+  def test_jit_eval_shape_unchanged_variables(self):
+    m = Dict(a=nnx.Param(jnp.ones((2, 3))))
+
+    @nnx.jit
+    def f(m: Dict):
+      return m
+
+    m_out = f.eval_shape(m)
+
+    self.assertIsInstance(m_out.a.value, jax.ShapeDtypeStruct)
+    self.assertEqual(m_out.a.value.shape, (2, 3))
+    self.assertIsInstance(m.a.value, jax.Array)
+
+  def test_jit_stats(self):
+    m = Dict(a=nnx.Param(jnp.ones((2, 3))), b=nnx.BatchStat(jnp.array(0)))
+
+    @nnx.jit
+    def f(m: Dict, x):
+      m.b.value += 1
+      return x
+
+    with nnx.jit_stats(trace_annotations=True) as stats:
+      f(m, jnp.ones(2))
+      f(m, jnp.ones(2))
+      f(m, jnp.ones(3))
+      f(m, 1)
+
+    f(m, jnp.ones(2))
+
+    f_stats = stats[f.__qualname__]
+    self.assertEqual(f_stats.calls, 4)
+    self.assertEqual(f_stats.cache_hits, 1)
+    self.assertEqual(f_stats.cache_misses, 3)
+    self.assertLen(f_stats.retrace_causes, 3)
+    self.assertEqual(f_stats.retrace_causes[0], 'first call')
+    self.assertIn('float32[2] -> float32[3]', f_stats.retrace_causes[1])
+    self.assertIn('float32[3] -> int32[]', f_stats.retrace_causes[2])
+    # 2 Variables and x in, the updated Variable and x out
+    self.assertEqual(f_stats.leaves_in, 4 * 3)
+    self.assertEqual(f_stats.leaves_out, 4 * 2)
+    self.assertGreater(f_stats.total_time, 0.0)
+    self.assertEqual(m.b.value, 5)
+
+  def test_jit_cache_graph_nodes(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.count = nnx.BatchStat(jnp.array(0))
+
+    @nnx.jit(cache_graph_nodes=True)
+    def f(m: nnx.Linear, x):
+      m.count.value += 1
+      return m(x)
+
+    x = jnp.ones((1, 2))
+    y = f(m, x)
+    cached = f._graph_node_args
+    self.assertIsNotNone(cached)
+    y = f(m, x)
+    # creating or changing unrelated objects keeps the split
+    other = nnx.Linear(2, 3, rngs=nnx.Rngs(2))
+    other.bias = nnx.Param(jnp.zeros((3,)))
+    y = f(m, x)
+    self.assertIs(f._graph_node_args, cached)
+    self.assertEqual(m.count.value, 3)
+    np.testing.assert_allclose(y, m(x))
+
+    # metadata changes of nested Variables are detected
+    m.count.some_metadata = 1
+    f(m, x)
+    self.assertIsNot(f._graph_node_args, cached)
+    cached = f._graph_node_args
+    self.assertEqual(m.count.value, 4)
+
+    # structural changes are detected
+    m.bias = nnx.Param(jnp.full((3,), 10.0))
+    y = f(m, x)
+    np.testing.assert_allclose(y, x @ m.kernel.value + 10.0)
+    self.assertIsNot(f._graph_node_args, cached)
+
+    # different objects are not reused
+    m2 = nnx.Linear(2, 3, rngs=nnx.Rngs(1))
+    m2.count = nnx.BatchStat(jnp.array(0))
+    f(m2, x)
+    self.assertEqual(m2.count.value, 1)
+    self.assertEqual(m.count.value, 5)
+
+    # aliased arguments are not cached
+    @nnx.jit(cache_graph_nodes=True)
+    def g(m1, m2):
+      m1.count.value += 1
+
+    g(m, m)
+    self.assertIsNone(g._graph_node_args)
+    self.assertEqual(m.count.value, 6)
+
+  def test_jit_cache_graph_nodes_inplace_changes(self):
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.layers = [nnx.Linear(2, 2, rngs=rngs)]
+        self.heads = {'a': nnx.Linear(2, 2, rngs=rngs)}
+
+      def __call__(self, x):
+        for layer in self.layers:
+          x = layer(x)
+        for head in self.heads.values():
+          x = head(x)
+        return x
+
+    @nnx.jit(cache_graph_nodes=True)
+    def f(m, x):
+      return m(x)
+
+    m = Model(nnx.Rngs(0))
+    x = jnp.ones((1, 2))
+    f(m, x)
+    f(m, x)
+
+    # in-place changes of lists and dicts are detected
+    m.layers.append(nnx.Linear(2, 2, rngs=nnx.Rngs(1)))
+    np.testing.assert_allclose(f(m, x), m(x))
+    m.heads['b'] = nnx.Linear(2, 2, rngs=nnx.Rngs(2))
+    np.testing.assert_allclose(f(m, x), m(x))
+
+  def test_jit_persistent_cache(self):
+    cache_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, cache_dir)
+
+    def create_f():
+      @nnx.jit(persistent_cache_dir=cache_dir)
+      def f(m: nnx.Linear, x):
+        m.count.value += 1
+        return m(x)
+
+      return f
+
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.count = nnx.BatchStat(jnp.array(0))
+    x = jnp.ones((1, 2))
+
+    f = create_f()
+    y = f(m, x)
+    np.testing.assert_allclose(y, m(x))
+    self.assertEqual(m.count.value, 1)
+    self.assertLen(os.listdir(cache_dir), 1)
+
+    # a new function, as in a restarted process, loads the executable
+    f = create_f()
+    m2 = nnx.Linear(2, 3, rngs=nnx.Rngs(1))
+    m2.count = nnx.BatchStat(jnp.array(0))
+    y = f(m2, x)
+    np.testing.assert_allclose(y, m2(x))
+    self.assertEqual(m2.count.value, 1)
+    self.assertLen(os.listdir(cache_dir), 1)
+
+    # different shapes are compiled and stored separately
+    f(m2, jnp.ones((4, 2)))
+    self.assertLen(os.listdir(cache_dir), 2)
+
+    # corrupted files are not deserialized and are recompiled
+    for name in os.listdir(cache_dir):
+      with open(os.path.join(cache_dir, name), 'r+b') as fp:
+        fp.seek(-1, os.SEEK_END)
+        last = fp.read(1)
+        fp.seek(-1, os.SEEK_END)
+        fp.write(bytes([last[0] ^ 0xFF]))
+    f = create_f()
+    with self.assertWarnsRegex(UserWarning, 'does not match its digest'):
+      y = f(m2, x)
+    np.testing.assert_allclose(y, m2(x))
+
+    with self.assertRaisesRegex(ValueError, 'persistent_cache_dir'):
+      nnx.jit(lambda x: x, static_argnums=0, persistent_cache_dir=cache_dir)
+
+  def test_jit_donate_filter(self):
+    for cache_graph_nodes in (False, True):
+      with self.subTest(cache_graph_nodes=cache_graph_nodes):
+        self._check_jit_donate_filter(cache_graph_nodes)
+
+    with self.assertRaisesRegex(ValueError, 'donate cannot be used'):
+      nnx.jit(lambda m: None, donate=nnx.Param, donate_argnums=0)
+
+  def _check_jit_donate_filter(self, cache_graph_nodes):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.count = nnx.BatchStat(jnp.array(0))
+
+    @nnx.jit(donate=nnx.Param, cache_graph_nodes=cache_graph_nodes)
+    def f(m: nnx.Linear, x):
+      m.count.value += 1
+      m.kernel.value += 1.0
+      return m(x)
+
+    x = jnp.ones((1, 2))
+    for i in range(3):
+      kernel, bias, count = m.kernel.value, m.bias.value, m.count.value
+      expected_kernel, expected_bias = np.asarray(kernel) + 1.0, np.asarray(bias)
+      y = f(m, x)
+      # only the Params are donated, all of them are refreshed
+      self.assertTrue(kernel.is_deleted())
+      self.assertFalse(count.is_deleted())
+      self.assertFalse(m.bias.value.is_deleted())
+      np.testing.assert_allclose(m.kernel.value, expected_kernel)
+      np.testing.assert_allclose(m.bias.value, expected_bias)
+      np.testing.assert_allclose(y, m(x))
+      self.assertEqual(m.count.value, i + 1)
+    self.assertEqual(f.jit_fn.num_traces, 1)
+
+  def test_jit_donate_in_shardings_prefix(self):
+    n_devices = jax.local_device_count()
+    devices = mesh_utils.create_device_mesh((n_devices,))
+    mesh = jax.sharding.Mesh(devices, ('a',))
+    P = jax.sharding.PartitionSpec
+    kernel_sharding = jax.sharding.NamedSharding(mesh, P(None, 'a'))
+    m = nnx.Linear(2, 2 * n_devices, rngs=nnx.Rngs(0))
+    m.kernel.value = jax.device_put(m.kernel.value, kernel_sharding)
+
+    # a single prefix only applies to the arguments, not to the donated states
+    replicated = jax.sharding.NamedSharding(mesh, P())
+
+    @nnx.jit(in_shardings=replicated, donate=nnx.Param)
+    def f(m: nnx.Linear, x):
+      return m(x)
+
+    x = jnp.ones((1, 2))
+    kernel = m.kernel.value
+    expected = x @ kernel + m.bias.value
+    np.testing.assert_allclose(f(m, x), expected, rtol=1e-6)
+    self.assertTrue(kernel.is_deleted())
+    self.assertTrue(
+      m.kernel.value.sharding.is_equivalent_to(kernel_sharding, 2)
+    )
+
+  def test_precompile(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    m.count = nnx.BatchStat(jnp.array(0))
+
+    @nnx.jit
+    def f(m: nnx.Linear, x):
+      m.count.value += 1
+      return m(x)
+
+    precompiled = nnx.precompile(
+      f,
+      [(m, jax.ShapeDtypeStruct((n, 2), jnp.float32)) for n in (2, 4, 8)],
+      pad=True,
+    )
+    self.assertLen(precompiled.signatures, 3)
+    self.assertEqual(f.jit_fn.num_traces, 3)
+
+    y = precompiled(m, jnp.ones((4, 2)))
+    np.testing.assert_allclose(y, m(jnp.ones((4, 2))))
+    # padded to the smallest bucket that fits
+    y = precompiled(m, jnp.ones((3, 2)))
+    self.assertEqual(y.shape, (4, 3))
+    np.testing.assert_allclose(y[:3], m(jnp.ones((3, 2))))
+    np.testing.assert_allclose(y[3], m.bias.value)
+    self.assertEqual(m.count.value, 2)
+    self.assertEqual(f.jit_fn.num_traces, 3)
+
+    # inputs that fit no bucket use the regular jit path
+    y = precompiled(m, jnp.ones((16, 2)))
+    self.assertEqual(y.shape, (16, 3))
+    self.assertEqual(m.count.value, 3)
+    self.assertEqual(f.jit_fn.num_traces, 4)
+
+  def test_precompile_static_inputs(self):
+    m = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+
+    @nnx.jit(static_argnames='mode')
+    def f(m: nnx.Linear, x, mode='a'):
+      y = m(x)
+      return y if mode == 'a' else -y
+
+    x = jnp.ones((4, 2))
+    precompiled = nnx.precompile(f, [(m, x)])
+    np.testing.assert_allclose(precompiled(m, x), m(x))
+    # static inputs are not abstracted, they use the regular jit path
+    np.testing.assert_allclose(precompiled(m, x, mode='b'), -m(x))
+
+    with self.assertRaisesRegex(ValueError, 'Signatures can only contain'):
+      nnx.precompile(f, [(m, x, 'b')])
+
   def test_mutable_array_input_output(self):
     m = nnx.mutable_array(jnp.array(1.0))
 
@@ -857,6 +1175,92 @@ class TestGrad(parameterized.TestCase):
     assert m['a'][1].value == 1.0
     assert m['b'].value == 2.0
 
+  @parameterized.parameters(False, True)
+  def test_accumulate_value_and_grad(self, jit):
+    class Model(nnx.Module):
+      def __init__(self, rngs):
+        self.linear = nnx.Linear(2, 3, rngs=rngs)
+        self.bn = nnx.BatchNorm(3, rngs=rngs)
+
+      def __call__(self, x):
+        return self.bn(self.linear(x))
+
+    def loss_fn(model, x, y):
+      loss = jnp.mean((model(x) - y) ** 2)
+      return loss, loss * 2
+
+    x = jax.random.normal(jax.random.key(0), (8, 2))
+    y = jax.random.normal(jax.random.key(1), (8, 3))
+    model = Model(nnx.Rngs(0))
+    ref_model = nnx.clone(model)
+
+    grad_fn = nnx.accumulate_value_and_grad(
+      loss_fn, num_micro_batches=4, has_aux=True
+    )
+    if jit:
+      grad_fn = nnx.jit(grad_fn)
+    (loss, aux), grads = grad_fn(model, x, y)
+
+    # reference: sequential micro-batches
+    ref_grad_fn = nnx.value_and_grad(loss_fn, has_aux=True)
+    ref_losses, ref_grads = [], []
+    for i in range(4):
+      (ref_loss, _), ref_grad = ref_grad_fn(
+        ref_model, x[2 * i : 2 * i + 2], y[2 * i : 2 * i + 2]
+      )
+      ref_losses.append(ref_loss)
+      ref_grads.append(ref_grad)
+    ref_grads = jax.tree.map(lambda *g: sum(g) / 4, *ref_grads)
+
+    self.assertEqual(aux.shape, (4,))
+    np.testing.assert_allclose(loss, np.mean(ref_losses), rtol=1e-6)
+    jax.tree.map(
+      partial(np.testing.assert_allclose, rtol=1e-5, atol=1e-6),
+      grads,
+      ref_grads,
+    )
+    # BatchStat updates are applied once per micro-batch
+    np.testing.assert_allclose(
+      model.bn.mean[...], ref_model.bn.mean[...], rtol=1e-6
+    )
+    np.testing.assert_allclose(model.bn.var[...], ref_model.bn.var[...], rtol=1e-6)
+
+    with self.assertRaisesRegex(ValueError, 'divisible by num_micro_batches'):
+      nnx.accumulate_value_and_grad(loss_fn, num_micro_batches=3, has_aux=True)(
+        model, x, y
+      )
+
+  def test_accumulate_value_and_grad_rngs(self):
+    model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+    dropout = nnx.Dropout(0.5)
+
+    def loss_fn(model, rngs, x):
+      return jnp.mean(dropout(model(x), rngs=rngs) ** 2)
+
+    x = jax.random.normal(jax.random.key(0), (8, 2))
+    rngs = nnx.Rngs(dropout=1)
+    ref_model, ref_rngs = nnx.clone(model), nnx.clone(rngs)
+
+    grad_fn = nnx.accumulate_value_and_grad(loss_fn, num_micro_batches=4)
+    loss, grads = grad_fn(model, rngs, x)
+
+    # Rngs are carried, each micro-batch uses the next dropout key
+    ref_grad_fn = nnx.value_and_grad(loss_fn)
+    ref_losses, ref_grads = [], []
+    for i in range(4):
+      ref_loss, ref_grad = ref_grad_fn(ref_model, ref_rngs, x[2 * i : 2 * i + 2])
+      ref_losses.append(ref_loss)
+      ref_grads.append(ref_grad)
+    ref_grads = jax.tree.map(lambda *g: sum(g) / 4, *ref_grads)
+
+    self.assertEqual(rngs.dropout.count[...], 4)
+    np.testing.assert_allclose(loss, np.mean(ref_losses), rtol=1e-6)
+    jax.tree.map(
+      partial(np.testing.assert_allclose, rtol=1e-5, atol=1e-6),
+      grads,
+      ref_grads,
+    )
+
 
 class TestCustomVJP(parameterized.TestCase):
   def test_basic_call(self):
@@ -1228,6 +1632,58 @@ class TestScan(absltest.TestCase):
     assert y.shape == (5, 1, 3)
     assert out is None
 
+  def test_state_axes_moveaxis(self):
+    model = nnx.Linear(3, 3, rngs=nnx.Rngs(0))
+    graphdef, state = nnx.split(model)
+    state = jax.tree.map(lambda x: jnp.stack([x] * 5), state)
+    xs = jnp.ones((5, 3))
+
+    def forward(axes, state, xs):
+      @nnx.scan(in_axes=(axes, nnx.Carry, 0), out_axes=(nnx.Carry, 0))
+      def f(model, carry, x):
+        return carry, model(x)
+
+      return f(nnx.merge(graphdef, state), jnp.zeros(()), xs)
+
+    axes = nnx.StateAxes({nnx.Param: 0})
+    jaxpr = jax.make_jaxpr(partial(forward, axes))(state, xs)
+    self.assertNotIn('transpose[', str(jaxpr))
+
+    # non-zero axes are still moved
+    axes = nnx.StateAxes({nnx.Param: -1})
+    state = jax.tree.map(lambda x: jnp.moveaxis(x, 0, -1), state)
+    jaxpr = jax.make_jaxpr(partial(forward, axes))(state, xs)
+    self.assertIn('transpose[', str(jaxpr))
+    _, ys = forward(axes, state, xs)
+    np.testing.assert_allclose(ys, jnp.stack([model(xs[0])] * 5), rtol=1e-6)
+
+  @temp_flip_flag('graph_flatten_cache', True)
+  def test_state_axes_partition_memoized(self):
+    nnx.graph.clear_flatten_plans()
+    linear = nnx.Linear(3, 3, rngs=nnx.Rngs(0))
+    graphdef, state = nnx.split(linear)
+    model = nnx.merge(graphdef, jax.tree.map(lambda x: jnp.stack([x] * 5), state))
+    xs = jnp.ones((5, 3))
+
+    def forward(axes):
+      @nnx.scan(in_axes=(axes, nnx.Carry, 0), out_axes=(nnx.Carry, 0))
+      def f(model, carry, x):
+        return carry, model(x)
+
+      return f(model, jnp.zeros(()), xs)[1]
+
+    static_axes = nnx.StateAxes({nnx.PathContains('kernel'): 0, ...: 0})
+    callable_axes = nnx.StateAxes({lambda path, x: 'kernel' in path: 0, ...: 0})
+    for _ in range(2):
+      ys = forward(static_axes)
+      np.testing.assert_allclose(ys, jnp.stack([linear(xs[0])] * 5), rtol=1e-6)
+      forward(callable_axes)
+
+    plan = nnx.graph.GRAPH_CONTEXT.flatten_plans[id(model)]
+    self.assertIn(static_axes.filters, plan.partitions)
+    self.assertNotIn(callable_axes.filters, plan.partitions)
+    nnx.graph.clear_flatten_plans()
+
   def test_variables_in_scan(self):
     def block_init(din, dout, rngs):
       w = nnx.Param(jax.random.normal(rngs.params(), (din, dout)))
@@ -1840,6 +2296,47 @@ class TestScan(absltest.TestCase):
     x = jnp.ones((16, 10, 20))
     y = rnn_forward(cell, x)
 
+  def test_multi_step(self):
+    def train_step(model, optimizer, metrics, x, y):
+      loss_fn = lambda model: jnp.mean((model(x) - y) ** 2)
+      loss, grads = nnx.value_and_grad(loss_fn)(model)
+      optimizer.update(model, grads)
+      metrics.update(loss=loss)
+      return loss
+
+    def create():
+      model = nnx.Linear(2, 3, rngs=nnx.Rngs(0))
+      optimizer = nnx.Optimizer(model, optax.adam(0.1), wrt=nnx.Param)
+      metrics = nnx.MultiMetric(loss=nnx.metrics.Average('loss'))
+      return model, optimizer, metrics
+
+    xs = jax.random.normal(jax.random.key(0), (5, 4, 2))
+    ys = jax.random.normal(jax.random.key(1), (5, 4, 3))
+
+    model, optimizer, metrics = create()
+    losses = nnx.jit(nnx.multi_step(train_step))(
+      model, optimizer, metrics, xs, ys
+    )
+
+    ref_model, ref_optimizer, ref_metrics = create()
+    ref_losses = [
+      nnx.jit(train_step)(ref_model, ref_optimizer, ref_metrics, x, y)
+      for x, y in zip(xs, ys)
+    ]
+
+    self.assertEqual(losses.shape, (5,))
+    self.assertEqual(optimizer.step[...], 5)
+    np.testing.assert_allclose(losses, ref_losses, rtol=1e-5)
+    np.testing.assert_allclose(
+      model.kernel[...], ref_model.kernel[...], rtol=1e-5
+    )
+    np.testing.assert_allclose(
+      metrics.compute()['loss'], ref_metrics.compute()['loss'], rtol=1e-5
+    )
+
+    with self.assertRaisesRegex(ValueError, 'same leading axis size'):
+      nnx.multi_step(train_step)(model, optimizer, metrics, xs, ys[:4])
+
 
 class TestRemat(absltest.TestCase):
   def test_remat_basic(self):
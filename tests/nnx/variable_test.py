@@ -118,5 +118,26 @@ class TestVariable(absltest.TestCase):
     self.assertFalse(nnx.using_mutable_arrays())
     self.assertFalse(nnx.is_mutable_array(v.raw_value))
 
+  def test_version(self):
+    v = nnx.Param(jnp.array(1.0))
+    self.assertEqual(v._var_version, 0)
+
+    v.value = jnp.array(2.0)
+    self.assertEqual(v._var_version, 1)
+    v[...] = jnp.array(3.0)
+    self.assertEqual(v._var_version, 2)
+    v += 1.0
+    self.assertEqual(v._var_version, 3)
+    v.update_from_state(nnx.Param(jnp.array(5.0)))
+    self.assertEqual(v._var_version, 4)
+    v.raw_value = jnp.array(6.0)
+    self.assertEqual(v._var_version, 5)
+
+    # metadata updates and copies don't count as writes
+    v.sharding = None
+    self.assertEqual(v._var_version, 5)
+    self.assertEqual(v.copy()._var_version, 0)
+    self.assertEqual(v.replace(jnp.array(0.0))._var_version, 0)
+
 if __name__ == '__main__':
   absltest.main()
@@ -15,7 +15,9 @@
 """Tests for flax.struct and flax.serialization."""
 
 import collections
+import io
 import platform
+import tempfile
 from typing import Any, NamedTuple
 
 import jax
@@ -442,6 +444,147 @@ class SerializationTest(parameterized.TestCase):
 
     jax.tree_util.tree_map(np.testing.assert_array_equal, tmp, newtmp)
 
+  def test_msgpack_serialize_to_file(self):
+    tree = {
+      'a': np.ones((2, 3)),
+      'b': {'c': 1, 'd': jnp.arange(5, dtype=jnp.bfloat16)},
+      'e': np.float32(2.0),
+      'f': 1 + 2j,
+      'g': jnp.ones(()),
+      'h': np.arange(6).reshape(2, 3).T,
+      'i': np.zeros((0,)),
+      'j': np.arange(70000, dtype=np.uint8),
+    }
+    fp = io.BytesIO()
+    serialization.msgpack_serialize_to_file(tree, fp)
+    self.assertEqual(fp.getvalue(), serialization.msgpack_serialize(tree))
+
+    old_chunksize = serialization.MAX_CHUNK_SIZE
+    serialization.MAX_CHUNK_SIZE = 91 * 8
+    try:
+      tmp = {'a': jnp.ones((10, 10))}
+      fp = io.BytesIO()
+      serialization.to_file(tmp, fp)
+      self.assertEqual(fp.getvalue(), serialization.to_bytes(tmp))
+      newtmp = serialization.from_bytes(tmp, fp.getvalue())
+    finally:
+      serialization.MAX_CHUNK_SIZE = old_chunksize
+    jax.tree_util.tree_map(np.testing.assert_array_equal, tmp, newtmp)
+
+  def test_msgpack_restore_from_file(self):
+    tree = {
+      'a': np.ones((2, 3)),
+      'b': {'c': 1, 'd': jnp.arange(5, dtype=jnp.bfloat16)},
+      'e': np.float32(2.0),
+      'f': 1 + 2j,
+      'g': [None, True, -3, 2**40, 0.5, 'x' * 40, b'bytes'],
+      'h': np.zeros((0,)),
+      'i': np.arange(70000, dtype=np.uint8),
+    }
+    serialized = serialization.msgpack_serialize(tree)
+    expected = serialization.msgpack_restore(serialized)
+    with tempfile.TemporaryFile() as fp:
+      fp.write(b'prefix' + serialized)
+      fp.flush()
+      fp.seek(len(b'prefix'))
+      restored = serialization.msgpack_restore_from_file(fp)
+    self.assertEqual(
+      jax.tree_util.tree_structure(restored),
+      jax.tree_util.tree_structure(expected),
+    )
+    jax.tree_util.tree_map(np.testing.assert_array_equal, restored, expected)
+    self.assertEqual(restored['b']['d'].dtype, jnp.bfloat16)
+    self.assertIsInstance(restored['g'][-1], bytes)
+    # array leaves are views into the memory-mapped file
+    self.assertFalse(restored['a'].flags.owndata)
+    self.assertFalse(restored['a'].flags.writeable)
+
+    # file objects without a file descriptor
+    restored = serialization.msgpack_restore_from_file(io.BytesIO(serialized))
+    jax.tree_util.tree_map(np.testing.assert_array_equal, restored, expected)
+
+    # empty and truncated files
+    with tempfile.TemporaryFile() as fp:
+      with self.assertRaises(ValueError):
+        serialization.msgpack_restore_from_file(fp)
+    with self.assertRaises(ValueError):
+      serialization.msgpack_restore_from_file(io.BytesIO(serialized[:10]))
+
+    old_chunksize = serialization.MAX_CHUNK_SIZE
+    serialization.MAX_CHUNK_SIZE = 91 * 8
+    try:
+      tmp = np.random.uniform(-100, 100, size=(21, 37))
+      with tempfile.TemporaryFile() as fp:
+        serialization.to_file({'a': tmp}, fp)
+        fp.seek(0)
+        restored = serialization.from_file({'a': np.zeros_like(tmp)}, fp)
+    finally:
+      serialization.MAX_CHUNK_SIZE = old_chunksize
+    np.testing.assert_array_equal(restored['a'], tmp)
+
+  def test_tensor_file(self):
+    tree = {
+      'encoder': {
+        'kernel': np.arange(6, dtype=np.float32).reshape(2, 3),
+        'bias': jnp.arange(5, dtype=jnp.bfloat16),
+      },
+      'decoder': {'kernel': np.arange(6).reshape(2, 3).T, 'empty': {}},
+      'scalar': np.float32(2.0),
+      'zeros': np.zeros((0, 4)),
+      'step': 3,
+      'name': 'model',
+    }
+    with tempfile.TemporaryFile() as fp:
+      serialization.tensor_file_serialize(tree, fp)
+      fp.seek(0)
+      restored = serialization.tensor_file_restore(fp)
+      fp.seek(0)
+      partial = serialization.tensor_file_restore(
+        fp, lambda path: path.startswith('encoder/')
+      )
+      fp.seek(0)
+      remote = serialization.tensor_file_restore(io.BytesIO(fp.read()))
+
+    self.assertEqual(
+      jax.tree_util.tree_structure(restored),
+      jax.tree_util.tree_structure(tree),
+    )
+    jax.tree_util.tree_map(np.testing.assert_array_equal, restored, tree)
+    jax.tree_util.tree_map(np.testing.assert_array_equal, remote, tree)
+    self.assertEqual(restored['encoder']['bias'].dtype, jnp.bfloat16)
+    self.assertEqual(restored['decoder']['empty'], {})
+    self.assertEqual(
+      restored['encoder']['kernel'].ctypes.data
+      % serialization._TENSOR_FILE_ALIGNMENT,
+      0,
+    )
+    self.assertFalse(restored['encoder']['kernel'].flags.writeable)
+    self.assertEqual(list(partial), ['encoder'])
+    jax.tree_util.tree_map(
+      np.testing.assert_array_equal, partial['encoder'], tree['encoder']
+    )
+
+  def test_tensor_file_target(self):
+    x = {'encoder': {'kernel': jnp.ones((2, 3))}, 'head': jnp.zeros((3,))}
+    target = {
+      'encoder': {'kernel': jnp.zeros((2, 3))},
+      'head': jnp.full((3,), 7.0),
+    }
+    fp = io.BytesIO()
+    serialization.to_tensor_file(x, fp)
+    fp.seek(0)
+    restored = serialization.from_tensor_file(target, fp)
+    jax.tree_util.tree_map(np.testing.assert_array_equal, restored, x)
+    fp.seek(0)
+    restored = serialization.from_tensor_file(
+      target, fp, path_filter=lambda path: path.startswith('encoder/')
+    )
+    np.testing.assert_array_equal(restored['encoder']['kernel'], jnp.ones((2, 3)))
+    np.testing.assert_array_equal(restored['head'], jnp.full((3,), 7.0))
+
+    with self.assertRaisesRegex(ValueError, 'Not a Flax tensor file'):
+      serialization.tensor_file_restore(io.BytesIO(serialization.to_bytes(x)))
+
   @parameterized.parameters(
     {
       'target': [[[1, 2, 3], [4, 5]]],